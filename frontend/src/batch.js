@@ -0,0 +1,20 @@
+import axios from 'axios'
+
+// Several API GETs in one POST /api/university/batch/ (authenticated once).
+// Resolves to one { path, status, body } per path, in the same order; a
+// failed sub-request does not fail the others, so check each status.
+export async function batchGet(paths, { token, apiBase = '' } = {}) {
+  const res = await axios.post(
+    `${apiBase}/api/university/batch/`,
+    { requests: paths },
+    { headers: { Authorization: `Bearer ${token}` } }
+  )
+  return res.data.responses
+}
+
+// Body of a successful sub-response, or `fallback` (logging the failure)
+export function bodyOf(response, fallback = null) {
+  if (response.status >= 200 && response.status < 300) return response.body
+  console.error(`GET ${response.path} failed (${response.status}):`, response.body)
+  return fallback
+}
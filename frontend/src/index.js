@@ -1,8 +1,20 @@
 import React from 'react'
 import { createRoot } from 'react-dom/client'
 import { BrowserRouter, Routes, Route } from 'react-router-dom'
+import axios from 'axios'
 import App from './App'
 
+if (process.env.NODE_ENV === 'development') {
+  // Print the API's Server-Timing breakdown (backend SERVER_TIMING=True)
+  axios.interceptors.response.use((response) => {
+    const timing = response.headers['server-timing']
+    if (timing) {
+      console.debug(`${response.config.method.toUpperCase()} ${response.config.url}`, timing)
+    }
+    return response
+  })
+}
+
 createRoot(document.getElementById('root')).render(
   <BrowserRouter>
     <Routes>
@@ -27,51 +27,16 @@ export default function AdminDashboard() {
   const loadDashboardData = async () => {
     setLoading(true)
     try {
-      const dashRes = await axios.get(
-        `${API_BASE}/api/university/dashboard/`,
+      // Everything the dashboard shows, in one cached response
+      const res = await axios.get(
+        `${API_BASE}/api/university/admin/bootstrap/`,
         { headers: { Authorization: `Bearer ${token}` } }
       )
-      setStats(dashRes.data)
-
-      const facRes = await axios.get(
-        `${API_BASE}/api/university/faculties/`,
-        { headers: { Authorization: `Bearer ${token}` } }
-      )
-      setFaculties(
-        Array.isArray(facRes.data)
-          ? facRes.data
-          : facRes.data.results || []
-      )
-
-      const subRes = await axios.get(
-        `${API_BASE}/api/university/subjects/`,
-        { headers: { Authorization: `Bearer ${token}` } }
-      )
-      setSubjects(
-        Array.isArray(subRes.data)
-          ? subRes.data
-          : subRes.data.results || []
-      )
-
-      const profRes = await axios.get(
-        `${API_BASE}/api/university/professors/`,
-        { headers: { Authorization: `Bearer ${token}` } }
-      )
-      setProfessors(
-        Array.isArray(profRes.data)
-          ? profRes.data
-          : profRes.data.results || []
-      )
-
-      const studRes = await axios.get(
-        `${API_BASE}/api/university/students/`,
-        { headers: { Authorization: `Bearer ${token}` } }
-      )
-      setStudents(
-        Array.isArray(studRes.data)
-          ? studRes.data
-          : studRes.data.results || []
-      )
+      setStats(res.data.counts)
+      setFaculties(res.data.faculties)
+      setSubjects(res.data.subjects)
+      setProfessors(res.data.professors)
+      setStudents(res.data.students)
     } catch (err) {
       console.error('Load error:', err)
     } finally {
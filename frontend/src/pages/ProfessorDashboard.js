@@ -8,6 +8,8 @@ export default function ProfessorDashboard() {
   const [loading, setLoading] = useState(false)
   const [editingEnrollmentId, setEditingEnrollmentId] = useState(null)
   const [grade, setGrade] = useState('')
+  const [courseFilter, setCourseFilter] = useState('')
+  const [ungradedOnly, setUngradedOnly] = useState(false)
 
   const token = localStorage.getItem('access')
 
@@ -28,14 +30,7 @@ export default function ProfessorDashboard() {
         { headers: { Authorization: `Bearer ${token}` } }
       )
       setData(dashRes.data)
-
-      const enrollRes = await axios.get(
-        `${API_BASE}/api/university/enrollments/`,
-        { headers: { Authorization: `Bearer ${token}` } }
-      )
-
-      const list = enrollRes.data?.results || enrollRes.data || []
-      setEnrollments(Array.isArray(list) ? list : [])
+      await loadEnrollments()
     } catch (err) {
       console.error('Load error:', err)
     } finally {
@@ -43,6 +38,34 @@ export default function ProfessorDashboard() {
     }
   }
 
+  // Filtered on the server (university/filters.py), only the columns shown
+  const loadEnrollments = async (
+    subject = courseFilter,
+    ungraded = ungradedOnly
+  ) => {
+    const params = { fields: 'id,student_username,subject_name,grade,score' }
+    if (subject) params.subject = subject
+    if (ungraded) params.grade = 'ungraded'
+
+    const enrollRes = await axios.get(
+      `${API_BASE}/api/university/enrollments/`,
+      { params, headers: { Authorization: `Bearer ${token}` } }
+    )
+
+    const list = enrollRes.data?.results || enrollRes.data || []
+    setEnrollments(Array.isArray(list) ? list : [])
+  }
+
+  const handleFilterChange = async (subject, ungraded) => {
+    setCourseFilter(subject)
+    setUngradedOnly(ungraded)
+    try {
+      await loadEnrollments(subject, ungraded)
+    } catch (err) {
+      console.error('Load error:', err)
+    }
+  }
+
   const handleGradeChange = async (enrollmentId, newGrade) => {
     try {
       await axios.patch(
@@ -111,6 +134,25 @@ export default function ProfessorDashboard() {
       {activeTab === 'grades' && (
         <div>
           <h3>Manage Student Grades</h3>
+          <div className="filters">
+            <select
+              value={courseFilter}
+              onChange={e => handleFilterChange(e.target.value, ungradedOnly)}
+            >
+              <option value="">All courses</option>
+              {coursesList.map(course => (
+                <option key={course.id} value={course.id}>{course.name}</option>
+              ))}
+            </select>
+            <label>
+              <input
+                type="checkbox"
+                checked={ungradedOnly}
+                onChange={e => handleFilterChange(courseFilter, e.target.checked)}
+              />
+              {' '}Not graded only
+            </label>
+          </div>
           {enrollments.length === 0 ? (
             <p className="muted">No enrolled students.</p>
           ) : (
@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react'
 import axios from 'axios'
+import { batchGet, bodyOf } from '../batch'
 
 export default function StudentDashboard() {
   const [data, setData] = useState(null)
@@ -8,6 +9,7 @@ export default function StudentDashboard() {
   const [activeTab, setActiveTab] = useState('enrolled')
   const [loading, setLoading] = useState(false)
   const [enrollingId, setEnrollingId] = useState(null)
+  const [studentId, setStudentId] = useState(null)
 
   const token = localStorage.getItem('access')
 
@@ -18,16 +20,23 @@ export default function StudentDashboard() {
   const loadDashboardData = async () => {
     setLoading(true)
     try {
-      const dashRes = await axios.get('/api/university/dashboard/', {
-        headers: { Authorization: `Bearer ${token}` }
-      })
-      setData(dashRes.data)
-      setEnrollments(dashRes.data.enrollments || [])
+      const [dash, courses, profile] = await batchGet(
+        [
+          '/api/university/dashboard/',
+          '/api/university/subjects/',
+          '/api/university/students/me/?fields=id'
+        ],
+        { token }
+      )
+      const dashData = bodyOf(dash, {})
+      setData(dashData)
+      setEnrollments(dashData.enrollments || [])
+
+      const coursesData = bodyOf(courses, [])
+      setAvailableCourses(coursesData.results || coursesData)
 
-      const coursesRes = await axios.get('/api/university/subjects/', {
-        headers: { Authorization: `Bearer ${token}` }
-      })
-      setAvailableCourses(coursesRes.data.results || coursesRes.data)
+      const me = bodyOf(profile)
+      setStudentId(me ? me.id : null)
     } catch (err) {
       console.error('Load error:', err)
     } finally {
@@ -38,15 +47,7 @@ export default function StudentDashboard() {
   const handleEnroll = async (subjectId) => {
     setEnrollingId(subjectId)
     try {
-      const studRes = await axios.get('/api/university/students/', {
-        headers: { Authorization: `Bearer ${token}` }
-      })
-      const students = studRes.data.results || studRes.data
-      const currentStudent = students.find(
-        s => s.user.username === data?.username
-      )
-
-      if (!currentStudent) {
+      if (!studentId) {
         alert('Student profile not found')
         return
       }
@@ -54,7 +55,7 @@ export default function StudentDashboard() {
       await axios.post(
         '/api/university/enrollments/',
         {
-          student: currentStudent.id,
+          student: studentId,
           subject: subjectId
         },
         {
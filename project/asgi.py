@@ -5,6 +5,11 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+The async read endpoints under /api/university/async/ only pay off when the
+project is served from here, e.g.:
+
+    uvicorn project.asgi:application --workers 4
 """
 
 import os
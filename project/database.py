@@ -0,0 +1,77 @@
+"""
+Build PostgreSQL DATABASES entries from a DATABASE_URL.
+
+Used by both settings files:
+
+    DATABASES['default'] = postgres_database(os.environ['DATABASE_URL'])
+
+Connection behaviour is tuned through environment variables:
+
+DB_CONN_MAX_AGE                 Seconds a worker keeps its connection open (default 60)
+DB_CONNECT_TIMEOUT              Seconds to wait for the server when connecting (default 5)
+DB_STATEMENT_TIMEOUT_MS         Abort statements running longer than this (default: off)
+DB_DISABLE_SERVER_SIDE_CURSORS  Set to True behind PgBouncer in transaction pooling mode
+DB_POOL_MIN_SIZE/DB_POOL_MAX_SIZE
+                                Use psycopg 3's connection pool (Django 5.1+) instead
+                                of persistent per-worker connections; refused with
+                                ImproperlyConfigured on older Django
+"""
+import os
+
+import django
+from django.core.exceptions import ImproperlyConfigured
+
+
+POSTGRES_SCHEMES = ('postgres://', 'postgresql://', 'pgsql://')
+
+
+def _env_bool(name, default='False'):
+    return os.environ.get(name, default).lower() in ('true', '1', 'yes')
+
+
+def postgres_database(url):
+    import environ
+
+    config = environ.Env.db_url_config(url)
+    options = config.setdefault('OPTIONS', {})
+
+    # Persistent connections, checked with a cheap query before reuse so a
+    # connection dropped by the server (restart, idle timeout) is replaced
+    # transparently instead of failing the request.
+    config['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', '60'))
+    config['CONN_HEALTH_CHECKS'] = True
+
+    # QuerySet.iterator() streams rows through a named (server-side) cursor on
+    # PostgreSQL. Transaction-mode poolers cannot keep those open.
+    config['DISABLE_SERVER_SIDE_CURSORS'] = _env_bool('DB_DISABLE_SERVER_SIDE_CURSORS')
+
+    options.setdefault('connect_timeout', int(os.environ.get('DB_CONNECT_TIMEOUT', '5')))
+    options.setdefault('application_name', 'university-portal')
+    # TCP keepalives let the client notice a dead server between requests
+    options.setdefault('keepalives', 1)
+    options.setdefault('keepalives_idle', 30)
+    options.setdefault('keepalives_interval', 10)
+    options.setdefault('keepalives_count', 3)
+
+    statement_timeout = os.environ.get('DB_STATEMENT_TIMEOUT_MS')
+    if statement_timeout:
+        options['options'] = f'-c statement_timeout={int(statement_timeout)}'
+
+    pool_max = os.environ.get('DB_POOL_MAX_SIZE')
+    if pool_max:
+        # Older Django passes OPTIONS['pool'] on to the driver, which fails
+        # every connection attempt at runtime rather than here
+        if django.VERSION < (5, 1):
+            raise ImproperlyConfigured(
+                f'DB_POOL_MAX_SIZE needs Django 5.1 or later (this is {django.get_version()}); '
+                'unset it to use persistent connections (DB_CONN_MAX_AGE).'
+            )
+        # Requires psycopg[pool]; the pool replaces CONN_MAX_AGE, which must
+        # then be 0.
+        options['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '2')),
+            'max_size': int(pool_max),
+        }
+        config['CONN_MAX_AGE'] = 0
+
+    return config
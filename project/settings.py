@@ -2,6 +2,8 @@ from pathlib import Path
 from datetime import timedelta
 import os
 
+from project.database import POSTGRES_SCHEMES, postgres_database
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = os.environ.get(
@@ -33,9 +35,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'university.metrics.MetricsMiddleware',
+    'university.slow_queries.SlowQueryMiddleware',
+    'university.server_timing.ServerTimingMiddleware',
+    'university.compression.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'project.static_files.StaticFilesMiddleware',
 
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -44,6 +50,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'university.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'project.urls'
@@ -65,13 +72,114 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'project.wsgi.application'
 
+# SQLite with WAL, busy timeout and BEGIN IMMEDIATE (project/backends/sqlite3)
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'project.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+        'OPTIONS': {
+            'pragmas': {
+                'journal_mode': 'WAL',
+                'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+                'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '5000')),
+                'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', '-20000')),
+                'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', str(128 * 1024 * 1024))),
+            },
+            'transaction_mode': os.environ.get('SQLITE_TRANSACTION_MODE', 'IMMEDIATE'),
+        },
     }
 }
 
+# PostgreSQL when DATABASE_URL is set (see project/database.py)
+DATABASE_URL = os.environ.get('DATABASE_URL', '')
+if DATABASE_URL.startswith(POSTGRES_SCHEMES):
+    DATABASES['default'] = postgres_database(DATABASE_URL)
+
+# Optional read replica: DATABASE_REPLICA_URL for PostgreSQL, or point
+# DB_REPLICA_NAME at a copy of the SQLite file. Reads from the university API
+# go there; see university/routers.py.
+if os.environ.get('DATABASE_REPLICA_URL'):
+    DATABASES['replica'] = {
+        **postgres_database(os.environ['DATABASE_REPLICA_URL']),
+        'TEST': {'MIRROR': 'default'},
+    }
+elif os.environ.get('DB_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ['DB_REPLICA_NAME'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Optional separate database for TokenBlacklist, UserSession, LoginAttempt
+# and SecurityEvent (university.routers.SecurityRouter). Create its tables
+# with: python manage.py migrate --database=security
+if os.environ.get('DATABASE_SECURITY_URL'):
+    DATABASES['security'] = postgres_database(os.environ['DATABASE_SECURITY_URL'])
+elif os.environ.get('DB_SECURITY_NAME'):
+    DATABASES['security'] = {
+        **DATABASES['default'],
+        'NAME': os.environ['DB_SECURITY_NAME'],
+    }
+
+DATABASE_ROUTERS = [
+    'university.routers.SecurityRouter',
+    'university.routers.PrimaryReplicaRouter',
+]
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', '10'))
+
+# Per-process metric files, summed by /metrics (university.metrics)
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
+METRICS_FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS', '5'))
+METRICS_ALLOWED_IPS = os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',')
+
+# university.slow_queries: log queries slower than this, and every query of a
+# sampled fraction of requests
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', '100'))
+SLOW_QUERY_SAMPLE_RATE = float(os.environ.get('SLOW_QUERY_SAMPLE_RATE', '0'))
+
+# Server-Timing header on every response (university.server_timing)
+SERVER_TIMING = os.environ.get('SERVER_TIMING', str(DEBUG)) == 'True'
+
+# values_list() fast path for the student/professor/enrollment lists
+# (university.fast_serializers)
+FAST_LIST_SERIALIZERS = os.environ.get('FAST_LIST_SERIALIZERS', 'True') == 'True'
+
+# ?profile=1 / X-Profile reports of administrators' requests (university.profiling)
+PROFILE_DIR = os.environ.get('PROFILE_DIR', '')
+
+# gzip/brotli for API responses (university.compression); never for
+# /api/auth/ or responses setting cookies (BREACH)
+COMPRESSION_PATH_PREFIXES = ['/api/']
+COMPRESSION_EXCLUDE_PREFIXES = ['/api/auth/']
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', '6'))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '4'))
+
+# Seconds before a worker rebuilds its in-memory typeahead index
+# (university.typeahead); 0 keeps it until restart
+TYPEAHEAD_MAX_AGE = int(os.environ.get('TYPEAHEAD_MAX_AGE', '300'))
+
+# Most GETs one POST /api/university/batch/ may carry (university.batch)
+BATCH_MAX_REQUESTS = int(os.environ.get('BATCH_MAX_REQUESTS', '20'))
+
+# Lifetime of a cached admin bootstrap payload; saves invalidate it sooner
+# (university.bootstrap)
+BOOTSTRAP_CACHE_SECONDS = int(os.environ.get('BOOTSTRAP_CACHE_SECONDS', '3600'))
+
+# Rows each statistics counter is split over, so that concurrent writes
+# seldom wait on the same one (university.counters)
+COUNTER_SHARDS = int(os.environ.get('COUNTER_SHARDS', '8'))
+
+# Background jobs (university.jobs, manage.py run_jobs): a running job is
+# retried once it is this old, and finished jobs are purged after JOB_KEEP_DAYS
+JOB_TIMEOUT_SECONDS = int(os.environ.get('JOB_TIMEOUT_SECONDS', '600'))
+JOB_KEEP_DAYS = int(os.environ.get('JOB_KEEP_DAYS', '7'))
+
+# Processes building the faculty reports, one faculty each (university.reports);
+# 1 builds them in the job worker itself
+FACULTY_REPORT_PROCESSES = int(os.environ.get('FACULTY_REPORT_PROCESSES', str(min(4, os.cpu_count() or 1))))
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -103,6 +211,16 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.AllowAny",
     ),
+    # orjson when installed, same output as DRF's JSONRenderer/JSONParser
+    "DEFAULT_RENDERER_CLASSES": (
+        "university.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "university.renderers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 
 
@@ -135,6 +253,7 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 CORS_ALLOW_CREDENTIALS = True
+CORS_EXPOSE_HEADERS = ['Server-Timing']
 
 CORS_ALLOW_HEADERS = [
     'content-type',
@@ -20,6 +20,8 @@ from django.http import HttpResponse
 from django.contrib import admin
 from django.urls import path, include
 from django.http import HttpResponse
+from project.warmup import healthz, readyz
+from university.metrics import metrics
 from university.secure_auth_views import (
     SecureTokenObtainView,
     SecureTokenRefreshView,
@@ -38,6 +40,9 @@ def home(request):
 
 urlpatterns = [
     path('', home, name='home'),
+    path('healthz', healthz, name='healthz'),
+    path('readyz', readyz, name='readyz'),
+    path('metrics', metrics, name='metrics'),
     path('admin/', admin.site.urls),
     # Secure authentication endpoints
     path('api/auth/token/', SecureTokenObtainView.as_view(), name='token_obtain_pair'),
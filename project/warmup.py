@@ -0,0 +1,192 @@
+"""
+Worker warm-up and health endpoints.
+
+A freshly started worker pays one-off costs on its first requests: compiling
+every URL pattern, building DRF serializer fields from model metadata,
+importing simplejwt and PyJWT, connecting to the database and filling the
+ContentType cache. warm_up() does all of that before the worker accepts
+traffic, so the first request after a reload costs the same as any other.
+
+    application = get_wsgi_application()
+    warm_up(application)
+
+/healthz answers 200 while the process is alive. /readyz answers 200 once
+warm-up has finished and the default database responds, 503 otherwise.
+Steps that failed, e.g. on a database that was briefly down, are re-run by
+/readyz at most every WARMUP_RETRY_SECONDS until they succeed.
+
+Warm-up runs when the WSGI module is imported, i.e. in every gunicorn
+worker. Do not combine it with ``gunicorn --preload``: the database
+connection would be opened in the master and shared by the forked workers.
+"""
+import io
+import logging
+import sys
+import threading
+import time
+from wsgiref.util import setup_testing_defaults
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.http import JsonResponse
+from django.urls import URLPattern, URLResolver, get_resolver
+
+logger = logging.getLogger('django')
+
+WARMUP_RETRY_SECONDS = 5
+
+_state = {'ready': False, 'steps': {}, 'failed': [], 'retry_at': 0.0}
+_retry_lock = threading.Lock()
+
+
+def _compile_patterns(resolver):
+    for pattern in resolver.url_patterns:
+        pattern.pattern.regex  # compiled lazily on first access
+        if isinstance(pattern, URLResolver):
+            _compile_patterns(pattern)
+        elif isinstance(pattern, URLPattern):
+            pattern.lookup_str
+
+
+def warm_urls():
+    resolver = get_resolver()
+    resolver.reverse_dict  # populates reverse lookups for every app
+    _compile_patterns(resolver)
+
+
+def warm_serializers():
+    from rest_framework.serializers import BaseSerializer
+    from university import serializers
+
+    for obj in vars(serializers).values():
+        if (
+            isinstance(obj, type)
+            and issubclass(obj, BaseSerializer)
+            and obj.__module__ == serializers.__name__
+        ):
+            obj().fields
+
+
+def warm_jwt():
+    from rest_framework_simplejwt.tokens import AccessToken
+    from university.authentication import CookieJWTAuthentication  # noqa: F401
+
+    # Encode and decode once so PyJWT loads its algorithms and key handling
+    AccessToken(str(AccessToken()))
+
+
+def warm_database():
+    for alias in connections:
+        try:
+            connections[alias].ensure_connection()
+        except DatabaseError:
+            if alias == DEFAULT_DB_ALIAS:
+                raise
+            logger.warning('Warm-up could not connect to database %r', alias)
+
+
+def warm_caches():
+    from django.contrib.contenttypes.models import ContentType
+    from university.models import Faculty
+
+    ContentType.objects.get_for_models(*apps.get_models())
+    list(Faculty.objects.all())
+
+
+def warm_request(application, path='/api/university/'):
+    """Send one request through the full middleware and DRF stack."""
+    host = next((h.lstrip('.') for h in settings.ALLOWED_HOSTS if h != '*'), 'localhost')
+    status = []
+    environ = {
+        'PATH_INFO': path,
+        'HTTP_HOST': host,
+        'HTTP_ACCEPT': 'application/json',
+        'wsgi.url_scheme': 'https',
+        'HTTPS': 'on',
+        'wsgi.errors': sys.stderr,
+        'wsgi.input': io.BytesIO(),
+    }
+    setup_testing_defaults(environ)
+    response = application(environ, lambda line, headers, exc_info=None: status.append(line))
+    try:
+        for _ in response:
+            pass
+    finally:
+        if hasattr(response, 'close'):
+            response.close()
+    return status[0] if status else None
+
+
+def warm_up(application=None):
+    """Run each warm-up step, record its duration and mark the worker ready."""
+    steps = [
+        ('urls', warm_urls),
+        ('serializers', warm_serializers),
+        ('jwt', warm_jwt),
+        ('database', warm_database),
+        ('caches', warm_caches),
+    ]
+    if application is not None:
+        steps.append(('request', lambda: warm_request(application)))
+
+    started = time.perf_counter()
+    ok = _run(steps)
+    logger.info(
+        'Warm-up %s in %.0f ms: %s',
+        'finished' if ok else 'FAILED',
+        (time.perf_counter() - started) * 1000,
+        _state['steps'],
+    )
+    return ok
+
+
+def _run(steps):
+    failed = []
+    for name, step in steps:
+        step_started = time.perf_counter()
+        try:
+            step()
+        except Exception:
+            failed.append((name, step))
+            logger.exception('Warm-up step %r failed', name)
+        _state['steps'][name] = round((time.perf_counter() - step_started) * 1000, 1)
+
+    _state['failed'] = failed
+    _state['retry_at'] = time.monotonic() + WARMUP_RETRY_SECONDS
+    _state['ready'] = not failed
+    return not failed
+
+
+def _retry_failed():
+    # One thread retries; the others answer with the current state
+    if not _retry_lock.acquire(blocking=False):
+        return
+    try:
+        if _state['failed'] and time.monotonic() >= _state['retry_at']:
+            if _run(_state['failed']):
+                logger.info('Warm-up finished on retry: %s', _state['steps'])
+    finally:
+        _retry_lock.release()
+
+
+def healthz(request):
+    return JsonResponse({'status': 'ok'})
+
+
+def readyz(request):
+    if not _state['ready']:
+        _retry_failed()
+    checks = {'warmup': _state['ready']}
+    try:
+        with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            cursor.execute('SELECT 1')
+        checks['database'] = True
+    except DatabaseError:
+        checks['database'] = False
+
+    ready = all(checks.values())
+    return JsonResponse(
+        {'status': 'ready' if ready else 'not ready', 'checks': checks, 'warmup_ms': _state['steps']},
+        status=200 if ready else 503,
+    )
@@ -55,6 +55,13 @@ from django.core.wsgi import get_wsgi_application
 # Initialize Django
 application = get_wsgi_application()
 
+# Pay first-request costs (URL resolver, serializers, JWT, DB connection,
+# caches) now rather than on the first user's request. /readyz reports the
+# result.
+from project.warmup import warm_up
+
+warm_up(application)
+
 # ============================================================================
 # ERROR LOGGING
 # ============================================================================
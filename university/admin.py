@@ -1,8 +1,35 @@
 from django.contrib import admin
-from . import models
+from django.contrib.auth.models import User
+from django.db.models import Q
+from django.utils import timezone
+from . import models, search
 from .security_models import TokenBlacklist, UserSession, LoginAttempt, SecurityEvent
 
 
+class FullTextSearchMixin:
+    """
+    Admin search through the full-text index (university.search) instead of
+    icontains scans; every word must match the start of a word.
+    ``search_kinds`` maps a search document kind to the lookup it matches.
+    All matches are listed, paged like the rest of the change list.
+    """
+    search_kinds = {}
+    search_help_text = 'Every word must match the start of a word, e.g. "ann data".'
+
+    def get_search_fields(self, request):
+        # The change list shows its search box when there are search fields:
+        # here the document kinds searched, in place of model fields
+        return tuple(self.search_kinds)
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        condition = Q()
+        for kind, lookup in self.search_kinds.items():
+            condition |= Q(**{f'{lookup}__in': search.matches(search_term, [kind]).values('object_id')})
+        return queryset.filter(condition), False
+
+
 @admin.register(models.Faculty)
 class FacultyAdmin(admin.ModelAdmin):
     list_display = ('name',)
@@ -14,30 +41,74 @@ class AdministratorAdmin(admin.ModelAdmin):
 
 
 @admin.register(models.Professor)
-class ProfessorAdmin(admin.ModelAdmin):
+class ProfessorAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('user', 'faculty', 'title')
+    search_kinds = {'professor': 'pk'}
 
 
 @admin.register(models.Student)
-class StudentAdmin(admin.ModelAdmin):
+class StudentAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('user', 'faculty', 'enrollment_number')
+    search_kinds = {'student': 'pk'}
 
 
 @admin.register(models.Subject)
-class SubjectAdmin(admin.ModelAdmin):
+class SubjectAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('name', 'faculty', 'professor', 'credits', 'max_students')
+    search_kinds = {'subject': 'pk'}
 
 
 @admin.register(models.Enrollment)
-class EnrollmentAdmin(admin.ModelAdmin):
+class EnrollmentAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('student', 'subject', 'grade', 'score', 'enrolled_date')
     readonly_fields = ('enrolled_date',)
     list_filter = ('subject__faculty', 'grade')
-    search_fields = ('student__user__username', 'subject__name')
+    search_kinds = {'student': 'student_id', 'subject': 'subject_id'}
+
+
 
+@admin.register(models.Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'task', 'queue', 'status', 'attempts', 'run_at', 'finished_at', 'worker')
+    list_filter = ('status', 'queue', 'task')
+    readonly_fields = ('attempts', 'worker', 'locked_at', 'result', 'error', 'created_at', 'finished_at')
+    actions = ['retry']
+
+    @admin.action(description='Queue the selected jobs again')
+    def retry(self, request, queryset):
+        count = queryset.exclude(status=models.Job.RUNNING).update(
+            status=models.Job.QUEUED, run_at=timezone.now(), attempts=0, error='', finished_at=None,
+        )
+        self.message_user(request, f'{count} job(s) queued.')
+
+
+@admin.register(models.FacultyReport)
+class FacultyReportAdmin(admin.ModelAdmin):
+    list_display = ('data_version', 'format', 'size', 'sha256', 'created_at', 'finished_at', 'job')
+    list_filter = ('format',)
+    exclude = ('content',)
+    readonly_fields = ('format', 'data_version', 'job', 'sha256', 'size', 'created_at', 'finished_at')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('content')
 
 # ===== SECURITY MODELS ADMIN =====
 
+class UsernameSearchMixin:
+    """
+    Search by username without joining auth_user, which may be in a
+    different database than the security models (see SecurityRouter).
+    """
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if search_term:
+            user_ids = list(
+                User.objects.filter(username__icontains=search_term).values_list('id', flat=True)
+            )
+            results |= queryset.filter(user_id__in=user_ids)
+        return results, may_have_duplicates
+
+
 @admin.register(TokenBlacklist)
 class TokenBlacklistAdmin(admin.ModelAdmin):
     list_display = ('blacklisted_at', 'expires_at', 'reason')
@@ -53,11 +124,11 @@ class TokenBlacklistAdmin(admin.ModelAdmin):
 
 
 @admin.register(UserSession)
-class UserSessionAdmin(admin.ModelAdmin):
+class UserSessionAdmin(UsernameSearchMixin, admin.ModelAdmin):
     list_display = ('user', 'ip_address', 'created_at', 'last_activity', 'is_active')
     readonly_fields = ('user', 'created_at', 'last_activity', 'ip_address', 'user_agent', 'token_jti')
     list_filter = ('is_active', 'created_at')
-    search_fields = ('user__username', 'ip_address')
+    search_fields = ('ip_address',)
     ordering = ('-last_activity',)
     
     def has_add_permission(self, request):
@@ -80,11 +151,11 @@ class LoginAttemptAdmin(admin.ModelAdmin):
 
 
 @admin.register(SecurityEvent)
-class SecurityEventAdmin(admin.ModelAdmin):
+class SecurityEventAdmin(UsernameSearchMixin, admin.ModelAdmin):
     list_display = ('event_type', 'user', 'ip_address', 'timestamp', 'severity')
     readonly_fields = ('user', 'event_type', 'ip_address', 'user_agent', 'description', 'timestamp', 'severity')
     list_filter = ('event_type', 'severity', 'timestamp')
-    search_fields = ('user__username', 'ip_address')
+    search_fields = ('ip_address',)
     ordering = ('-timestamp',)
     
     def has_add_permission(self, request):
@@ -0,0 +1,167 @@
+"""
+Async versions of the dashboard and the read-only viewset actions.
+
+DRF views are synchronous, so these wrap the existing views: the DRF view
+still authenticates, checks permissions, builds the queryset and serializes,
+which keeps responses identical to the sync endpoints. Those steps run in
+the request's sync_to_async thread. Unpaginated querysets and the
+dashboard's queries use the async ORM, the dashboard's independent lookups
+gathered with asyncio.gather().
+
+With Django 4.2 the async ORM itself still hands each query to that one
+thread, so gathered queries do not overlap on the database: what these
+views buy is an event loop that is free while queries and serialization
+run, i.e. thread offloading rather than async database I/O. The middleware
+stack is async-capable, so a request is not moved to a thread as a whole.
+``manage.py bench_asgi`` measures the difference against WSGI.
+
+Served under /api/university/async/. Run the project under an ASGI server
+to benefit, e.g. ``uvicorn project.asgi:application --workers 4``.
+"""
+import asyncio
+from abc import ABCMeta, abstractmethod
+
+from asgiref.sync import sync_to_async
+from django.db.models import Count
+from django.views import View
+from rest_framework.response import Response
+
+from . import counters, models, views
+from .routers import ReplicaReadMixin
+
+
+class AsyncAPIView(View, metaclass=ABCMeta):
+    """Run a DRF view's request/response cycle around an async handler."""
+    view_class = None
+    action = None
+
+    async def get(self, request, *args, **kwargs):
+        view = self.view_class()
+        view.args, view.kwargs, view.format_kwarg = args, kwargs, None
+        view.action_map = {'get': self.action}
+        view.detail = 'pk' in kwargs
+
+        drf_request = view.initialize_request(request, *args, **kwargs)
+        view.request = drf_request
+        view.headers = view.default_response_headers
+
+        try:
+            try:
+                await sync_to_async(view.initial)(drf_request, *args, **kwargs)
+                response = await self.handle(view, drf_request)
+            except Exception as exc:
+                response = await sync_to_async(view.handle_exception)(exc)
+            return await sync_to_async(self._finalize)(view, drf_request, response, *args, **kwargs)
+        finally:
+            # What ReplicaReadMixin.dispatch() does, which this path skips
+            if isinstance(view, ReplicaReadMixin):
+                view.stop_reading_replica()
+
+    @abstractmethod
+    async def handle(self, view, request):
+        """
+        The response data for ``request``, once ``view`` has authenticated
+        it and checked permissions: a DRF Response, not yet finalized.
+        """
+
+    def _finalize(self, view, request, response, *args, **kwargs):
+        response = view.finalize_response(request, response, *args, **kwargs)
+        return response.render()
+
+
+class AsyncListView(AsyncAPIView):
+    action = 'list'
+
+    async def handle(self, view, request):
+        queryset = await sync_to_async(lambda: view.filter_queryset(view.get_queryset()))()
+
+        if view.paginator is not None:
+            objects = await sync_to_async(view.paginate_queryset)(queryset)
+        else:
+            objects = [obj async for obj in queryset]
+
+        data = await sync_to_async(lambda: view.get_serializer(objects, many=True).data)()
+        if view.paginator is not None:
+            return view.get_paginated_response(data)
+        return Response(data)
+
+
+class AsyncRetrieveView(AsyncAPIView):
+    action = 'retrieve'
+
+    async def handle(self, view, request):
+        instance = await sync_to_async(view.get_object)()
+        data = await sync_to_async(lambda: view.get_serializer(instance).data)()
+        return Response(data)
+
+
+async def build_dashboard_async(user):
+    """Same payload as views.build_dashboard(), with independent queries gathered."""
+    is_admin, is_professor, is_student = await asyncio.gather(
+        models.Administrator.objects.filter(user=user).aexists(),
+        models.Professor.objects.filter(user=user).aexists(),
+        models.Student.objects.filter(user=user).aexists(),
+    )
+    role = 'user'
+    if is_admin:
+        role = 'administrator'
+    elif is_professor:
+        role = 'professor'
+    elif is_student:
+        role = 'student'
+
+    data = {
+        'username': user.username,
+        'role': role,
+    }
+
+    if role == 'administrator':
+        for name, value in (await sync_to_async(counters.totals)()).items():
+            data[f'total_{name}'] = value
+
+    if role == 'professor':
+        courses = (
+            models.Subject.objects
+            .filter(professor__user=user)
+            .annotate(students_count=Count('enrollments'))
+            .order_by('id')
+        )
+        data['courses'] = [
+            {
+                'id': c.id,
+                'name': c.name,
+                'students_count': c.students_count,
+                'credits': c.credits,
+            }
+            async for c in courses
+        ]
+
+    if role == 'student':
+        enrollments = (
+            models.Enrollment.objects
+            .filter(student__user=user)
+            .select_related('subject__professor__user')
+        )
+        data['enrollments'] = [
+            {
+                'id': e.id,
+                'subject': e.subject.name,
+                'professor': e.subject.professor.user.get_full_name() or e.subject.professor.user.username,
+                'grade': e.grade or 'Not Graded',
+                'score': e.score,
+            }
+            async for e in enrollments
+        ]
+
+    return data
+
+
+class AsyncDashboardView(AsyncAPIView):
+    view_class = views.DashboardView
+    action = 'get'
+
+    async def handle(self, view, request):
+        return Response(await build_dashboard_async(request.user))
+
+
+dashboard = AsyncDashboardView.as_view()
@@ -0,0 +1,123 @@
+"""
+Several API GETs in one request.
+
+    POST /api/university/batch/
+    {"requests": ["/api/university/dashboard/", "/api/university/subjects/?fields=id,name"]}
+
+    {"responses": [
+        {"path": "/api/university/dashboard/", "status": 200, "body": {...}},
+        {"path": "/api/university/subjects/?fields=id,name", "status": 200, "body": [...]}
+    ]}
+
+The batch request is authenticated once (JWT decoded, user loaded) and each
+sub-request reuses that user, skipping authentication, the middleware stack
+and a round trip. Sub-requests are resolved with the URL resolver and
+dispatched to their DRF view in this process, in order, so each still
+checks its own permissions, filters, ``?fields=`` and replica routing.
+
+Each sub-request gets its own status and body: a 403 or 404 in one does not
+affect the others, and an unexpected exception becomes a 500 entry (logged
+with its traceback) instead of failing the batch. Views that return a plain
+HttpResponse rather than a DRF Response (the admin bootstrap) have their
+JSON body decoded. A view whose answer is not JSON says so with a
+``response_content_type(kwargs)`` classmethod (the CSV report download);
+its path gets a 400 entry without being run.
+
+Only GETs of /api/university/ views can be batched, at most
+BATCH_MAX_REQUESTS of them; anything else fails the whole batch with a 400.
+"""
+import json
+import logging
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .metrics import registry
+from .server_timing import ServerTimingMixin, get_timing
+
+logger = logging.getLogger(__name__)
+
+PATH_PREFIX = '/api/university/'
+
+
+class BatchView(ServerTimingMixin, APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        paths = request.data.get('requests') if isinstance(request.data, dict) else None
+        if not isinstance(paths, list) or not paths or not all(isinstance(path, str) for path in paths):
+            raise ValidationError({'requests': ['Expected a non-empty list of paths.']})
+        max_requests = getattr(settings, 'BATCH_MAX_REQUESTS', 20)
+        if len(paths) > max_requests:
+            raise ValidationError({'requests': [f'At most {max_requests} requests per batch.']})
+
+        targets = [self._resolve(path) for path in paths]
+        return Response({
+            'responses': [self._dispatch(request, path, target) for path, target in zip(paths, targets)],
+        })
+
+    def _resolve(self, path):
+        url = urlsplit(path)
+        if url.scheme or url.netloc or not url.path.startswith(PATH_PREFIX):
+            raise ValidationError({'requests': [f'"{path}" is not a {PATH_PREFIX} path.']})
+        try:
+            match = resolve(url.path)
+        except Resolver404:
+            return url, None, {'path': path, 'status': 404, 'body': {'detail': 'Not found.'}}
+        view_class = getattr(match.func, 'cls', None)
+        if view_class is None or not issubclass(view_class, APIView) or issubclass(view_class, BatchView):
+            raise ValidationError({'requests': [f'"{path}" cannot be batched.']})
+        content_type = getattr(view_class, 'response_content_type', None)
+        if content_type is not None and not content_type(match.kwargs).startswith('application/json'):
+            return url, match, {'path': path, 'status': 400, 'body': {'detail': 'Only JSON responses can be batched.'}}
+        return url, match, None
+
+    def _sub_request(self, request, url, match):
+        parent = request._request
+        sub = HttpRequest()
+        sub.method = 'GET'
+        sub.path = sub.path_info = url.path
+        sub.META = {
+            **{key: value for key, value in parent.META.items() if key not in ('CONTENT_LENGTH', 'CONTENT_TYPE')},
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': url.path,
+            'QUERY_STRING': url.query,
+            'HTTP_ACCEPT': 'application/json',
+        }
+        sub.GET = QueryDict(url.query)
+        sub.COOKIES = parent.COOKIES
+        sub.resolver_match = match
+        # Authenticate once: DRF's Request uses these instead of its authenticators
+        sub._force_auth_user = request.user
+        sub._force_auth_token = request.auth
+        timing = get_timing(request)
+        if timing is not None:
+            sub.server_timing = timing
+        return sub
+
+    def _dispatch(self, request, path, target):
+        url, match, entry = target
+        if match is None:
+            return entry
+        if entry is not None:
+            registry.inc('batch_subrequests_total', {'route': match.url_name or '', 'status': str(entry['status'])})
+            return entry
+        try:
+            response = match.func(self._sub_request(request, url, match), *match.args, **match.kwargs)
+            if isinstance(response, Response):
+                body = response.data
+            else:
+                # e.g. the cached bootstrap JSON; a 304 has no body
+                body = json.loads(response.content) if response.content else None
+            entry = {'path': path, 'status': response.status_code, 'body': body}
+        except Exception:
+            logger.exception('Batch sub-request failed: GET %s', path)
+            entry = {'path': path, 'status': 500, 'body': {'detail': 'Internal server error.'}}
+        registry.inc('batch_subrequests_total', {'route': match.url_name or '', 'status': str(entry['status'])})
+        return entry
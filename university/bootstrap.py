@@ -0,0 +1,89 @@
+"""
+Initial state of the admin dashboard in one payload.
+
+    GET /api/university/admin/bootstrap/
+
+    {"version": 42,
+     "counts": {"total_students": ..., "total_professors": ...,
+                "total_subjects": ..., "total_enrollments": ...},
+     "faculties": [...], "subjects": [...], "professors": [...], "students": [...]}
+
+The lists have the same rows as the faculties, subjects, professors and
+students list endpoints (ordered by id), and the counts those of the
+administrator dashboard. Each table is read once: five queries build the
+payload however many rows there are. Subjects reuse the professor rows
+instead of joining them again, and the counts are the lengths of the lists
+(enrollments excepted, read from the maintained counters).
+
+The payload has nothing user-specific, so it is rendered to JSON once and
+cached under its DataVersion (university.versions). Saves and deletes of
+faculties, subjects, professors, students and their users, and new or
+deleted enrollments, bump the version. A cached payload therefore costs one
+query to serve, and the response carries an ETag for conditional requests.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from . import counters, fast_serializers, models, versions
+from .renderers import FastJSONRenderer
+
+VERSION_NAME = versions.ADMIN_BOOTSTRAP
+
+
+def build():
+    """The payload as a dict, in five queries."""
+    faculties = list(models.Faculty.objects.order_by('pk').values('id', 'name'))
+
+    professor_list = fast_serializers.PROFESSOR_LIST
+    professors = professor_list.to_representation(
+        professor_list.values(models.Professor.objects.order_by('pk'))
+    )
+    student_list = fast_serializers.STUDENT_LIST
+    students = student_list.to_representation(student_list.values(models.Student.objects.order_by('pk')))
+
+    # Same keys and order as SubjectSerializer
+    by_id = {professor['id']: professor for professor in professors}
+    subjects = [
+        {
+            'id': pk,
+            'name': name,
+            'faculty': faculty_id,
+            'professor': by_id.get(professor_id),
+            'description': description,
+        }
+        for pk, name, faculty_id, professor_id, description in models.Subject.objects.order_by('pk').values_list(
+            'pk', 'name', 'faculty_id', 'professor_id', 'description'
+        )
+    ]
+
+    return {
+        'counts': {
+            'total_students': len(students),
+            'total_professors': len(professors),
+            'total_subjects': len(subjects),
+            'total_enrollments': counters.totals()['enrollments'],
+        },
+        'faculties': faculties,
+        'subjects': subjects,
+        'professors': professors,
+        'students': students,
+    }
+
+
+def get(version=None):
+    """
+    (version, JSON bytes) of the current payload, built and cached on a
+    miss. ``version`` may be passed when the caller has already read it.
+    """
+    if version is None:
+        version = versions.current(VERSION_NAME)
+    key = f'{VERSION_NAME}:{version}'
+    body = cache.get(key)
+    if body is None:
+        body = FastJSONRenderer().render({'version': version, **build()})
+        cache.set(key, body, getattr(settings, 'BOOTSTRAP_CACHE_SECONDS', 3600))
+    return version, body
+
+
+def etag(version):
+    return f'"{VERSION_NAME}-{version}"'
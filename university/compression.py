@@ -0,0 +1,223 @@
+"""
+Compression of API responses.
+
+CompressionMiddleware compresses responses under COMPRESSION_PATH_PREFIXES
+(``/api/``) with the best encoding the client accepts: brotli when the
+``brotli`` package is installed, otherwise gzip. Responses are left alone
+when:
+
+- they are smaller than COMPRESSION_MIN_SIZE bytes (streaming responses are
+  always compressed, their size is unknown up front)
+- the content type is not text-like (JSON, text, XML, JavaScript)
+- they already have a Content-Encoding or say ``Cache-Control: no-transform``
+- they set a cookie, or the path is under COMPRESSION_EXCLUDE_PREFIXES
+  (``/api/auth/``). Those responses carry tokens next to attacker-influenced
+  content, the setup BREACH needs to recover secrets from compressed sizes.
+
+Streaming responses are flushed chunk by chunk, so the client receives data
+as soon as the view produces it.
+
+Bytes in and out and compression time per encoding are exported on
+/metrics; the phase also shows up as ``compress`` in Server-Timing.
+``manage.py bench_compression`` reports bytes saved and CPU time per
+response size.
+"""
+import re
+import time
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from .metrics import registry
+from .server_timing import get_timing
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+COMPRESSIBLE_TYPES = re.compile(r'^(text/|application/(json|javascript|xml)|[^;]*\+(json|xml))')
+
+
+class GzipEncoder:
+    name = 'gzip'
+
+    def __init__(self, level=6):
+        # wbits=31: gzip container, header with mtime 0
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._z.compress(data)
+
+    def flush(self):
+        return self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._z.flush()
+
+
+class BrotliEncoder:
+    name = 'br'
+
+    def __init__(self, quality=4):
+        self._c = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._c.process(data)
+
+    def flush(self):
+        return self._c.flush()
+
+    def finish(self):
+        return self._c.finish()
+
+
+def available_encoders():
+    """Encoders by preference, best first."""
+    encoders = {}
+    if brotli is not None:
+        encoders['br'] = lambda: BrotliEncoder(getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 4))
+    encoders['gzip'] = lambda: GzipEncoder(getattr(settings, 'COMPRESSION_GZIP_LEVEL', 6))
+    return encoders
+
+
+def negotiate(accept_encoding, encoders):
+    """Name of the encoding to use for this Accept-Encoding header, or None."""
+    weights = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        match = re.search(r'q\s*=\s*([0-9.]+)', params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        weights[coding] = q
+
+    best, best_q = None, 0.0
+    for name in encoders:
+        q = weights.get(name, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def _record(name, size_in, size_out, duration):
+    labels = {'encoding': name}
+    registry.inc('compression_input_bytes_total', labels, size_in)
+    registry.inc('compression_output_bytes_total', labels, size_out)
+    registry.inc('compression_seconds_total', labels, duration)
+
+
+def compress_stream(chunks, encoder):
+    size_in = size_out = 0
+    duration = 0.0
+    for chunk in chunks:
+        started = time.perf_counter()
+        data = encoder.compress(chunk) + encoder.flush()
+        duration += time.perf_counter() - started
+        size_in += len(chunk)
+        size_out += len(data)
+        if data:
+            yield data
+    tail = encoder.finish()
+    size_out += len(tail)
+    _record(encoder.name, size_in, size_out, duration)
+    yield tail
+
+
+async def compress_async_stream(chunks, encoder):
+    size_in = size_out = 0
+    duration = 0.0
+    async for chunk in chunks:
+        started = time.perf_counter()
+        data = encoder.compress(chunk) + encoder.flush()
+        duration += time.perf_counter() - started
+        size_in += len(chunk)
+        size_out += len(data)
+        if data:
+            yield data
+    tail = encoder.finish()
+    size_out += len(tail)
+    _record(encoder.name, size_in, size_out, duration)
+    yield tail
+
+
+class CompressionMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.encoders = available_encoders()
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self._compress(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self._compress(request, await self.get_response(request))
+
+    def _compress(self, request, response):
+        if not self._eligible(request, response):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        name = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''), self.encoders)
+        if name is None:
+            return response
+        encoder = self.encoders[name]()
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = compress_async_stream(response.streaming_content, encoder)
+            else:
+                response.streaming_content = compress_stream(response.streaming_content, encoder)
+            del response.headers['Content-Length']
+        else:
+            content = response.content
+            started = time.perf_counter()
+            compressed = encoder.compress(content) + encoder.finish()
+            duration = time.perf_counter() - started
+            timing = get_timing(request)
+            if timing is not None:
+                timing.add('compress', duration, name)
+            if len(compressed) >= len(content):
+                return response
+            _record(name, len(content), len(compressed), duration)
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = name
+        return response
+
+    def _eligible(self, request, response):
+        path = request.path_info
+        if not path.startswith(tuple(getattr(settings, 'COMPRESSION_PATH_PREFIXES', ('/api/',)))):
+            return False
+        if path.startswith(tuple(getattr(settings, 'COMPRESSION_EXCLUDE_PREFIXES', ('/api/auth/',)))):
+            return False
+        if response.cookies:
+            return False
+        if response.has_header('Content-Encoding'):
+            return False
+        if 'no-transform' in response.get('Cache-Control', ''):
+            return False
+        if not COMPRESSIBLE_TYPES.match(response.get('Content-Type', '')):
+            return False
+        if not response.streaming and len(response.content) < getattr(settings, 'COMPRESSION_MIN_SIZE', 1024):
+            return False
+        return True
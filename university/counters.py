@@ -0,0 +1,175 @@
+"""
+Maintained counts for the administrator statistics.
+
+Counting students, professors, subjects and enrollments on every dashboard
+view scans four tables. Instead, StatCounter rows hold:
+
+- ``(name, '')``                  the total of students, professors,
+                                  subjects or enrollments
+- ``(name, 'faculty:<id>')``      per faculty (``faculty:none`` without
+                                  one); an enrollment counts for its
+                                  subject's faculty
+- ``('enrollments', 'day:<date>')``  enrollments per day (TIME_ZONE)
+
+The signal handlers in university/signals.py apply each insert, delete and
+faculty or subject change with F() updates, in the same transaction as the
+write (the counted models save atomically, see AtomicSaveMixin), so a
+failure or rollback undoes both. Writes that send no signals
+(bulk_create, QuerySet.update/delete, raw SQL) leave the counters off until
+``manage.py reconcile_counters`` recounts them.
+
+Every enrollment changes the same total and faculty counters, so each
+counter is split over COUNTER_SHARDS rows: a change goes to one of them at
+random, and concurrent writers mostly lock different rows until they
+commit. Reads sum the shards; reconcile() folds a corrected counter back
+into shard 0.
+"""
+import datetime
+import random
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError, router, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Enrollment, Faculty, Professor, StatCounter, Student, Subject
+
+TOTAL = ''
+
+# name -> (model, faculty lookup)
+COUNTED = {
+    'students': (Student, 'faculty_id'),
+    'professors': (Professor, 'faculty_id'),
+    'subjects': (Subject, 'faculty_id'),
+    'enrollments': (Enrollment, 'subject__faculty_id'),
+}
+NAMES = {model: name for name, (model, _) in COUNTED.items()}
+
+
+def faculty_key(faculty_id):
+    return f'faculty:{"none" if faculty_id is None else faculty_id}'
+
+
+def day_key(day):
+    return f'day:{day.isoformat()}'
+
+
+def add(changes):
+    """
+    Apply ``(name, key, delta)`` changes to one random shard: one UPDATE per
+    distinct delta, plus an INSERT for shard rows that do not exist yet.
+    """
+    shard = random.randrange(getattr(settings, 'COUNTER_SHARDS', 8))
+    by_delta = defaultdict(set)
+    for name, key, delta in changes:
+        if delta:
+            by_delta[delta].add((name, key))
+    for delta, pairs in by_delta.items():
+        match = Q()
+        for name, key in pairs:
+            match |= Q(name=name, key=key)
+        rows = StatCounter.objects.filter(match, shard=shard)
+        if rows.update(value=F('value') + delta) == len(pairs):
+            continue
+        existing = set(rows.values_list('name', 'key'))
+        for name, key in pairs - existing:
+            try:
+                with transaction.atomic(using=router.db_for_write(StatCounter)):
+                    StatCounter.objects.create(name=name, key=key, shard=shard, value=delta)
+            except IntegrityError:
+                # Created concurrently since the UPDATE
+                StatCounter.objects.filter(name=name, key=key, shard=shard).update(value=F('value') + delta)
+
+
+def _summed(queryset):
+    """``(name, key, value)`` per counter, its shards added up."""
+    return queryset.values_list('name', 'key').annotate(total=Sum('value')).order_by()
+
+
+def totals():
+    """{name: total} for every counted name, in one query."""
+    values = {name: value for name, _, value in _summed(StatCounter.objects.filter(key=TOTAL, name__in=COUNTED))}
+    return {name: values.get(name, 0) for name in COUNTED}
+
+
+def stats(days=30):
+    """Totals, per-faculty counts and the enrollments of the last ``days`` days."""
+    since = timezone.localdate() - datetime.timedelta(days=days - 1)
+    rows = _summed(StatCounter.objects.filter(
+        Q(key=TOTAL) | Q(key__startswith='faculty:')
+        | Q(name='enrollments', key__startswith='day:', key__gte=day_key(since))
+    ))
+
+    result = {'totals': {name: 0 for name in COUNTED}, 'by_faculty': {}, 'enrollments_per_day': {}}
+    for name, key, value in rows:
+        if key == TOTAL:
+            result['totals'][name] = value
+        elif key.startswith('faculty:'):
+            result['by_faculty'].setdefault(key[len('faculty:'):], dict.fromkeys(COUNTED, 0))[name] = value
+        elif key.startswith('day:'):
+            result['enrollments_per_day'][key[len('day:'):]] = value
+
+    names = {str(faculty.pk): str(faculty) for faculty in Faculty.objects.all()}
+    result['by_faculty'] = [
+        {'faculty': None if faculty == 'none' else int(faculty), 'name': names.get(faculty), **counts}
+        for faculty, counts in sorted(
+            result['by_faculty'].items(), key=lambda item: (item[0] == 'none', int(item[0]) if item[0] != 'none' else 0)
+        )
+        if any(counts.values())
+    ]
+    result['enrollments_per_day'] = [
+        {'date': (since + datetime.timedelta(days=offset)).isoformat(),
+         'count': result['enrollments_per_day'].get((since + datetime.timedelta(days=offset)).isoformat(), 0)}
+        for offset in range(days)
+    ]
+    return result
+
+
+def recount():
+    """Every counter computed from the tables, {(name, key): value}."""
+    counts = {}
+    for name, (model, faculty) in COUNTED.items():
+        counts[(name, TOTAL)] = model.objects.count()
+        for faculty_id, count in model.objects.values_list(faculty).annotate(count=Count('pk')).order_by():
+            counts[(name, faculty_key(faculty_id))] = count
+    for day, count in (
+        Enrollment.objects.annotate(day=TruncDate('enrolled_date')).values_list('day')
+        .annotate(count=Count('pk')).order_by()
+    ):
+        counts[('enrollments', day_key(day))] = count
+    return counts
+
+
+def reconcile(dry_run=False):
+    """
+    Recount and overwrite the counters that differ. Returns the
+    differences as (name, key, stored, actual).
+
+    The stored counters are locked first: a concurrent write's increment
+    then waits for this transaction, and lands on the recounted value. A
+    counter that differs is folded into shard 0, its other shards deleted.
+    """
+    using = router.db_for_write(StatCounter)
+    with transaction.atomic(using=using):
+        stored = defaultdict(int)
+        for name, key, value in (
+            StatCounter.objects.using(using).select_for_update().values_list('name', 'key', 'value')
+        ):
+            stored[(name, key)] += value
+        actual = recount()
+        differences = [
+            (name, key, stored.get((name, key), 0), actual.get((name, key), 0))
+            for name, key in sorted(stored.keys() | actual.keys())
+            if stored.get((name, key), 0) != actual.get((name, key), 0)
+        ]
+        if not dry_run:
+            for name, key, _, value in differences:
+                StatCounter.objects.using(using).filter(name=name, key=key, shard__gt=0).delete()
+                StatCounter.objects.using(using).update_or_create(
+                    name=name, key=key, shard=0, defaults={'value': value},
+                )
+            # Slices that no longer have rows, and empty shards
+            StatCounter.objects.using(using).filter(value=0).exclude(key=TOTAL, shard=0).delete()
+    return differences
@@ -0,0 +1,222 @@
+"""
+Fast read path for large list responses.
+
+ModelSerializer builds every row from a model instance, field by field.
+For the plain list actions of StudentViewSet, ProfessorViewSet and
+EnrollmentViewSet that is most of the request's CPU time. A
+ValuesListSerializer instead fetches the needed columns with
+``values_list()`` (joins included) and turns each tuple into the response
+dict with a function generated once per serializer.
+
+Each one mirrors a DRF serializer exactly (keys, nesting, order, value
+types, null handling). FastListSerializerTests in university/tests.py
+check that per list endpoint and role; ``manage.py bench_serializers``
+repeats the check on generated data and measures rows/second. Set FAST_LIST_SERIALIZERS =
+False to always use the DRF serializers.
+
+``?fields=`` is served from a trimmed copy (ValuesListSerializer.restrict),
+which also fetches fewer columns; ``?expand=`` takes the DRF path.
+"""
+from django.conf import settings
+from rest_framework import serializers as drf_serializers
+from rest_framework.response import Response
+
+from . import serializers
+from .fieldsets import FieldsetMixin
+from .server_timing import get_timing
+
+
+class Column:
+    """
+    One output value read from a ``values_list()`` lookup.
+
+    ``to_representation`` converts the raw value like the DRF field would;
+    None is returned as None, as DRF does. With ``skip_null`` the key is left
+    out when the value is None, like a read-only DRF field whose source
+    traverses a null relation.
+    """
+
+    def __init__(self, lookup, to_representation=None, skip_null=False):
+        self.lookup = lookup
+        self.to_representation = to_representation
+        self.skip_null = skip_null
+
+
+class ValuesListSerializer:
+    """
+    ``shape`` maps output keys to a lookup string, a Column or a nested
+    shape dict, in the same order as the mirrored serializer's fields.
+    """
+
+    def __init__(self, serializer_class, shape):
+        self.serializer_class = serializer_class
+        self.shape = shape
+        self.columns = []
+        self._build_row = self._compile()
+        self._restricted = {}
+
+    def _compile(self):
+        """Generate ``build_row(row)``, one dict literal per row."""
+        namespace = {}
+        skipped = []
+
+        def expression(shape, top_level):
+            items = []
+            for key, spec in shape.items():
+                if isinstance(spec, dict):
+                    items.append(f'{key!r}: {expression(spec, False)}')
+                    continue
+                column = spec if isinstance(spec, Column) else Column(spec)
+                index = len(self.columns)
+                self.columns.append(column)
+                value = f'row[{index}]'
+                if column.to_representation is not None:
+                    namespace[f'convert_{index}'] = column.to_representation
+                    value = f'(None if row[{index}] is None else convert_{index}(row[{index}]))'
+                if column.skip_null:
+                    if not top_level:
+                        raise ValueError('skip_null is only supported on top-level keys')
+                    skipped.append((key, index))
+                items.append(f'{key!r}: {value}')
+            return '{' + ', '.join(items) + '}'
+
+        lines = ['def build_row(row):', f'    data = {expression(self.shape, True)}']
+        # Deleting afterwards keeps the key order of the DRF serializer
+        for key, index in skipped:
+            lines.append(f'    if row[{index}] is None:')
+            lines.append(f'        del data[{key!r}]')
+        lines.append('    return data')
+        exec('\n'.join(lines), namespace)
+        return namespace['build_row']
+
+    @property
+    def lookups(self):
+        return [column.lookup for column in self.columns]
+
+    def values(self, queryset):
+        return queryset.values_list(*self.lookups)
+
+    def to_representation(self, rows):
+        build_row = self._build_row
+        return [build_row(row) for row in rows]
+
+    def restrict(self, fields):
+        """
+        Copy for a ``?fields=`` tree (fieldsets.parse_fields()), or None when
+        the tree names anything this shape does not have.
+        """
+        key = _freeze(fields)
+        if key not in self._restricted:
+            shape = _select(self.shape, fields)
+            restricted = None if shape is None else ValuesListSerializer(self.serializer_class, shape)
+            if len(self._restricted) >= 256:
+                # Trees come from the query string; keep the cache bounded
+                self._restricted.clear()
+            self._restricted[key] = restricted
+        return self._restricted[key]
+
+
+def _freeze(tree):
+    return tuple(sorted((name, None if sub is None else _freeze(sub)) for name, sub in tree.items()))
+
+
+def _select(shape, fields):
+    selected = {}
+    for key, sub in fields.items():
+        if key not in shape:
+            return None
+        spec = shape[key]
+        if sub is None:
+            selected[key] = spec
+        elif isinstance(spec, dict):
+            selected[key] = _select(spec, sub)
+            if selected[key] is None:
+                return None
+        else:
+            return None
+    # Serializer order, not query string order
+    return {key: selected[key] for key in shape if key in selected}
+
+
+_datetime = drf_serializers.DateTimeField()
+
+USER_SHAPE = {'id': 'user__id', 'username': 'user__username', 'email': 'user__email'}
+
+STUDENT_LIST = ValuesListSerializer(serializers.StudentSerializer, {
+    'id': 'id',
+    'user': USER_SHAPE,
+    'faculty': 'faculty_id',
+    'enrollment_number': 'enrollment_number',
+})
+
+PROFESSOR_LIST = ValuesListSerializer(serializers.ProfessorSerializer, {
+    'id': 'id',
+    'user': USER_SHAPE,
+    'faculty': 'faculty_id',
+    'title': 'title',
+})
+
+ENROLLMENT_LIST = ValuesListSerializer(serializers.EnrollmentSerializer, {
+    'id': 'id',
+    'student': 'student_id',
+    'student_username': 'student__user__username',
+    'subject': 'subject_id',
+    'subject_name': 'subject__name',
+    # Omitted by DRF when the subject has no professor
+    'professor_name': Column('subject__professor__user__first_name', skip_null=True),
+    'enrolled_date': Column('enrolled_date', _datetime.to_representation),
+    'grade': 'grade',
+    'score': Column('score', float),
+})
+
+
+class FastListMixin(FieldsetMixin):
+    """
+    ListModelMixin.list() through ``fast_list_serializer`` while the view
+    would use the serializer class it mirrors. Unordered list querysets are
+    ordered by pk.
+    """
+    fast_list_serializer = None
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action == 'list' and not queryset.ordered:
+            # The fast path's joins can change the database's scan order;
+            # order both paths by pk so they return rows, and pages, alike.
+            queryset = queryset.order_by('pk')
+        return queryset
+
+    def get_fast_list_serializer(self):
+        fast = self.fast_list_serializer
+        if (
+            fast is None
+            or not getattr(settings, 'FAST_LIST_SERIALIZERS', True)
+            or self.get_serializer_class() is not fast.serializer_class
+        ):
+            return None
+        fields, expand = self.get_fieldset()
+        if expand:
+            return None
+        if fields is not None:
+            # None for unknown names: the DRF path answers with the 400
+            return fast.restrict(fields)
+        return fast
+
+    def list(self, request, *args, **kwargs):
+        fast = self.get_fast_list_serializer()
+        if fast is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = fast.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        rows = list(queryset) if page is None else page
+        timing = get_timing(request)
+        if timing is None:
+            data = fast.to_representation(rows)
+        else:
+            with timing.measure('serialize'):
+                data = fast.to_representation(rows)
+
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
@@ -0,0 +1,271 @@
+"""
+A job queue in the database, for work that should not run inside a request.
+
+Register a function as a task and enqueue it; ``manage.py run_jobs`` claims
+and runs the job in a worker process:
+
+    @jobs.task(max_attempts=5, concurrency=1)
+    def reconcile_counters():
+        ...
+
+    reconcile_counters.enqueue()                      # as soon as possible
+    reconcile_counters.enqueue(delay=600)             # in ten minutes
+    jobs.enqueue('reconcile_counters', priority=-1)   # by name
+
+The job row is written in the caller's transaction: a rolled-back request
+enqueues nothing, and a worker never sees a job before the data it needs is
+committed. Keyword arguments and return values are stored as JSON.
+
+Claiming. On PostgreSQL, due jobs are locked with ``SELECT ... FOR UPDATE
+SKIP LOCKED``, so workers take different jobs without waiting for each other.
+SQLite has no row locks; the claim runs in a ``BEGIN IMMEDIATE`` transaction
+(project.backends.sqlite3), which already makes claimers take turns. In both
+cases the job is taken with ``UPDATE ... WHERE status = 'queued'``, so it goes
+to one worker only.
+
+Concurrency. A task's ``concurrency`` caps how many of its jobs run at once
+across all workers. On PostgreSQL the running jobs are counted under a
+transaction-level advisory lock per task; SQLite's write lock serializes the
+count already.
+
+Schedules. A task registered with ``every=<seconds>`` also runs periodically:
+``run_jobs`` keeps one job of it queued (or running), due ``every`` seconds
+after the last one finished. Workers take turns checking, under the same
+locks as claiming, so several of them do not queue it twice.
+
+Retries. A task that raises is retried after ``retry_delay`` seconds,
+doubling each time, until ``max_attempts``; then the job is marked failed
+with the traceback. A job still running JOB_TIMEOUT_SECONDS after it was
+claimed (its worker died) is treated as a failed attempt.
+"""
+import logging
+import os
+import socket
+import time
+import traceback
+import zlib
+from datetime import timedelta
+from importlib import import_module
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .metrics import DURATION_BUCKETS, registry
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Imported by the worker so their @task functions are registered
+TASK_MODULES = ['university.tasks']
+
+TASKS = {}
+
+# Candidates considered per claim, for when the first are at their task's limit
+CLAIM_CANDIDATES = 20
+
+
+class Task:
+    def __init__(self, func, name, queue, max_attempts, concurrency, retry_delay, every):
+        self.func = func
+        self.name = name
+        self.queue = queue
+        self.max_attempts = max_attempts
+        self.concurrency = concurrency
+        self.retry_delay = retry_delay
+        self.every = every
+        self.__doc__ = func.__doc__
+
+    def __call__(self, **kwargs):
+        return self.func(**kwargs)
+
+    def enqueue(self, **kwargs):
+        return enqueue(self.name, **kwargs)
+
+    def __repr__(self):
+        return f'<Task {self.name}>'
+
+
+def task(name=None, queue='default', max_attempts=3, concurrency=None, retry_delay=30, every=None):
+    """
+    Register the decorated function as a task, by default under its name;
+    with ``every``, also run it every that many seconds (see schedule()).
+    """
+    def register(func):
+        registered = Task(func, name or func.__name__, queue, max_attempts, concurrency, retry_delay, every)
+        TASKS[registered.name] = registered
+        return registered
+    return register
+
+
+def load_tasks():
+    for module in TASK_MODULES:
+        import_module(module)
+
+
+def get_task(name):
+    if name not in TASKS:
+        load_tasks()
+    return TASKS.get(name)
+
+
+def enqueue(task_name, *, run_at=None, delay=None, priority=0, queue=None, max_attempts=None, **kwargs):
+    """
+    Queue a run of ``task_name`` with ``kwargs``, at ``run_at`` or ``delay``
+    seconds from now (default: now). Returns the Job.
+    """
+    registered = get_task(task_name)
+    if registered is None:
+        raise LookupError(f'Unknown task {task_name!r}')
+    if run_at is None:
+        run_at = timezone.now() + timedelta(seconds=delay or 0)
+    return Job.objects.create(
+        task=task_name,
+        queue=queue or registered.queue,
+        kwargs=kwargs,
+        priority=priority,
+        run_at=run_at,
+        max_attempts=max_attempts or registered.max_attempts,
+    )
+
+
+def _lock_tasks(connection, names):
+    # Sorted, so two workers never wait on each other's locks
+    with connection.cursor() as cursor:
+        for name in sorted(names):
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [zlib.crc32(name.encode())])
+
+
+def claim(worker, queues=('default',)):
+    """Take the next due job of ``queues`` for ``worker``, or None."""
+    using = router.db_for_write(Job)
+    connection = connections[using]
+    now = timezone.now()
+    with transaction.atomic(using=using):
+        due = Job.objects.using(using).filter(
+            status=Job.QUEUED, queue__in=queues, run_at__lte=now,
+        ).order_by('priority', 'run_at', 'pk')
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        candidates = list(due[:CLAIM_CANDIDATES])
+
+        limits = {}
+        for job in candidates:
+            registered = get_task(job.task)
+            if registered is not None and registered.concurrency is not None:
+                limits[job.task] = registered.concurrency
+        running = {}
+        if limits:
+            if connection.vendor == 'postgresql':
+                _lock_tasks(connection, limits)
+            running = dict(
+                Job.objects.using(using).filter(status=Job.RUNNING, task__in=limits)
+                .values_list('task').annotate(count=Count('pk')).order_by()
+            )
+
+        for job in candidates:
+            if job.task in limits and running.get(job.task, 0) >= limits[job.task]:
+                continue
+            claimed = Job.objects.using(using).filter(pk=job.pk, status=Job.QUEUED).update(
+                status=Job.RUNNING, worker=worker, locked_at=now, attempts=F('attempts') + 1,
+            )
+            if claimed:
+                job.status, job.worker, job.locked_at = Job.RUNNING, worker, now
+                job.attempts += 1
+                return job
+    return None
+
+
+def schedule(queues=('default',)):
+    """
+    Queue the next run of each periodic task of ``queues`` that has none
+    queued or running. Returns the new Jobs.
+    """
+    load_tasks()
+    periodic = [registered for registered in TASKS.values() if registered.every and registered.queue in queues]
+    if not periodic:
+        return []
+    using = router.db_for_write(Job)
+    connection = connections[using]
+    now = timezone.now()
+    scheduled = []
+    with transaction.atomic(using=using):
+        if connection.vendor == 'postgresql':
+            _lock_tasks(connection, [registered.name for registered in periodic])
+        pending = set(
+            Job.objects.using(using).filter(
+                task__in=[registered.name for registered in periodic], status__in=[Job.QUEUED, Job.RUNNING],
+            ).values_list('task', flat=True)
+        )
+        for registered in periodic:
+            if registered.name in pending:
+                continue
+            last = (
+                Job.objects.using(using).filter(task=registered.name, finished_at__isnull=False)
+                .order_by('-finished_at').values_list('finished_at', flat=True).first()
+            )
+            run_at = max(now, last + timedelta(seconds=registered.every)) if last else now
+            scheduled.append(enqueue(registered.name, run_at=run_at))
+    return scheduled
+
+
+def _finish(job, **fields):
+    # Guarded: a job reclaimed after a timeout belongs to its new worker
+    return Job.objects.filter(
+        pk=job.pk, status=Job.RUNNING, worker=job.worker, attempts=job.attempts,
+    ).update(**fields)
+
+
+def _fail(job, registered, error):
+    now = timezone.now()
+    if registered is not None and job.attempts < job.max_attempts:
+        retry_in = registered.retry_delay * 2 ** (job.attempts - 1)
+        _finish(job, status=Job.QUEUED, run_at=now + timedelta(seconds=retry_in), error=error)
+        return 'retried'
+    _finish(job, status=Job.FAILED, finished_at=now, error=error)
+    return 'failed'
+
+
+def run(job):
+    """Run a claimed job and record its result or failure. Returns the outcome."""
+    registered = get_task(job.task)
+    started = time.perf_counter()
+    if registered is None:
+        outcome = _fail(job, None, f'Unknown task {job.task!r}')
+    else:
+        try:
+            result = registered.func(**job.kwargs)
+        except Exception:
+            logger.exception('Job %s (%s) failed, attempt %s of %s', job.pk, job.task, job.attempts, job.max_attempts)
+            outcome = _fail(job, registered, traceback.format_exc())
+        else:
+            try:
+                _finish(job, status=Job.DONE, result=result, error='', finished_at=timezone.now())
+                outcome = 'done'
+            except (TypeError, ValueError):
+                # A result that is not JSON: the work is done, retrying would not help
+                logger.exception('Job %s (%s) returned a result that cannot be stored', job.pk, job.task)
+                _finish(job, status=Job.FAILED, finished_at=timezone.now(), error=traceback.format_exc())
+                outcome = 'failed'
+    elapsed = time.perf_counter() - started
+    registry.inc('jobs_total', {'task': job.task, 'outcome': outcome})
+    registry.observe('job_duration_seconds', {'task': job.task}, elapsed, DURATION_BUCKETS)
+    return outcome
+
+
+def requeue_stale():
+    """
+    Jobs running longer than JOB_TIMEOUT_SECONDS lost their worker: retry
+    them, or fail those out of attempts. Returns how many were released.
+    """
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'JOB_TIMEOUT_SECONDS', 600))
+    stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=cutoff)
+    error = 'Timed out: the worker died or the job ran longer than JOB_TIMEOUT_SECONDS.'
+    retried = stale.filter(attempts__lt=F('max_attempts')).update(status=Job.QUEUED, run_at=timezone.now(), error=error)
+    failed = stale.update(status=Job.FAILED, finished_at=timezone.now(), error=error)
+    return retried + failed
+
+
+def worker_name(index=0):
+    return f'{socket.gethostname()}:{os.getpid()}:{index}'
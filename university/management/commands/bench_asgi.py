@@ -0,0 +1,93 @@
+"""
+Compare the sync (WSGI) dashboard with the async (ASGI) one at high concurrency.
+
+Both paths run in-process through Django's request handlers and the full
+middleware stack: the WSGI side with django.test.Client on a thread pool
+(like a threaded gunicorn worker), the ASGI side with AsyncClient tasks on
+one event loop (like a uvicorn worker).
+
+    python manage.py bench_asgi --requests 2000 --concurrency 100
+"""
+import asyncio
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+def _summary(label, latencies, elapsed, errors):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0.0
+    return (
+        f"{label:<6}{len(latencies) / elapsed:>10.1f}{statistics.median(latencies) * 1000:>10.1f}"
+        f"{p95 * 1000:>10.1f}{errors:>8}"
+    )
+
+
+class Command(BaseCommand):
+    help = 'Benchmark dashboard throughput: WSGI (threads) vs ASGI (event loop).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--username', default='admin_user')
+        parser.add_argument('--path', default='dashboard/', help='Path below /api/university/')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['username']!r}")
+        token = str(RefreshToken.for_user(user).access_token)
+        self.headers = {'Authorization': f'Bearer {token}'}
+        self.total = options['requests']
+        self.concurrency = options['concurrency']
+
+        sync_path = f"/api/university/{options['path']}"
+        async_path = f"/api/university/async/{options['path']}"
+
+        self.stdout.write(f'{self.total} requests, concurrency {self.concurrency}')
+        self.stdout.write(f"{'path':<6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}")
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            self.stdout.write(self._bench_wsgi(sync_path))
+            self.stdout.write(asyncio.run(self._bench_asgi(async_path)))
+
+    def _bench_wsgi(self, path):
+        local = threading.local()
+
+        def one(_):
+            if not hasattr(local, 'client'):
+                local.client = Client()
+            started = time.perf_counter()
+            response = local.client.get(path, headers=self.headers)
+            return time.perf_counter() - started, response.status_code
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            results = list(pool.map(one, range(self.total)))
+        elapsed = time.perf_counter() - started
+        errors = sum(1 for _, code in results if code != 200)
+        return _summary('wsgi', [lat for lat, _ in results], elapsed, errors)
+
+    async def _bench_asgi(self, path):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        client = AsyncClient()
+
+        async def one():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path, headers=self.headers)
+                return time.perf_counter() - started, response.status_code
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(one() for _ in range(self.total)))
+        elapsed = time.perf_counter() - started
+        errors = sum(1 for _, code in results if code != 200)
+        return _summary('asgi', [lat for lat, _ in results], elapsed, errors)
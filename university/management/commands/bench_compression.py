@@ -0,0 +1,101 @@
+"""
+Bytes saved and CPU cost of compressing API responses (university.compression).
+
+For enrollment-list JSON of roughly 1 KB to 1 MB, prints the compressed
+size, the share of bytes saved and the time to compress one response with
+each gzip level (and brotli quality, when the brotli package is installed).
+Then checks the middleware through the test client: a large list is
+compressed and decodes to the same JSON, small responses and /api/auth/ are
+left alone.
+
+    python manage.py bench_compression --rows 4 40 400 4000
+"""
+import gzip
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from university import compression
+from university.management.commands.bench_json import best_of, list_payload
+from university.renderers import FastJSONRenderer
+
+
+def encoders():
+    yield 'gzip 1', lambda: compression.GzipEncoder(1)
+    yield 'gzip 6', lambda: compression.GzipEncoder(6)
+    yield 'gzip 9', lambda: compression.GzipEncoder(9)
+    if compression.brotli is not None:
+        for quality in (1, 4, 11):
+            yield f'br {quality}', lambda quality=quality: compression.BrotliEncoder(quality)
+
+
+def compress(factory, body):
+    encoder = factory()
+    return encoder.compress(body) + encoder.finish()
+
+
+class Command(BaseCommand):
+    help = 'Measure bytes saved and CPU time of API response compression.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[4, 40, 400, 4000])
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        if compression.brotli is None:
+            self.stdout.write(self.style.WARNING('brotli is not installed: gzip only'))
+
+        renderer = FastJSONRenderer()
+        self.stdout.write(f"{'rows':>6}{'bytes':>11}  {'encoding':<9}{'compressed':>11}{'saved':>8}{'time':>10}{'MB/s':>8}")
+        for rows in options['rows']:
+            body = renderer.render(list_payload(rows))
+            for name, factory in encoders():
+                out = compress(factory, body)
+                seconds = best_of(options['repeat'], lambda: compress(factory, body))
+                self.stdout.write(
+                    f'{rows:>6}{len(body):>11,}  {name:<9}{len(out):>11,}{1 - len(out) / len(body):>8.0%}'
+                    f'{seconds * 1000:>8.2f}ms{len(body) / seconds / 1e6:>8.0f}'
+                )
+        self._check_middleware()
+
+    def _check_middleware(self):
+        user = User.objects.filter(administrator__isnull=False).first()
+        if user is None:
+            self.stdout.write('No administrator: skipping the middleware check')
+            return
+        headers = {
+            'Authorization': f'Bearer {RefreshToken.for_user(user).access_token}',
+            'Accept-Encoding': 'gzip',
+        }
+        failures = []
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'], COMPRESSION_MIN_SIZE=0):
+            client = Client()
+            plain = client.get('/api/university/enrollments/', headers={'Authorization': headers['Authorization']})
+            packed = client.get('/api/university/enrollments/', headers=headers)
+            if packed.get('Content-Encoding') != 'gzip' and len(plain.content) > 100:
+                failures.append('list response not compressed')
+            elif packed.get('Content-Encoding') == 'gzip' and gzip.decompress(packed.content) != plain.content:
+                failures.append('compressed list differs')
+            if 'Accept-Encoding' not in packed.get('Vary', ''):
+                failures.append('Vary: Accept-Encoding missing')
+
+            login = client.post('/api/auth/token/', {'username': 'x', 'password': 'y'},
+                                content_type='application/json', headers=headers)
+            if login.has_header('Content-Encoding'):
+                failures.append('/api/auth/ response compressed')
+
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            small = Client().get('/api/university/faculties/999999/', headers=headers)
+            if small.has_header('Content-Encoding'):
+                failures.append('response below COMPRESSION_MIN_SIZE compressed')
+
+        if failures:
+            raise CommandError('; '.join(failures))
+        self.stdout.write(self.style.SUCCESS(
+            f'Middleware: list {len(plain.content):,} -> {len(packed.content):,} bytes, '
+            'auth and small responses uncompressed.'
+        ))
@@ -0,0 +1,135 @@
+"""
+Compare DRF's stdlib JSON renderer/parser with university.renderers.
+
+Checks that both renderers produce identical bytes for an edge-case payload
+(aware datetimes, dates, times, Decimal, UUID, lazy strings, U+2028, int
+keys) and for enrollment/student list payloads, then times render and parse
+for each payload size.
+
+    python manage.py bench_json --rows 1000 10000
+"""
+import datetime
+import decimal
+import io
+import random
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnList
+
+from university import renderers
+
+
+def edge_payload():
+    return {
+        'aware': timezone.now(),
+        'naive': datetime.datetime(2024, 2, 29, 13, 5, 7, 123456),
+        'date': datetime.date(2024, 2, 29),
+        'time': datetime.time(8, 30),
+        'duration': datetime.timedelta(hours=1, seconds=1),
+        'decimal': decimal.Decimal('12.50'),
+        'uuid': uuid.UUID(int=42),
+        'lazy': gettext_lazy('Not Graded'),
+        'separators': 'line\u2028paragraph\u2029end',
+        'unicode': 'Ëndërr 学生 ✓',
+        'int_keys': {1: 'one', 2: 'two'},
+        'floats': [0.1, 92.0, 33.333333333333336, -0.0, 123456789.125],
+        'nested': ReturnList([{'a': None, 'b': True}], serializer=None),
+        'tuple': (1, 2),
+    }
+
+
+def exponent_payload():
+    # Same values, different notation: stdlib 1e-07 / 1e+16, orjson 1e-7 / 1e16
+    return [1e-7, 1e16, 2.5e-300]
+
+
+def fallback_payload():
+    # orjson refuses integers beyond 64 bits; the renderer falls back
+    return {'big_int': 2 ** 70, 'when': timezone.now()}
+
+
+def list_payload(rows):
+    rng = random.Random(rows)
+    start = datetime.datetime(2024, 9, 1, tzinfo=datetime.timezone.utc)
+    return ReturnList([
+        {
+            'id': i,
+            'student': rng.randrange(1, 5000),
+            'student_username': f'student{i}',
+            'subject': rng.randrange(1, 200),
+            'subject_name': rng.choice(['Data Structures', 'Linguistics', 'Poezia shqipe']),
+            'professor_name': rng.choice(['Arben', 'Maria', '']),
+            'enrolled_date': (start + datetime.timedelta(seconds=rng.randrange(10 ** 7))).isoformat()
+            .replace('+00:00', 'Z'),
+            'grade': rng.choice('ABCDF') if i % 3 else '',
+            'score': round(rng.uniform(40, 100), 2) if i % 3 else None,
+            'user': {'id': i, 'username': f'student{i}', 'email': f'student{i}@example.com'},
+        }
+        for i in range(rows)
+    ], serializer=None)
+
+
+def best_of(repeat, func):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+class Command(BaseCommand):
+    help = 'Verify and benchmark the orjson renderer/parser against the DRF defaults.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000])
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        if renderers.orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed: the fast classes use the stdlib'))
+
+        drf_renderer, fast_renderer = JSONRenderer(), renderers.FastJSONRenderer()
+        drf_parser, fast_parser = JSONParser(), renderers.FastJSONParser()
+
+        failures = []
+        payloads = [('edge cases', edge_payload()), ('fallback', fallback_payload())] + [
+            (f'{rows} rows', list_payload(rows)) for rows in options['rows']
+        ]
+        exponents = exponent_payload()
+        if drf_parser.parse(io.BytesIO(fast_renderer.render(exponents))) != exponents:
+            failures.append('render exponent floats')
+
+        for name, payload in payloads:
+            expected = drf_renderer.render(payload)
+            if fast_renderer.render(payload) != expected:
+                failures.append(f'render {name}')
+            parsed = fast_parser.parse(io.BytesIO(expected))
+            if parsed != drf_parser.parse(io.BytesIO(expected)):
+                failures.append(f'parse {name}')
+        for name in failures:
+            self.stdout.write(self.style.ERROR(f'{name}: output differs'))
+        if failures:
+            raise CommandError('The fast JSON classes do not match DRF')
+        self.stdout.write('Output identical for the edge-case, fallback and list payloads.\n')
+
+        repeat = options['repeat']
+        self.stdout.write(
+            f"{'payload':<12}{'bytes':>11}{'render drf':>12}{'fast':>9}{'':>5}{'parse drf':>11}{'fast':>9}"
+        )
+        for name, payload in payloads[2:]:
+            body = drf_renderer.render(payload)
+            render_drf = best_of(repeat, lambda: drf_renderer.render(payload))
+            render_fast = best_of(repeat, lambda: fast_renderer.render(payload))
+            parse_drf = best_of(repeat, lambda: drf_parser.parse(io.BytesIO(body)))
+            parse_fast = best_of(repeat, lambda: fast_parser.parse(io.BytesIO(body)))
+            self.stdout.write(
+                f'{name:<12}{len(body):>11,}{render_drf * 1000:>10.1f}ms{render_fast * 1000:>7.1f}ms'
+                f'{render_drf / render_fast:>4.0f}x{parse_drf * 1000:>9.1f}ms{parse_fast * 1000:>7.1f}ms'
+            )
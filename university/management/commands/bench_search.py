@@ -0,0 +1,92 @@
+"""
+Time full-text searches (university.search) against icontains scans.
+
+Adds synthetic search documents inside a transaction that is rolled back at
+the end (the FTS triggers / generated column index them as they are
+inserted), then runs a few typical queries through search.search() and
+through the icontains fallback, best of --repeat.
+
+    python manage.py bench_search --documents 300000
+"""
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from university import search
+from university.models import SearchDocument
+
+FIRST = ['Arben', 'Maria', 'Elira', 'Jon', 'Besa', 'Dritan', 'Ana', 'Luan', 'Sara', 'Genti', 'Ilir', 'Noor']
+LAST = ['Hoxha', 'Smith', 'Krasniqi', 'Berisha', 'Shehu', 'Garcia', 'Gashi', 'Dervishi', 'Leka', 'Kola']
+WORDS = ['data', 'systems', 'poetry', 'modern', 'linguistics', 'networks', 'history', 'calculus',
+         'algorithms', 'literature', 'writing', 'databases', 'security', 'compilers', 'ethics']
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmark full-text search against icontains at a given document count.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--documents', type=int, default=300000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._seed(options['documents'])
+                self._benchmark(options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _seed(self, count):
+        rng = random.Random(0)
+        started = time.perf_counter()
+        batch = []
+        for i in range(count):
+            kind = rng.choices(('student', 'professor', 'subject'), (90, 4, 6))[0]
+            name = f'{rng.choice(FIRST)} {rng.choice(LAST)}'
+            if kind == 'subject':
+                title = ' '.join(rng.sample(WORDS, 2)).title()
+                body = f'{" ".join(rng.sample(WORDS, 6))} CS Computer Science {name}'
+            else:
+                title = name
+                body = f'user{i} user{i}@example.com S{i:07d} English EN'
+            batch.append(SearchDocument(kind=kind, object_id=10 ** 9 + i, title=title, body=body))
+            if len(batch) == 5000:
+                SearchDocument.objects.bulk_create(batch)
+                batch = []
+        SearchDocument.objects.bulk_create(batch)
+        self.stdout.write(
+            f'indexed {count} documents in {time.perf_counter() - started:.1f}s '
+            f'({SearchDocument.objects.count()} in total, {connection.vendor})'
+        )
+
+    def _time(self, repeat, func):
+        best, result = float('inf'), None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func()
+            best = min(best, time.perf_counter() - started)
+        return best, result
+
+    def _benchmark(self, repeat):
+        queries = [
+            ('rare name', 'hoxha arben', None),
+            ('one user', 'user123456', None),
+            ('subject words', 'modern poetry', ('subject',)),
+            ('short prefix', 'ma', None),
+            ('common word', 'english', None),
+        ]
+        self.stdout.write(f"\n{'query':<16}{'q':<16}{'fts':>10}{'icontains':>12}  top result")
+        for name, query, kinds in queries:
+            fts, results = self._time(repeat, lambda: search.search(query, kinds, 20))
+            scan, _ = self._time(
+                repeat, lambda: search._search_fallback('default', search.terms(query), kinds, 20)
+            )
+            top = results[0]['title'] if results else '-'
+            self.stdout.write(f'{name:<16}{query:<16}{fts * 1000:>8.2f}ms{scan * 1000:>10.1f}ms  {top}')
@@ -0,0 +1,197 @@
+"""
+Check that the fast list serializers (university.fast_serializers) produce
+exactly the same JSON as the DRF serializers, and compare their speed.
+
+Extra students, professors and enrollments are created inside a transaction
+that is rolled back at the end, covering the edge cases: students without a
+faculty, subjects without a professor, ungraded enrollments without a score.
+
+    python manage.py bench_serializers --rows 20000
+
+Exits with an error if any output differs, so it can run in CI.
+"""
+import json
+import random
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from university import fast_serializers, models, serializers
+
+
+class Rollback(Exception):
+    pass
+
+
+def _dump(data):
+    # Compared as JSON text, so key order and value types must match too
+    return json.dumps(data)
+
+
+class Command(BaseCommand):
+    help = 'Verify fast list serializers against DRF and benchmark rows/second.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000,
+                            help='Enrollments to add for the run (students/professors scale with it)')
+        parser.add_argument('--repeat', type=int, default=3, help='Best of N timings')
+
+    def handle(self, *args, **options):
+        self.repeat = options['repeat']
+        failures = []
+        try:
+            with transaction.atomic():
+                self._seed(options['rows'])
+                failures += self._check_serializers()
+                failures += self._check_api()
+                self._benchmark()
+                raise Rollback
+        except Rollback:
+            pass
+
+        if failures:
+            raise CommandError('Output differs for: ' + ', '.join(failures))
+        self.stdout.write(self.style.SUCCESS('Fast serializers match the DRF output.'))
+
+    def _seed(self, rows):
+        rng = random.Random(0)
+        faculties = list(models.Faculty.objects.all()) or [models.Faculty.objects.create(name='CS')]
+        n_students = max(rows // 10, 10)
+        n_professors = max(rows // 200, 2)
+
+        User.objects.bulk_create(
+            User(username=f'bench_s{i}', email=f'bench_s{i}@example.com') for i in range(n_students)
+        )
+        User.objects.bulk_create(
+            User(username=f'bench_p{i}', first_name=f'Prof{i}' if i % 3 else '')
+            for i in range(n_professors)
+        )
+        users = {u.username: u for u in User.objects.filter(username__startswith='bench_')}
+
+        students = models.Student.objects.bulk_create(
+            models.Student(
+                user=users[f'bench_s{i}'],
+                faculty=None if i % 7 == 0 else rng.choice(faculties),
+                enrollment_number=f'B{i:06d}',
+            )
+            for i in range(n_students)
+        )
+        professors = models.Professor.objects.bulk_create(
+            models.Professor(user=users[f'bench_p{i}'], faculty=rng.choice(faculties), title='Dr.')
+            for i in range(n_professors)
+        )
+        subjects = models.Subject.objects.bulk_create(
+            models.Subject(
+                name=f'Bench subject {i}',
+                faculty=rng.choice(faculties),
+                professor=None if i % 5 == 0 else rng.choice(professors),
+            )
+            for i in range(max(rows // 100, 5))
+        )
+
+        pairs = set()
+        while len(pairs) < rows and len(pairs) < len(students) * len(subjects):
+            pairs.add((rng.randrange(len(students)), rng.randrange(len(subjects))))
+        enrollments = []
+        for s, j in pairs:
+            graded = rng.random() < 0.6
+            enrollments.append(models.Enrollment(
+                student=students[s],
+                subject=subjects[j],
+                grade=rng.choice('ABCDF') if graded else '',
+                score=round(rng.uniform(40, 100), 2) if graded else None,
+            ))
+        models.Enrollment.objects.bulk_create(enrollments)
+        self.stdout.write(
+            f'seeded {len(students)} students, {len(professors)} professors, '
+            f'{len(subjects)} subjects, {len(enrollments)} enrollments'
+        )
+
+    def _cases(self):
+        return [
+            ('students', models.Student.objects.order_by('pk'), ('user',),
+             serializers.StudentSerializer, fast_serializers.STUDENT_LIST),
+            ('professors', models.Professor.objects.order_by('pk'), ('user',),
+             serializers.ProfessorSerializer, fast_serializers.PROFESSOR_LIST),
+            ('enrollments', models.Enrollment.objects.order_by('pk'), ('student__user', 'subject__professor__user'),
+             serializers.EnrollmentSerializer, fast_serializers.ENROLLMENT_LIST),
+        ]
+
+    def _check_serializers(self):
+        failures = []
+        for name, queryset, _, serializer_class, fast in self._cases():
+            expected = _dump(serializer_class(queryset, many=True).data)
+            actual = _dump(fast.to_representation(fast.values(queryset)))
+            ok = expected == actual
+            self.stdout.write(f'{name:<12} serializer output {"identical" if ok else "DIFFERS"}')
+            if not ok:
+                failures.append(name)
+        return failures
+
+    def _check_api(self):
+        """
+        Same responses through the viewsets, per role, with and without
+        pagination and ``?fields=``.
+        """
+        failures = []
+        paginated = {
+            **getattr(settings, 'REST_FRAMEWORK', {}),
+            'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+            'PAGE_SIZE': 100,
+        }
+        users = User.objects.filter(username__in=['admin_user', 'professor1', 'student1'])
+        for user in users:
+            headers = {'Authorization': f'Bearer {RefreshToken.for_user(user).access_token}'}
+            for path in ('students/', 'professors/', 'enrollments/', 'enrollments/?page=2',
+                         'students/?fields=id,user.username', 'enrollments/?fields=score,professor_name,id'):
+                for rest_framework in (settings.REST_FRAMEWORK, paginated):
+                    if 'page=' in path and rest_framework is not paginated:
+                        continue
+                    responses = []
+                    for fast in (False, True):
+                        with override_settings(
+                            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                            FAST_LIST_SERIALIZERS=fast,
+                            REST_FRAMEWORK=rest_framework,
+                        ):
+                            response = Client().get(f'/api/university/{path}', headers=headers)
+                            responses.append((response.status_code, response.content))
+                    if responses[0] != responses[1]:
+                        label = f'{user.username} {path}{" (paginated)" if rest_framework is paginated else ""}'
+                        self.stdout.write(f'API {label}: DIFFERS')
+                        failures.append(label)
+        self.stdout.write(f'API responses checked for {len(users)} users')
+        return failures
+
+    def _time(self, func):
+        best = float('inf')
+        for _ in range(self.repeat):
+            started = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - started)
+        return best
+
+    def _benchmark(self):
+        self.stdout.write(
+            f"\n{'list':<12}{'rows':>8}{'drf rows/s':>14}{'drf+joins':>14}{'fast rows/s':>14}{'speed-up':>10}"
+        )
+        for name, queryset, related, serializer_class, fast in self._cases():
+            rows = queryset.count()
+            # All include fetching. "drf" runs as the viewsets do, with a
+            # query per related row; "drf+joins" adds select_related() and
+            # so isolates the serializer cost.
+            drf = self._time(lambda: serializer_class(queryset.all(), many=True).data)
+            joined = self._time(
+                lambda: serializer_class(queryset.select_related(*related), many=True).data
+            )
+            quick = self._time(lambda: fast.to_representation(fast.values(queryset.all())))
+            self.stdout.write(
+                f'{name:<12}{rows:>8}{rows / drf:>14,.0f}{rows / joined:>14,.0f}'
+                f'{rows / quick:>14,.0f}{joined / quick:>9.1f}x'
+            )
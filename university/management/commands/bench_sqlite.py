@@ -0,0 +1,108 @@
+"""
+Concurrency benchmark for the SQLite connection settings.
+
+Runs several writer processes against a scratch database file, first with
+Django's stock sqlite3 behaviour (rollback journal, deferred BEGIN) and then
+with project.backends.sqlite3 (WAL, PRAGMAs, BEGIN IMMEDIATE), and reports
+committed writes per second and "database is locked" errors for each.
+
+    python manage.py bench_sqlite --workers 8 --seconds 5
+"""
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from project.backends.sqlite3.base import DEFAULT_PRAGMAS, apply_pragmas
+
+
+MODES = {
+    # What django.db.backends.sqlite3 does out of the box
+    'stock': {'pragmas': {}, 'begin': 'BEGIN', 'timeout': 5.0},
+    # What project.backends.sqlite3 does with the default OPTIONS
+    'tuned': {'pragmas': DEFAULT_PRAGMAS, 'begin': 'BEGIN IMMEDIATE', 'timeout': 5.0},
+}
+
+
+def _writer(path, mode, seconds, results):
+    config = MODES[mode]
+    conn = sqlite3.connect(path, timeout=config['timeout'], isolation_level=None)
+    apply_pragmas(conn, config['pragmas'])
+
+    writes = locked = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        try:
+            conn.execute(config['begin'])
+            # Read-then-write, like a view that checks max_students before
+            # inserting an enrollment.
+            conn.execute('SELECT COUNT(*) FROM bench WHERE worker = ?', (os.getpid(),)).fetchone()
+            conn.execute('INSERT INTO bench (worker, payload) VALUES (?, ?)', (os.getpid(), 'x' * 200))
+            conn.execute('COMMIT')
+            writes += 1
+        except sqlite3.OperationalError as exc:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            if 'locked' not in str(exc) and 'busy' not in str(exc):
+                raise
+            locked += 1
+    conn.close()
+    results.put((writes, locked))
+
+
+def run(mode, workers, seconds):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.sqlite3')
+        conn = sqlite3.connect(path)
+        apply_pragmas(conn, MODES[mode]['pragmas'])
+        conn.execute('CREATE TABLE bench (id INTEGER PRIMARY KEY, worker INTEGER, payload TEXT)')
+        conn.commit()
+        conn.close()
+
+        results = multiprocessing.Queue()
+        procs = [
+            multiprocessing.Process(target=_writer, args=(path, mode, seconds, results))
+            for _ in range(workers)
+        ]
+        started = time.monotonic()
+        for proc in procs:
+            proc.start()
+        totals = [results.get() for _ in procs]
+        for proc in procs:
+            proc.join()
+        elapsed = time.monotonic() - started
+
+    writes = sum(w for w, _ in totals)
+    locked = sum(lk for _, lk in totals)
+    return {
+        'mode': mode,
+        'writes': writes,
+        'writes_per_sec': writes / elapsed,
+        'lock_errors': locked,
+        'lock_error_rate': locked / max(writes + locked, 1),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Compare concurrent SQLite write throughput with stock and tuned connection settings.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=5.0)
+        parser.add_argument('--mode', choices=sorted(MODES), action='append')
+
+    def handle(self, *args, **options):
+        modes = options['mode'] or ['stock', 'tuned']
+        self.stdout.write(
+            f"{options['workers']} writer processes, {options['seconds']:.0f}s per mode\n"
+        )
+        self.stdout.write(f"{'mode':<8}{'writes':>10}{'writes/s':>12}{'locked':>10}{'lock %':>9}")
+        for mode in modes:
+            r = run(mode, options['workers'], options['seconds'])
+            self.stdout.write(
+                f"{r['mode']:<8}{r['writes']:>10}{r['writes_per_sec']:>12.1f}"
+                f"{r['lock_errors']:>10}{r['lock_error_rate'] * 100:>8.1f}%"
+            )
@@ -0,0 +1,127 @@
+"""
+Measure the in-memory typeahead index (university.typeahead).
+
+Adds synthetic students and subjects inside a transaction that is rolled
+back at the end, builds the index from them as a worker would, and reports
+the build time, the memory the index holds (tracemalloc) and the latency of
+lookups, next to the same prefix query against the database
+(``istartswith``, what a typeahead would otherwise run per keystroke).
+
+    python manage.py bench_typeahead --students 100000
+"""
+import gc
+import random
+import time
+import tracemalloc
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from university import typeahead
+from university.models import Faculty, Student, Subject
+
+FIRST = ['Arben', 'Maria', 'Elira', 'Jon', 'Besa', 'Dritan', 'Ana', 'Luan', 'Sara', 'Genti', 'Ilir', 'Noor']
+LAST = ['Hoxha', 'Smith', 'Krasniqi', 'Berisha', 'Shehu', 'Garcia', 'Gashi', 'Dervishi', 'Leka', 'Kola']
+WORDS = ['Data', 'Systems', 'Poetry', 'Modern', 'Linguistics', 'Networks', 'History', 'Calculus',
+         'Algorithms', 'Literature', 'Writing', 'Databases', 'Security', 'Compilers', 'Ethics']
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmark build time, memory and lookup latency of the typeahead index.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=100000)
+        parser.add_argument('--subjects', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=1000, help='Lookups per prefix')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._seed(options['students'], options['subjects'])
+                self._measure_build()
+                self._benchmark(options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            typeahead.reset()
+
+    def _seed(self, n_students, n_subjects):
+        rng = random.Random(0)
+        started = time.perf_counter()
+        faculty = Faculty.objects.first() or Faculty.objects.create(name='CS')
+        User.objects.bulk_create(
+            (
+                User(username=f'{rng.choice(FIRST).lower()}.{rng.choice(LAST).lower()}{i}',
+                     first_name=rng.choice(FIRST), last_name=rng.choice(LAST))
+                for i in range(n_students)
+            ),
+            batch_size=5000,
+        )
+        users = User.objects.filter(student__isnull=True, professor__isnull=True,
+                                    administrator__isnull=True, is_superuser=False).order_by('pk')
+        Student.objects.bulk_create(
+            (Student(user=user, enrollment_number=f'T{i:07d}') for i, user in enumerate(users.iterator())),
+            batch_size=5000,
+        )
+        Subject.objects.bulk_create(
+            (Subject(name=f'{" ".join(rng.sample(WORDS, 2))} {i}', faculty=faculty) for i in range(n_subjects)),
+            batch_size=5000,
+        )
+        self.stdout.write(
+            f'seeded {Student.objects.count()} students and {Subject.objects.count()} subjects '
+            f'in {time.perf_counter() - started:.1f}s'
+        )
+
+    def _measure_build(self):
+        typeahead.reset()
+        started = time.perf_counter()
+        typeahead.get_indexes()
+        elapsed = time.perf_counter() - started
+
+        # Again under tracemalloc, which slows the build down
+        typeahead.reset()
+        gc.collect()
+        tracemalloc.start()
+        indexes = typeahead.get_indexes()
+        gc.collect()
+        held, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        entries = sum(len(index) for index in indexes.values())
+        keys = sum(len(index._keys) for index in indexes.values())
+        self.stdout.write(
+            f'built {entries} entries ({keys} keys) in {elapsed * 1000:.0f} ms; '
+            f'holds {held / 2 ** 20:.1f} MiB ({held / entries:.0f} B/entry), '
+            f'peak while building {peak / 2 ** 20:.1f} MiB'
+        )
+
+    def _time(self, repeat, func):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            result = func()
+        return (time.perf_counter() - started) / repeat, result
+
+    def _benchmark(self, repeat):
+        prefixes = ['a', 'ma', 'mar', 'maria.h', 'T00123', 'data sys', 'zzz']
+        self.stdout.write(f"\n{'prefix':<12}{'hits':>6}{'index':>12}{'database':>12}")
+        for prefix in prefixes:
+            memory, results = self._time(repeat, lambda: typeahead.lookup(prefix, limit=10))
+
+            def database():
+                students = list(
+                    Student.objects.filter(
+                        Q(user__username__istartswith=prefix) | Q(enrollment_number__istartswith=prefix)
+                    ).order_by('user__username').values_list('pk', 'user__username', 'enrollment_number')[:10]
+                )
+                subjects = list(Subject.objects.filter(name__istartswith=prefix).order_by('name')
+                                .values_list('pk', 'name')[:10])
+                return students + subjects
+
+            db, _ = self._time(max(repeat // 100, 3), database)
+            self.stdout.write(f'{prefix:<12}{len(results):>6}{memory * 1e6:>10.1f}us{db * 1000:>10.2f}ms')
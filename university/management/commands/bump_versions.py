@@ -0,0 +1,27 @@
+"""
+Bump data versions (university.versions), dropping what is cached under
+them: after a bump that failed once its write had committed (logged as
+"Could not bump data version"), or after bulk writes that send no signals.
+
+    python manage.py bump_versions                    # every version
+    python manage.py bump_versions admin-bootstrap    # only these
+"""
+from django.core.management.base import BaseCommand
+
+from university import versions
+
+
+class Command(BaseCommand):
+    help = 'Bump data versions so caches built from them are rebuilt.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help='Versions to bump (default: all)')
+
+    def handle(self, *args, **options):
+        names = versions.bump_all(options['names'] or None)
+        if not names:
+            self.stdout.write('No data versions yet.')
+            return
+        for name in names:
+            self.stdout.write(f'{name}: {versions.current(name)}')
+        self.stdout.write(self.style.SUCCESS(f'{len(names)} version(s) bumped.'))
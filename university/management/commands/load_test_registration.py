@@ -0,0 +1,369 @@
+"""
+Simulate a registration rush: a cohort of students logging in at once and
+enrolling in a handful of popular subjects while browsing the subject list.
+
+    python manage.py load_test_registration --students 200 --concurrency 50
+    python manage.py load_test_registration --server runserver --record benchmarks/rush.jsonl
+
+Steps:
+
+1. Seed students (with users) and subjects in the configured database,
+   under a run-specific prefix. The subjects have ``--capacity`` seats each,
+   fewer than the demand.
+2. Start the app on a free local port: gunicorn (``--workers``/``--threads``)
+   or ``runserver``, with DEBUG off and unhandled exceptions logged.
+3. Log every student in through POST /api/auth/token/ (SecureTokenObtainView).
+4. From ``--concurrency`` threads, send each student's enrollment POSTs
+   (/api/university/enrollments/, popular subjects more likely, some sent
+   twice like a double click) mixed with GETs of /api/university/subjects/.
+5. Report throughput and p50/p95/p99 latency per request type, the error rate
+   (5xx and failed connections) and the lock rate (requests that failed on a
+   database lock, from the server's log), then check the data: no student
+   enrolled twice in a subject and no subject over its capacity.
+
+The seeded rows (and everything the requests created for them) are deleted
+at the end unless ``--keep`` is given. The command fails if the data check
+does.
+"""
+import json
+import os
+import random
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import requests
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, F
+
+from university.models import Enrollment, Faculty, Student, Subject
+from university.security_models import LoginAttempt
+
+PASSWORD = 'rush-password-1'
+
+# Run in the server process: Django logs unhandled exceptions (with their
+# traceback) to django.request, which propagates to this root handler
+SERVER = r'''
+import logging, sys
+logging.basicConfig(stream=sys.stderr, level=logging.ERROR, format='%(levelname)s %(name)s %(message)s')
+server, *args = sys.argv[1:]
+if server == 'gunicorn':
+    from gunicorn.app.wsgiapp import run
+    sys.argv = ['gunicorn', *args]
+    run()
+else:
+    from django.core.management import execute_from_command_line
+    execute_from_command_line(['manage.py', 'runserver', *args])
+'''
+
+# Our log format puts the level first; a record runs until the next one
+RECORD_START = re.compile(r'^(?=(?:ERROR|CRITICAL) )', re.MULTILINE)
+EXCEPTION_LINE = re.compile(r'^([A-Za-z_][\w.]*(?:Error|Exception|Deadlock\w*)): ?(.*)$', re.MULTILINE)
+# SQLite busy timeout, PostgreSQL deadlocks, serialization failures and lock timeouts
+LOCK_MESSAGES = ('database is locked', 'deadlock detected', 'could not serialize access', 'lock timeout')
+
+
+def _percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def server_errors(log):
+    """(exception, message) of each error the server logged: the last, outermost one of its traceback."""
+    errors = []
+    for record in RECORD_START.split(log):
+        found = EXCEPTION_LINE.findall(record)
+        if found:
+            errors.append(found[-1])
+    return errors
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Command(BaseCommand):
+    help = 'Load-test enrollment under a registration rush and check data integrity.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=100)
+        parser.add_argument('--subjects', type=int, default=10)
+        parser.add_argument('--capacity', type=int, default=20, help='Seats per seeded subject')
+        parser.add_argument('--enrollments', type=int, default=4, help='Subjects each student tries to join')
+        parser.add_argument('--reads', type=int, default=3, help='Subject list GETs per student')
+        parser.add_argument('--double-submit', type=float, default=0.1,
+                            help='Fraction of enrollment POSTs sent twice')
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--server', choices=['gunicorn', 'runserver'], default='gunicorn')
+        parser.add_argument('--workers', type=int, default=4, help='gunicorn workers')
+        parser.add_argument('--threads', type=int, default=1, help='Threads per gunicorn worker')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed of the workload')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded data')
+        parser.add_argument('--record', metavar='FILE', help='Append the results as a JSON line')
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.prefix = f'rush{int(time.time())}'
+        self.rng = random.Random(options['seed'])
+        students, subjects = self._seed()
+        try:
+            report = self._run(students, subjects)
+            report['integrity'] = integrity = self._check(subjects)
+        finally:
+            if not options['keep']:
+                self._clean_up()
+        if options['record']:
+            self._record(report)
+        if integrity['duplicates'] or integrity['oversubscribed']:
+            raise CommandError('Integrity check failed.')
+
+    def _run(self, students, subjects):
+        server, base_url, log = self._start_server()
+        try:
+            results = {'login': [], 'enroll': [], 'subjects': []}
+            started = time.perf_counter()
+            tokens = self._login(base_url, students, results['login'])
+            login_elapsed = time.perf_counter() - started
+            started = time.perf_counter()
+            self._rush(base_url, students, subjects, tokens, results)
+            rush_elapsed = time.perf_counter() - started
+        finally:
+            server.terminate()
+            server.wait(10)
+            with open(log) as fh:
+                server_log = fh.read()
+            os.unlink(log)
+        return self._report(results, login_elapsed, rush_elapsed, server_log)
+
+    # ----- setup -----
+
+    def _seed(self):
+        options = self.options
+        password = make_password(PASSWORD)
+        faculty = Faculty.objects.order_by('pk').first()
+        if faculty is None:
+            raise CommandError('Create a faculty first (migrate loads them).')
+        started = time.perf_counter()
+        # One by one, so the signal handlers keep the counters and indexes right
+        with transaction.atomic():
+            students = []
+            for i in range(options['students']):
+                user = User.objects.create(username=f'{self.prefix}_{i}', password=password)
+                students.append(Student.objects.create(user=user, faculty=faculty, enrollment_number=f'R{i:06d}'))
+            subjects = [
+                Subject.objects.create(name=f'{self.prefix} subject {j}', faculty=faculty,
+                                       max_students=options['capacity'])
+                for j in range(options['subjects'])
+            ]
+        seats = options['capacity'] * options['subjects']
+        demand = options['students'] * min(options['enrollments'], options['subjects'])
+        self.stdout.write(
+            f'seeded {len(students)} students and {len(subjects)} subjects in '
+            f'{time.perf_counter() - started:.1f}s: {demand} enrollment attempts for {seats} seats'
+        )
+        return students, subjects
+
+    def _start_server(self):
+        options = self.options
+        port = _free_port()
+        if options['server'] == 'gunicorn':
+            args = ['project.wsgi:application', '--bind', f'127.0.0.1:{port}',
+                    '--workers', str(options['workers']), '--threads', str(options['threads']),
+                    '--timeout', '120']
+        else:
+            args = ['--noreload', f'127.0.0.1:{port}']
+        log = tempfile.NamedTemporaryFile('w', prefix='rush-server-', suffix='.log', delete=False)
+        env = {**os.environ, 'DEBUG': 'False'}
+        process = subprocess.Popen(
+            [sys.executable, '-c', SERVER, options['server'], *args],
+            stdout=log, stderr=subprocess.STDOUT, env=env, cwd=settings.BASE_DIR,
+        )
+        log.close()
+        base_url = f'http://127.0.0.1:{port}'
+        deadline = time.monotonic() + 30
+        while True:
+            if process.poll() is not None:
+                with open(log.name) as fh:
+                    raise CommandError(f'The server exited:\n{fh.read()[-2000:]}')
+            try:
+                requests.get(f'{base_url}/api/university/subjects/', timeout=2)
+                break
+            except requests.ConnectionError:
+                if time.monotonic() > deadline:
+                    process.terminate()
+                    os.unlink(log.name)
+                    raise CommandError('The server did not start within 30s.')
+                time.sleep(0.2)
+        server = options['server']
+        if server == 'gunicorn':
+            server += f" ({options['workers']} workers x {options['threads']} threads)"
+        self.stdout.write(f'server: {server} at {base_url}')
+        return process, base_url, log.name
+
+    # ----- load -----
+
+    def _pool(self, func, items):
+        local = threading.local()
+
+        def call(item):
+            if not hasattr(local, 'session'):
+                local.session = requests.Session()
+            return func(local.session, item)
+
+        with ThreadPoolExecutor(max_workers=self.options['concurrency']) as pool:
+            return list(pool.map(call, items))
+
+    def _timed(self, results, session, method, url, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = session.request(method, url, timeout=60, **kwargs)
+            status = response.status_code
+        except requests.RequestException:
+            response, status = None, 0
+        results.append((time.perf_counter() - started, status))
+        return response
+
+    def _login(self, base_url, students, results):
+        def login(session, student):
+            response = self._timed(results, session, 'POST', f'{base_url}/api/auth/token/',
+                                   json={'username': student.user.username, 'password': PASSWORD})
+            if response is not None and response.status_code == 200:
+                return response.json()['access']
+            return None
+
+        tokens = self._pool(login, students)
+        self.stdout.write(f'logged in {sum(1 for token in tokens if token)} of {len(students)} students')
+        return dict(zip((student.pk for student in students), tokens))
+
+    def _rush(self, base_url, students, subjects, tokens, results):
+        options = self.options
+        # Popularity falls off with the subject's rank, as in a real rush
+        weights = [1 / (rank + 1) for rank in range(len(subjects))]
+        operations = []
+        for student in students:
+            token = tokens[student.pk]
+            if token is None:
+                continue
+            chosen = set()
+            while len(chosen) < min(options['enrollments'], len(subjects)):
+                chosen.add(self.rng.choices(subjects, weights)[0].pk)
+            for subject_id in chosen:
+                repeat = 2 if self.rng.random() < options['double_submit'] else 1
+                operations += [('enroll', token, {'student': student.pk, 'subject': subject_id})] * repeat
+            operations += [('subjects', token, None)] * options['reads']
+        self.rng.shuffle(operations)
+
+        def send(session, operation):
+            kind, token, body = operation
+            headers = {'Authorization': f'Bearer {token}'}
+            if kind == 'enroll':
+                self._timed(results['enroll'], session, 'POST', f'{base_url}/api/university/enrollments/',
+                            json=body, headers=headers)
+            else:
+                self._timed(results['subjects'], session, 'GET', f'{base_url}/api/university/subjects/',
+                            headers=headers)
+
+        self._pool(send, operations)
+
+    # ----- results -----
+
+    def _report(self, results, login_elapsed, rush_elapsed, server_log):
+        errors = server_errors(server_log)
+        exceptions = Counter(name.rsplit('.', 1)[-1] for name, _ in errors)
+        lock_errors = sum(1 for _, message in errors if any(text in message.lower() for text in LOCK_MESSAGES))
+        report = {
+            'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'options': {key: self.options[key] for key in (
+                'students', 'subjects', 'capacity', 'enrollments', 'reads', 'double_submit',
+                'concurrency', 'server', 'workers', 'threads', 'seed',
+            )},
+            'requests': {},
+        }
+
+        self.stdout.write(
+            f"\n{'request':<10}{'count':>7}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  statuses"
+        )
+        total = failed = 0
+        for kind, samples in results.items():
+            elapsed = login_elapsed if kind == 'login' else rush_elapsed
+            latencies = sorted(latency for latency, _ in samples)
+            statuses = Counter(status for _, status in samples)
+            row = {
+                'count': len(samples),
+                'per_second': round(len(samples) / elapsed, 1) if elapsed else 0.0,
+                'p50_ms': round(statistics.median(latencies) * 1000, 1) if latencies else 0.0,
+                'p95_ms': round(_percentile(latencies, 0.95) * 1000, 1),
+                'p99_ms': round(_percentile(latencies, 0.99) * 1000, 1),
+                'statuses': {str(status): count for status, count in sorted(statuses.items())},
+            }
+            report['requests'][kind] = row
+            total += len(samples)
+            failed += sum(count for status, count in statuses.items() if status == 0 or status >= 500)
+            self.stdout.write(
+                f"{kind:<10}{row['count']:>7}{row['per_second']:>9}{row['p50_ms']:>9}{row['p95_ms']:>9}"
+                f"{row['p99_ms']:>9}  " + ' '.join(f'{status}:{count}' for status, count in row['statuses'].items())
+            )
+
+        report['error_rate'] = round(failed / total, 4) if total else 0.0
+        report['lock_rate'] = round(lock_errors / total, 4) if total else 0.0
+        report['server_exceptions'] = dict(exceptions)
+        self.stdout.write(
+            f"\nerror rate {report['error_rate']:.2%} (5xx and failed connections), "
+            f"lock rate {report['lock_rate']:.2%} ({lock_errors} requests failed on a database lock)"
+        )
+        if exceptions:
+            self.stdout.write('server exceptions: ' + ', '.join(f'{name} {count}' for name, count in exceptions.most_common()))
+        return report
+
+    def _check(self, subjects):
+        duplicates = (
+            Enrollment.objects.filter(student__user__username__startswith=f'{self.prefix}_')
+            .values('student', 'subject').annotate(count=Count('pk')).filter(count__gt=1).count()
+        )
+        over = list(
+            Subject.objects.filter(pk__in=[subject.pk for subject in subjects])
+            .annotate(enrolled=Count('enrollments')).filter(enrolled__gt=F('max_students'))
+            .values_list('name', 'enrolled', 'max_students')
+        )
+        enrolled = Enrollment.objects.filter(subject__in=subjects).count()
+        self.stdout.write(f'\n{enrolled} enrollments created')
+        self.stdout.write(
+            (self.style.SUCCESS if not duplicates else self.style.ERROR)(f'duplicate enrollments: {duplicates}')
+        )
+        if over:
+            worst = max(over, key=lambda row: row[1] - row[2])
+            self.stdout.write(self.style.ERROR(
+                f'oversubscribed subjects: {len(over)} of {len(subjects)} (worst: {worst[1]} enrolled for {worst[2]} seats)'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS('oversubscribed subjects: 0'))
+        return {'enrollments': enrolled, 'duplicates': duplicates, 'oversubscribed': len(over)}
+
+    def _clean_up(self):
+        # Through the ORM, so signal handlers undo counters, indexes and sessions
+        with transaction.atomic():
+            Subject.objects.filter(name__startswith=f'{self.prefix} subject ').delete()
+            User.objects.filter(username__startswith=f'{self.prefix}_').delete()
+            LoginAttempt.objects.filter(username__startswith=f'{self.prefix}_').delete()
+
+    def _record(self, report):
+        path = self.options['record']
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'a') as fh:
+            fh.write(json.dumps(report) + '\n')
+        self.stdout.write(f'\nrecorded to {path}')
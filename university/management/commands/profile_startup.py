@@ -0,0 +1,170 @@
+"""
+Measure how long a fresh worker takes to import the WSGI module and answer
+its first request, and where the import time goes.
+
+Each run starts a new interpreter with ``python -X importtime``, imports the
+WSGI module (which includes Django setup and, for wsgi_production, warm-up),
+sends one request through ``application`` and reports:
+
+- time to first response, split into interpreter start, import and request
+- import time per top-level package (django, rest_framework, university, ...)
+- the slowest individual modules
+
+Record runs to spot regressions:
+
+    python manage.py profile_startup --module wsgi_production --runs 5 \\
+        --record benchmarks/startup.jsonl
+    python manage.py profile_startup --compare benchmarks/startup.jsonl
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+CHILD = r'''
+import importlib, json, sys, time
+started = time.perf_counter()
+module = importlib.import_module(sys.argv[1])
+imported = time.perf_counter()
+from project.warmup import warm_request
+status = warm_request(module.application, sys.argv[2])
+responded = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'request_ms': (responded - imported) * 1000,
+    'status': status,
+}))
+'''
+
+
+def _package(name):
+    top = name.strip().split('.')[0]
+    if top in sys.stdlib_module_names or top.startswith('_'):
+        return 'stdlib'
+    return top
+
+
+def parse_importtime(stderr):
+    """Return ({package: self_ms}, [(cumulative_ms, module)]) from -X importtime output."""
+    by_package = defaultdict(float)
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        # "import time:       123 |        456 |   package.module"
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        by_package[_package(name)] += int(self_us) / 1000
+        modules.append((int(cumulative_us) / 1000, name.strip()))
+    return dict(by_package), modules
+
+
+def run_once(module, path):
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', CHILD, module, path],
+        cwd=settings.BASE_DIR,
+        capture_output=True,
+        text=True,
+    )
+    total_ms = (time.perf_counter() - started) * 1000
+    if proc.returncode != 0:
+        raise CommandError(f'Importing {module} failed:\n{proc.stderr[-2000:]}')
+
+    timings = json.loads(proc.stdout.strip().splitlines()[-1])
+    by_package, modules = parse_importtime(proc.stderr)
+    return {
+        'total_ms': total_ms,
+        'interpreter_ms': total_ms - timings['import_ms'] - timings['request_ms'],
+        'import_ms': timings['import_ms'],
+        'request_ms': timings['request_ms'],
+        'status': timings['status'],
+        'packages_ms': by_package,
+        'modules': modules,
+    }
+
+
+class Command(BaseCommand):
+    help = 'Report import-time breakdown and time to first response for a WSGI module.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--module', default='project.wsgi',
+                            help='WSGI module to import, e.g. project.wsgi or wsgi_production')
+        parser.add_argument('--path', default='/healthz', help='Path of the first request')
+        parser.add_argument('--runs', type=int, default=3, help='Runs to take the median of')
+        parser.add_argument('--top', type=int, default=15, help='Slowest modules to list')
+        parser.add_argument('--record', metavar='FILE', help='Append the result as a JSON line')
+        parser.add_argument('--compare', metavar='FILE',
+                            help='Compare with the last recorded result for the same module')
+        parser.add_argument('--max-regression', type=float, default=20.0,
+                            help='Fail --compare if time to first response grew by more than this %%')
+
+    def handle(self, *args, **options):
+        module = options['module']
+        # The first run also compiles .pyc files; do not let it skew the median
+        run_once(module, options['path'])
+        runs = [run_once(module, options['path']) for _ in range(options['runs'])]
+        result = min(runs, key=lambda r: abs(r['total_ms'] - statistics.median(x['total_ms'] for x in runs)))
+
+        self.stdout.write(f"{module}: first response {result['status']} on {options['path']}")
+        self.stdout.write(
+            f"time to first response {result['total_ms']:.0f} ms = "
+            f"interpreter {result['interpreter_ms']:.0f} + import/setup {result['import_ms']:.0f} "
+            f"+ first request {result['request_ms']:.0f} (median of {len(runs)})"
+        )
+        self.stdout.write('\nimport time by package (self):')
+        for package, ms in sorted(result['packages_ms'].items(), key=lambda kv: -kv[1])[:12]:
+            self.stdout.write(f'  {package:<28}{ms:>8.1f} ms')
+        self.stdout.write('\nslowest modules (cumulative):')
+        for ms, name in sorted(result['modules'], reverse=True)[:options['top']]:
+            self.stdout.write(f'  {name:<48}{ms:>8.1f} ms')
+
+        record = {
+            'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'module': module,
+            'python': platform.python_version(),
+            'total_ms': round(result['total_ms'], 1),
+            'import_ms': round(result['import_ms'], 1),
+            'request_ms': round(result['request_ms'], 1),
+            'packages_ms': {k: round(v, 1) for k, v in sorted(result['packages_ms'].items())},
+        }
+
+        if options['compare']:
+            self._compare(options['compare'], record, options['max_regression'])
+        if options['record']:
+            os.makedirs(os.path.dirname(os.path.abspath(options['record'])), exist_ok=True)
+            with open(options['record'], 'a') as fh:
+                fh.write(json.dumps(record) + '\n')
+            self.stdout.write(f"\nrecorded to {options['record']}")
+
+    def _compare(self, path, record, max_regression):
+        try:
+            with open(path) as fh:
+                history = [json.loads(line) for line in fh if line.strip()]
+        except FileNotFoundError:
+            raise CommandError(f'No recorded results in {path}')
+        previous = [r for r in history if r['module'] == record['module']]
+        if not previous:
+            raise CommandError(f"No recorded results for {record['module']} in {path}")
+        baseline = previous[-1]
+
+        change = (record['total_ms'] - baseline['total_ms']) / baseline['total_ms'] * 100
+        self.stdout.write(
+            f"\nvs {baseline['date']}: {baseline['total_ms']:.0f} ms -> {record['total_ms']:.0f} ms "
+            f"({change:+.1f}%)"
+        )
+        for package in sorted(set(baseline['packages_ms']) | set(record['packages_ms'])):
+            before = baseline['packages_ms'].get(package, 0.0)
+            after = record['packages_ms'].get(package, 0.0)
+            if abs(after - before) >= 5:
+                self.stdout.write(f'  {package:<28}{before:>8.1f} -> {after:.1f} ms')
+        if change > max_regression:
+            raise CommandError(f'Startup regressed by {change:.1f}% (limit {max_regression:.0f}%)')
@@ -0,0 +1,26 @@
+"""
+Recreate the full-text search documents (university.search) from the
+students, professors and subjects.
+
+Needed after writes that bypass the model signals: bulk_create(), raw SQL,
+``loaddata`` of fixtures, or restoring a database dump taken without the
+search tables.
+
+    python manage.py rebuild_search_index
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from university import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the search index for students, professors and subjects.'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = search.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {count} documents in {time.perf_counter() - started:.1f}s.'
+        ))
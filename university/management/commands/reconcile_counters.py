@@ -0,0 +1,30 @@
+"""
+Recount the administrator statistics (university.counters) from the tables
+and fix the counters that drifted, e.g. after bulk_create, QuerySet.update()
+or raw SQL, which send no signals.
+
+    python manage.py reconcile_counters            # fix and report
+    python manage.py reconcile_counters --dry-run  # report only
+"""
+from django.core.management.base import BaseCommand
+
+from university import counters
+
+
+class Command(BaseCommand):
+    help = 'Recount the statistics counters and fix any that drifted.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report differences without fixing them')
+
+    def handle(self, *args, **options):
+        differences = counters.reconcile(dry_run=options['dry_run'])
+        if not differences:
+            self.stdout.write(self.style.SUCCESS('All counters match.'))
+            return
+        self.stdout.write(f"{'counter':<36}{'stored':>10}{'actual':>10}")
+        for name, key, stored, actual in differences:
+            label = f'{name}[{key}]' if key else name
+            self.stdout.write(f'{label:<36}{stored:>10}{actual:>10}')
+        verb = 'differ' if options['dry_run'] else 'fixed'
+        self.stdout.write(self.style.WARNING(f'{len(differences)} counters {verb}.'))
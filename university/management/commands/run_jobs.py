@@ -0,0 +1,99 @@
+"""
+Run background jobs (university.jobs) until stopped.
+
+    python manage.py run_jobs                          # default queue, one thread
+    python manage.py run_jobs --queue reports --threads 4
+    python manage.py run_jobs --once                   # run what is due, then exit
+
+Each thread claims and runs one job at a time. Every minute (and at start)
+the process also queues the next run of the periodic tasks of its queues,
+e.g. clean_expired_tokens and purge_jobs, and releases timed-out jobs.
+SIGTERM or Ctrl-C stops the
+claiming; running jobs finish first. Run several of these processes, on one
+machine or several, to scale out: they share the queue through the database.
+"""
+import signal
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from university import jobs
+from university.metrics import registry
+
+CHECK_SECONDS = 60
+
+
+class Command(BaseCommand):
+    help = 'Claim and run queued background jobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queue', action='append', dest='queues',
+                            help='Queue to take jobs from (repeatable; default: "default")')
+        parser.add_argument('--threads', type=int, default=1, help='Jobs run at the same time by this process')
+        parser.add_argument('--poll', type=float, default=1.0, help='Seconds to wait when no job is due')
+        parser.add_argument('--once', action='store_true', help='Exit once no job is due')
+
+    def handle(self, *args, **options):
+        jobs.load_tasks()
+        queues = options['queues'] or ['default']
+        self.stop = threading.Event()
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(signum, self._request_stop)
+
+        self.stdout.write(
+            f"Running jobs of {', '.join(queues)} with {options['threads']} thread(s); "
+            f"tasks: {', '.join(sorted(jobs.TASKS))}"
+        )
+        self._check(queues)
+        threads = [
+            threading.Thread(target=self._work, args=(jobs.worker_name(index), queues, options), daemon=True)
+            for index in range(options['threads'])
+        ]
+        for thread in threads:
+            thread.start()
+
+        next_check = time.monotonic() + CHECK_SECONDS
+        while any(thread.is_alive() for thread in threads):
+            if time.monotonic() >= next_check:
+                self._check(queues)
+                next_check = time.monotonic() + CHECK_SECONDS
+            self.stop.wait(1)
+            for thread in threads:
+                thread.join(0)
+        registry.flush(force=True)
+
+    def _check(self, queues):
+        released = jobs.requeue_stale()
+        if released:
+            self.stdout.write(self.style.WARNING(f'Released {released} timed-out job(s).'))
+        for job in jobs.schedule(queues):
+            self.stdout.write(f'Scheduled {job.task} #{job.pk} for {job.run_at:%Y-%m-%d %H:%M:%S}')
+
+    def _request_stop(self, signum, frame):
+        if self.stop.is_set():
+            raise KeyboardInterrupt
+        self.stdout.write('Stopping after the running jobs (again to abort)...')
+        self.stop.set()
+
+    def _work(self, worker, queues, options):
+        try:
+            while not self.stop.is_set():
+                close_old_connections()
+                job = jobs.claim(worker, queues)
+                if job is None:
+                    if options['once']:
+                        return
+                    self.stop.wait(options['poll'])
+                    continue
+                started = time.perf_counter()
+                outcome = jobs.run(job)
+                self.stdout.write(
+                    f'{worker} {job.task} #{job.pk} {outcome} in {time.perf_counter() - started:.2f}s '
+                    f'(attempt {job.attempts}/{job.max_attempts})'
+                )
+                registry.flush()
+        finally:
+            connections.close_all()
@@ -0,0 +1,403 @@
+"""
+Request and database metrics in Prometheus text format.
+
+MetricsMiddleware records, per route (the URL pattern name, e.g.
+``student-list``):
+
+- http_requests_total{method,route,status}
+- http_request_duration_seconds{method,route}   histogram
+- http_request_db_queries{route}                histogram of queries per request
+- db_queries_total{route} and db_query_seconds_total{route}
+
+Each worker process keeps its values in memory and writes them to its own
+file in METRICS_DIR (``metrics_<pid>_<random id>.json``, a new id per process
+so that a reused pid does not overwrite a dead worker's file) at most every
+METRICS_FLUSH_SECONDS. /metrics adds up the files of all workers, so gunicorn
+can run any number of processes without an external store. It first folds
+the files of this host's workers that have exited into
+``metrics_archive.json``, so the totals survive restarts without the files
+piling up. The files are cumulative: clear METRICS_DIR when the service is
+(re)deployed, not when a single worker restarts.
+
+/metrics answers only to the addresses in METRICS_ALLOWED_IPS.
+"""
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: dead workers' files are kept and summed as they are
+    fcntl = None
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100)
+
+HELP = {
+    'http_requests_total': ('counter', 'Requests by method, route and status code.'),
+    'http_request_duration_seconds': ('histogram', 'Time spent handling a request.'),
+    'http_request_db_queries': ('histogram', 'Database queries per request.'),
+    'db_queries_total': ('counter', 'Database queries executed.'),
+    'db_query_seconds_total': ('counter', 'Time spent in database queries.'),
+    'compression_input_bytes_total': ('counter', 'Response bytes before compression, by encoding.'),
+    'compression_output_bytes_total': ('counter', 'Response bytes after compression, by encoding.'),
+    'compression_seconds_total': ('counter', 'Time spent compressing responses, by encoding.'),
+    'batch_subrequests_total': ('counter', 'Sub-requests of /api/university/batch/ by route and status code.'),
+    'jobs_total': ('counter', 'Background jobs run, by task and outcome (done, retried, failed).'),
+    'job_duration_seconds': ('histogram', 'Time spent running a background job.'),
+}
+
+
+def metrics_dir():
+    return getattr(settings, 'METRICS_DIR', None) or os.path.join(
+        tempfile.gettempdir(), 'university-metrics'
+    )
+
+
+class QueryStats:
+    """
+    Execute wrapper counting and timing queries. Install it on every
+    database connection for the duration of a block with track_queries().
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+# Wrappers of the current request, outermost first. A ContextVar rather than
+# the connections' own execute_wrappers: under ASGI the queries run in
+# sync_to_async threads, with other connection objects, which see it too.
+_query_wrappers = ContextVar('query_wrappers', default=())
+
+
+def _run_query_wrappers(execute, sql, params, many, context):
+    for wrapper in reversed(_query_wrappers.get()):
+        execute = partial(wrapper, execute)
+    return execute(sql, params, many, context)
+
+
+def _install(connection, **kwargs):
+    if _run_query_wrappers not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_run_query_wrappers)
+
+
+# Every connection, in every thread, once it connects
+connection_created.connect(_install, dispatch_uid='university.metrics.track_queries')
+
+
+@contextmanager
+def track_queries(wrapper):
+    """Context manager running ``wrapper`` around the queries of the block."""
+    for alias in connections:
+        # Those of this thread that are already open
+        _install(connections[alias])
+    token = _query_wrappers.set((*_query_wrappers.get(), wrapper))
+    try:
+        yield
+    finally:
+        _query_wrappers.reset(token)
+
+
+class Registry:
+    """This process's counters and histograms, flushed to METRICS_DIR."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._filename = f'metrics_{self._pid}_{uuid.uuid4().hex[:12]}.json'
+        self._counters = defaultdict(float)
+        self._histograms = {}
+        self._last_flush = time.monotonic()
+
+    def _check_fork(self):
+        # Values inherited from a parent process belong to the parent's file
+        if os.getpid() != self._pid:
+            self._reset()
+
+    def inc(self, name, labels, value=1.0):
+        with self._lock:
+            self._check_fork()
+            self._counters[(name, tuple(sorted(labels.items())))] += value
+
+    def observe(self, name, labels, value, buckets):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._check_fork()
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = {
+                    'buckets': list(buckets), 'counts': [0] * len(buckets), 'sum': 0.0, 'count': 0,
+                }
+            for i, bound in enumerate(hist['buckets']):
+                if value <= bound:
+                    hist['counts'][i] += 1
+                    break
+            hist['sum'] += value
+            hist['count'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'host': socket.gethostname(),
+                'pid': self._pid,
+                'counters': [[name, dict(labels), value] for (name, labels), value in self._counters.items()],
+                'histograms': [
+                    [name, dict(labels), dict(hist, counts=list(hist['counts']))]
+                    for (name, labels), hist in self._histograms.items()
+                ],
+            }
+
+    def flush(self, force=False):
+        interval = getattr(settings, 'METRICS_FLUSH_SECONDS', 5)
+        with self._lock:
+            if not force and time.monotonic() - self._last_flush < interval:
+                return
+            self._last_flush = time.monotonic()
+
+        directory = metrics_dir()
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix='.metrics_')
+        with os.fdopen(fd, 'w') as fh:
+            json.dump(self.snapshot(), fh)
+        os.replace(tmp, os.path.join(directory, self._filename))
+
+
+registry = Registry()
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = QueryStats()
+        started = time.perf_counter()
+        with track_queries(stats):
+            response = self.get_response(request)
+        self._record(request, response, stats, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        stats = QueryStats()
+        started = time.perf_counter()
+        with track_queries(stats):
+            response = await self.get_response(request)
+        self._record(request, response, stats, time.perf_counter() - started)
+        return response
+
+    def _record(self, request, response, stats, duration):
+        match = getattr(request, 'resolver_match', None)
+        route = (match.view_name or match.route) if match else 'unmatched'
+
+        registry.inc('http_requests_total', {
+            'method': request.method, 'route': route, 'status': str(response.status_code),
+        })
+        registry.observe('http_request_duration_seconds', {'method': request.method, 'route': route},
+                         duration, DURATION_BUCKETS)
+        registry.observe('http_request_db_queries', {'route': route}, stats.count, QUERY_COUNT_BUCKETS)
+        registry.inc('db_queries_total', {'route': route}, stats.count)
+        registry.inc('db_query_seconds_total', {'route': route}, stats.duration)
+        registry.flush()
+
+
+ARCHIVE = 'metrics_archive.json'
+
+
+def _add(counters, histograms, data):
+    for name, labels, value in data['counters']:
+        counters[(name, tuple(sorted(labels.items())))] += value
+    for name, labels, hist in data['histograms']:
+        key = (name, tuple(sorted(labels.items())))
+        total = histograms.get(key)
+        if total is None:
+            histograms[key] = dict(hist, counts=list(hist['counts']))
+            continue
+        total['counts'] = [a + b for a, b in zip(total['counts'], hist['counts'])]
+        total['sum'] += hist['sum']
+        total['count'] += hist['count']
+
+
+def _read(path):
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def _metric_files(directory):
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    return [name for name in names if name.startswith('metrics_') and name.endswith('.json')]
+
+
+def _exited(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        # Someone else's process
+        pass
+    return False
+
+
+@contextmanager
+def _archive_lock(directory, exclusive=False):
+    """flock() on the archive: shared to read the files, exclusive to fold."""
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, '.archive.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+
+
+def fold_exited_workers(directory):
+    """
+    Add the files of this host's exited workers to the archive and delete
+    them. Returns how many were folded. Another host's workers are left
+    alone: their pids mean nothing here.
+    """
+    if fcntl is None:
+        return 0
+    host = socket.gethostname()
+    exited = []
+    for filename in _metric_files(directory):
+        if filename == ARCHIVE:
+            continue
+        data = _read(os.path.join(directory, filename))
+        if data is not None and data.get('host') == host and 'pid' in data and _exited(data['pid']):
+            exited.append(filename)
+    if not exited:
+        return 0
+
+    # One scraper at a time, so that no file is folded twice
+    with _archive_lock(directory, exclusive=True):
+        counters, histograms = defaultdict(float), {}
+        archive = _read(os.path.join(directory, ARCHIVE))
+        if archive is not None:
+            _add(counters, histograms, archive)
+        folded = []
+        for filename in exited:
+            data = _read(os.path.join(directory, filename))
+            if data is not None:
+                _add(counters, histograms, data)
+                folded.append(filename)
+        if not folded:
+            return 0
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix='.metrics_')
+        with os.fdopen(fd, 'w') as fh:
+            json.dump({
+                'counters': [[name, dict(labels), value] for (name, labels), value in counters.items()],
+                'histograms': [[name, dict(labels), hist] for (name, labels), hist in histograms.items()],
+            }, fh)
+        os.replace(tmp, os.path.join(directory, ARCHIVE))
+        for filename in folded:
+            os.unlink(os.path.join(directory, filename))
+    return len(folded)
+
+
+def collect():
+    """Sum the files of all worker processes, and the archive of exited ones."""
+    counters = defaultdict(float)
+    histograms = {}
+    directory = metrics_dir()
+    fold_exited_workers(directory)
+    # Not while a file moves into the archive: it would be missed or counted twice
+    with _archive_lock(directory):
+        for filename in _metric_files(directory):
+            data = _read(os.path.join(directory, filename))
+            if data is not None:
+                _add(counters, histograms, data)
+    return counters, histograms
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (key, str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+        for key, value in labels
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def render_prometheus(counters, histograms):
+    by_name = defaultdict(list)
+    for (name, labels), value in counters.items():
+        by_name[name].append((labels, value))
+    for (name, labels), hist in histograms.items():
+        by_name[name].append((labels, hist))
+
+    lines = []
+    for name in sorted(by_name):
+        kind, text = HELP.get(name, ('untyped', ''))
+        lines.append(f'# HELP {name} {text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in sorted(by_name[name], key=lambda item: item[0]):
+            if kind != 'histogram':
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(value['buckets'], value['counts']):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(labels + (("le", str(bound)),))} {cumulative}')
+            lines.append(f'{name}_bucket{_format_labels(labels + (("le", "+Inf"),))} {value["count"]}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(value["sum"])}')
+            lines.append(f'{name}_count{_format_labels(labels)} {value["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics(request):
+    allowed = getattr(settings, 'METRICS_ALLOWED_IPS', ['127.0.0.1', '::1'])
+    if request.META.get('REMOTE_ADDR') not in allowed:
+        return HttpResponseForbidden()
+
+    registry.flush(force=True)
+    return HttpResponse(
+        render_prometheus(*collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('university', '0007_security_models_without_user_constraint'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['subject', 'grade'], name='enrollment_subject_grade'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['student', 'enrolled_date'], name='enrollment_student_date'),
+        ),
+    ]
@@ -0,0 +1,141 @@
+from django.db import migrations, models
+
+FTS_TABLE = 'university_search_fts'
+
+SQLITE_CREATE = [
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, body,
+        content='university_searchdocument', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER university_search_ai AFTER INSERT ON university_searchdocument BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+    f"""
+    CREATE TRIGGER university_search_ad AFTER DELETE ON university_searchdocument BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+    END
+    """,
+    f"""
+    CREATE TRIGGER university_search_au AFTER UPDATE ON university_searchdocument BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+]
+
+SQLITE_DROP = [
+    'DROP TRIGGER IF EXISTS university_search_ai',
+    'DROP TRIGGER IF EXISTS university_search_ad',
+    'DROP TRIGGER IF EXISTS university_search_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+POSTGRES_CREATE = [
+    """
+    ALTER TABLE university_searchdocument ADD COLUMN document tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', title), 'A') || setweight(to_tsvector('simple', body), 'B')
+    ) STORED
+    """,
+    'CREATE INDEX university_searchdocument_document ON university_searchdocument USING GIN (document)',
+]
+
+POSTGRES_DROP = [
+    'DROP INDEX IF EXISTS university_searchdocument_document',
+    'ALTER TABLE university_searchdocument DROP COLUMN IF EXISTS document',
+]
+
+
+def _run(schema_editor, statements):
+    connection = schema_editor.connection
+    for sql in statements.get(connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def _allowed(schema_editor):
+    from django.db import router
+    return router.allow_migrate(schema_editor.connection.alias, 'university', model_name='searchdocument')
+
+
+def create_index(apps, schema_editor):
+    if _allowed(schema_editor):
+        _run(schema_editor, {'sqlite': SQLITE_CREATE, 'postgresql': POSTGRES_CREATE})
+
+
+def drop_index(apps, schema_editor):
+    if _allowed(schema_editor):
+        _run(schema_editor, {'sqlite': SQLITE_DROP, 'postgresql': POSTGRES_DROP})
+
+
+def _name(user):
+    return ' '.join(part for part in (user.first_name, user.last_name) if part)
+
+
+def _faculty(faculty):
+    return f'{faculty.get_name_display()} {faculty.name}' if faculty is not None else ''
+
+
+def _join(*parts):
+    return ' '.join(part for part in parts if part)
+
+
+def populate(apps, schema_editor):
+    # Frozen copy of the document builders in university/search.py
+    if not _allowed(schema_editor):
+        return
+    using = schema_editor.connection.alias
+    SearchDocument = apps.get_model('university', 'SearchDocument')
+    documents = []
+    for student in apps.get_model('university', 'Student').objects.using(using).select_related('user', 'faculty'):
+        user = student.user
+        documents.append(SearchDocument(
+            kind='student', object_id=student.pk, title=(_name(user) or user.username)[:255],
+            body=_join(user.username, user.email, student.enrollment_number, _faculty(student.faculty)),
+        ))
+    for professor in apps.get_model('university', 'Professor').objects.using(using).select_related('user', 'faculty'):
+        user = professor.user
+        documents.append(SearchDocument(
+            kind='professor', object_id=professor.pk,
+            title=_join(professor.title, _name(user) or user.username)[:255],
+            body=_join(user.username, user.email, _faculty(professor.faculty)),
+        ))
+    for subject in apps.get_model('university', 'Subject').objects.using(using).select_related('faculty', 'professor__user'):
+        teacher = subject.professor
+        documents.append(SearchDocument(
+            kind='subject', object_id=subject.pk, title=subject.name[:255],
+            body=_join(
+                subject.description, _faculty(subject.faculty),
+                _join(_name(teacher.user), teacher.user.username) if teacher else '',
+            ),
+        ))
+    SearchDocument.objects.using(using).bulk_create(documents, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('university', '0008_enrollment_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=16)),
+                ('object_id', models.BigIntegerField()),
+                ('title', models.CharField(max_length=255)),
+                ('body', models.TextField(blank=True)),
+            ],
+            options={
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+        migrations.RunPython(create_index, drop_index),
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:46
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def _faculty_key(faculty_id):
+    return f'faculty:{"none" if faculty_id is None else faculty_id}'
+
+
+def populate(apps, schema_editor):
+    # Frozen copy of university.counters.recount()
+    using = schema_editor.connection.alias
+    counted = {
+        'students': ('Student', 'faculty_id'),
+        'professors': ('Professor', 'faculty_id'),
+        'subjects': ('Subject', 'faculty_id'),
+        'enrollments': ('Enrollment', 'subject__faculty_id'),
+    }
+    counts = {}
+    for name, (model_name, faculty) in counted.items():
+        objects = apps.get_model('university', model_name).objects.using(using)
+        counts[(name, '')] = objects.count()
+        for faculty_id, count in objects.values_list(faculty).annotate(count=Count('pk')).order_by():
+            counts[(name, _faculty_key(faculty_id))] = count
+    enrollments = apps.get_model('university', 'Enrollment').objects.using(using)
+    for day, count in (
+        enrollments.annotate(day=TruncDate('enrolled_date')).values_list('day').annotate(count=Count('pk')).order_by()
+    ):
+        counts[('enrollments', f'day:{day.isoformat()}')] = count
+    StatCounter = apps.get_model('university', 'StatCounter')
+    StatCounter.objects.using(using).bulk_create(
+        StatCounter(name=name, key=key, value=value) for (name, key), value in counts.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('university', '0010_dataversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=32)),
+                ('key', models.CharField(blank=True, max_length=32)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='statcounter',
+            constraint=models.UniqueConstraint(fields=('name', 'key'), name='statcounter_name_key'),
+        ),
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('university', '0012_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FacultyReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('format', models.CharField(choices=[('json', 'JSON'), ('csv', 'CSV')], max_length=4)),
+                ('data_version', models.PositiveBigIntegerField()),
+                ('content', models.BinaryField(null=True)),
+                ('sha256', models.CharField(blank=True, max_length=64)),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='facultyreport',
+            name='job',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='university.job'),
+        ),
+        migrations.AddConstraint(
+            model_name='facultyreport',
+            constraint=models.UniqueConstraint(fields=('format', 'data_version'), name='facultyreport_format_version'),
+        ),
+    ]
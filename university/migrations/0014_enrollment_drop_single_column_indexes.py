@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('university', '0013_facultyreport'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='enrollment',
+            name='student',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='enrollments', to='university.student'),
+        ),
+        migrations.AlterField(
+            model_name='enrollment',
+            name='subject',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='enrollments', to='university.subject'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('university', '0014_enrollment_drop_single_column_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='statcounter',
+            name='statcounter_name_key',
+        ),
+        migrations.AddField(
+            model_name='statcounter',
+            name='shard',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddConstraint(
+            model_name='statcounter',
+            constraint=models.UniqueConstraint(fields=('name', 'key', 'shard'), name='statcounter_name_key_shard'),
+        ),
+    ]
@@ -1,5 +1,19 @@
-from django.db import models
+from django.db import models, router, transaction
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+
+class AtomicSaveMixin:
+    """
+    Save in a transaction that includes the post_save handlers, which keep
+    the statistics counters (university.counters) in step with the row: if
+    one fails, e.g. on a database lock, the row is not saved either.
+    Deletes already run their handlers inside the delete's transaction.
+    """
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
 
 
 class Faculty(models.Model):
@@ -31,21 +45,21 @@ class Administrator(BaseProfile):
         return f'Administrator: {self.user.username}'
 
 
-class Professor(BaseProfile):
+class Professor(AtomicSaveMixin, BaseProfile):
     title = models.CharField(max_length=50, blank=True)
 
     def __str__(self):
         return f'Professor: {self.user.username}'
 
 
-class Student(BaseProfile):
+class Student(AtomicSaveMixin, BaseProfile):
     enrollment_number = models.CharField(max_length=50, blank=True)
 
     def __str__(self):
         return f'Student: {self.user.username}'
 
 
-class Subject(models.Model):
+class Subject(AtomicSaveMixin, models.Model):
     name = models.CharField(max_length=200)
     faculty = models.ForeignKey(Faculty, on_delete=models.CASCADE, related_name='subjects')
     professor = models.ForeignKey(Professor, on_delete=models.SET_NULL, null=True, related_name='subjects')
@@ -57,10 +71,12 @@ class Subject(models.Model):
         return self.name
 
 
-class Enrollment(models.Model):
+class Enrollment(AtomicSaveMixin, models.Model):
     """Tracks student enrollment in courses."""
-    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='enrollments')
-    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='enrollments')
+    # No single-column indexes: the unique and composite indexes below lead
+    # with these columns, so the planner uses those (and writes stay cheaper)
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='enrollments', db_index=False)
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='enrollments', db_index=False)
     enrolled_date = models.DateTimeField(auto_now_add=True)
     grade = models.CharField(
         max_length=2,
@@ -79,6 +95,132 @@ class Enrollment(models.Model):
 
     class Meta:
         unique_together = ('student', 'subject')
+        indexes = [
+            # university.filters: one course by grade, a student by date
+            models.Index(fields=['subject', 'grade'], name='enrollment_subject_grade'),
+            models.Index(fields=['student', 'enrolled_date'], name='enrollment_student_date'),
+        ]
 
     def __str__(self):
         return f'{self.student.user.username} enrolled in {self.subject.name}'
+
+
+class SearchDocument(models.Model):
+    """
+    Searchable text of a student, professor or subject, kept up to date by
+    university.signals. The full-text index over it (FTS5 on SQLite, a
+    tsvector column on PostgreSQL) is created in migration 0009; see
+    university/search.py.
+    """
+    kind = models.CharField(max_length=16)
+    object_id = models.BigIntegerField()
+    title = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+
+    class Meta:
+        unique_together = ('kind', 'object_id')
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id}: {self.title}'
+
+
+class DataVersion(models.Model):
+    """
+    A counter bumped whenever the data behind a cached result changes;
+    caches key their entries by it (university.versions).
+    """
+    name = models.CharField(max_length=64, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.name} v{self.version}'
+
+
+class StatCounter(models.Model):
+    """
+    A share of a maintained count behind the administrator statistics
+    (university.counters): ``name`` is what is counted, ``key`` the slice
+    (empty for the total, ``faculty:<id>``, ``day:<date>``). The count is
+    the sum of its ``shard`` rows.
+    """
+    name = models.CharField(max_length=32)
+    key = models.CharField(max_length=32, blank=True)
+    shard = models.PositiveSmallIntegerField(default=0)
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['name', 'key', 'shard'], name='statcounter_name_key_shard'),
+        ]
+
+    def __str__(self):
+        return f'{self.name}[{self.key}#{self.shard}] = {self.value}'
+
+
+class Job(models.Model):
+    """
+    A unit of background work, run by ``manage.py run_jobs`` (university.jobs).
+    ``task`` names a function registered with ``@jobs.task``, called with
+    ``kwargs``; it is claimed once ``run_at`` has passed.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    task = models.CharField(max_length=100)
+    queue = models.CharField(max_length=32, default='default')
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    priority = models.SmallIntegerField(default=0, help_text='Lower runs first')
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    worker = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The claim query: queued jobs of a queue, due first
+            models.Index(fields=['status', 'queue', 'priority', 'run_at'], name='job_claim'),
+            models.Index(fields=['task', 'status'], name='job_task_status'),
+        ]
+
+    def __str__(self):
+        return f'{self.task} #{self.pk} ({self.status})'
+
+
+class FacultyReport(models.Model):
+    """
+    A generated per-faculty report (university.reports) for one data
+    version, in one format. ``content`` is set, with its SHA-256, once the
+    job building it has finished.
+    """
+    FORMAT_CHOICES = [('json', 'JSON'), ('csv', 'CSV')]
+
+    format = models.CharField(max_length=4, choices=FORMAT_CHOICES)
+    data_version = models.PositiveBigIntegerField()
+    job = models.ForeignKey(Job, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    content = models.BinaryField(null=True, editable=False)
+    sha256 = models.CharField(max_length=64, blank=True)
+    size = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['format', 'data_version'], name='facultyreport_format_version'),
+        ]
+
+    def __str__(self):
+        return f'Faculty report v{self.data_version} ({self.format})'
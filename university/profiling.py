@@ -0,0 +1,206 @@
+"""
+On-demand profiling of a single request.
+
+An administrator adds ``X-Profile: 1`` or ``?profile=1`` to any request and
+gets back, instead of the normal response, a text report with:
+
+- status, wall time and query count of the profiled request
+- a call tree (time per caller/callee edge, branches under 1% pruned)
+- the top functions by cumulative and by own time
+
+``X-Profile: tottime`` (or ``calls``) changes the sort of the flat listing.
+The raw profile is also written to PROFILE_DIR as a .prof file, for
+``python -m pstats`` or snakeviz, next to the text report.
+
+Requests without the header/parameter pass straight through. Requests from
+anyone failing IsAdministrator run normally and unprofiled. The user is
+authenticated with the configured DRF authentication classes (JWT header or
+cookie) or the Django session, without changing ``request.user``.
+
+Under ASGI only the event loop's thread is profiled: work the view runs
+through sync_to_async appears as the time spent awaiting it.
+"""
+import cProfile
+import io
+import os
+import pstats
+import re
+import tempfile
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.settings import api_settings
+
+from .metrics import QueryStats, track_queries
+
+SORT_KEYS = {'cumulative', 'tottime', 'calls'}
+
+
+def profile_dir():
+    return getattr(settings, 'PROFILE_DIR', None) or os.path.join(
+        tempfile.gettempdir(), 'university-profiles'
+    )
+
+
+def _requested(request):
+    value = request.META.get('HTTP_X_PROFILE')
+    if value is None and 'profile=' in request.META.get('QUERY_STRING', ''):
+        value = request.GET.get('profile')
+    if value and value.lower() not in ('0', 'false', 'no'):
+        return value.lower()
+    return None
+
+
+def _authenticated_user(request):
+    for authenticator_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        try:
+            result = authenticator_class().authenticate(request)
+        except (AuthenticationFailed, AttributeError):
+            # AttributeError: authenticators that need a DRF Request
+            continue
+        if result is not None:
+            return result[0]
+    return getattr(request, 'user', None)
+
+
+def _is_administrator(request):
+    from .views import IsAdministrator
+
+    user = _authenticated_user(request)
+    return bool(user) and IsAdministrator().has_permission(SimpleNamespace(user=user), None)
+
+
+def _label(func):
+    filename, lineno, name = func
+    if filename == '~':
+        return name  # built-in
+    base_dir = str(settings.BASE_DIR)
+    if filename.startswith(base_dir):
+        filename = os.path.relpath(filename, base_dir)
+    elif 'site-packages' in filename:
+        filename = filename.split('site-packages' + os.sep, 1)[1]
+    return f'{filename}:{lineno}({name})'
+
+
+def call_tree(stats, min_fraction=0.01, max_depth=30):
+    """
+    Render cProfile's caller/callee edges as an indented tree, starting from
+    the functions that were called directly while profiling was enabled.
+    cProfile keeps one level of callers only, so a deep node's time covers
+    all calls of that caller/callee pair, not just the branch shown.
+    """
+    callees = {}
+    roots = []
+    for func, (_, _, _, cumulative, callers) in stats.stats.items():
+        if not callers:
+            roots.append((cumulative, func))
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((edge[3], edge[1], func))
+
+    total = sum(cumulative for cumulative, _ in roots) or 1.0
+    lines = []
+
+    def walk(func, cumulative, calls, depth, path):
+        lines.append(
+            f'{cumulative * 1000:9.1f} ms {cumulative / total:6.1%} {calls:>6}  '
+            f'{"  " * depth}{_label(func)}'
+        )
+        if depth >= max_depth:
+            return
+        for child_cumulative, child_calls, child in sorted(callees.get(func, ()), reverse=True):
+            if child_cumulative / total < min_fraction or child in path:
+                continue
+            walk(child, child_cumulative, child_calls, depth + 1, path | {child})
+
+    for cumulative, root in sorted(roots, reverse=True):
+        if cumulative / total >= min_fraction:
+            walk(root, cumulative, stats.stats[root][1], 0, {root})
+    return '\n'.join(lines)
+
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        sort = _requested(request)
+        if sort is None or not _is_administrator(request):
+            return self.get_response(request)
+        if sort not in SORT_KEYS:
+            sort = 'cumulative'
+
+        profiler = cProfile.Profile()
+        queries = QueryStats()
+        started = time.perf_counter()
+        with track_queries(queries):
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        elapsed = time.perf_counter() - started
+
+        return self._report(request, response, profiler, queries, elapsed, sort)
+
+    async def __acall__(self, request):
+        sort = _requested(request)
+        if sort is None or not await sync_to_async(_is_administrator)(request):
+            return await self.get_response(request)
+        if sort not in SORT_KEYS:
+            sort = 'cumulative'
+
+        profiler = cProfile.Profile()
+        queries = QueryStats()
+        started = time.perf_counter()
+        with track_queries(queries):
+            profiler.enable()
+            try:
+                response = await self.get_response(request)
+            finally:
+                profiler.disable()
+        elapsed = time.perf_counter() - started
+
+        return await sync_to_async(self._report)(request, response, profiler, queries, elapsed, sort)
+
+    def _report(self, request, response, profiler, queries, elapsed, sort):
+        stats = pstats.Stats(profiler)
+
+        out = io.StringIO()
+        out.write(f'{request.method} {request.get_full_path()}\n')
+        out.write(
+            f'status {response.status_code}, {elapsed * 1000:.1f} ms, '
+            f'{queries.count} queries in {queries.duration * 1000:.1f} ms\n\n'
+        )
+        out.write('Call tree (ms, share, calls):\n')
+        out.write(call_tree(stats) + '\n\n')
+        out.write(f'Top functions by {sort}:\n')
+        stats.stream = out
+        stats.sort_stats(sort).print_stats(40)
+        report = out.getvalue()
+
+        directory = profile_dir()
+        os.makedirs(directory, exist_ok=True)
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', request.path).strip('-') or 'root'
+        base = os.path.join(directory, f'{datetime.now():%Y%m%d-%H%M%S-%f}-{request.method}-{slug}')
+        stats.dump_stats(base + '.prof')
+        with open(base + '.txt', 'w') as fh:
+            fh.write(report)
+
+        profiled = HttpResponse(report, content_type='text/plain; charset=utf-8')
+        profiled['X-Profile-File'] = os.path.basename(base) + '.prof'
+        profiled['X-Profile-Original-Status'] = str(response.status_code)
+        profiled['Cache-Control'] = 'no-store'
+        return profiled
@@ -0,0 +1,88 @@
+"""
+JSON renderer and parser backed by orjson, with DRF's output semantics.
+
+FastJSONRenderer produces the same bytes as rest_framework's JSONRenderer:
+compact separators, UTF-8, datetimes/dates/times, Decimal, UUID and lazy
+translation strings converted by DRF's own encoder, and U+2028/U+2029
+escaped. It hands over to the stdlib renderer when:
+
+- orjson is not installed
+- an indented response is requested (``Accept: application/json; indent=4``,
+  the browsable API), or UNICODE_JSON/COMPACT_JSON are turned off
+- orjson rejects the data, e.g. an integer beyond 64 bits
+
+FastJSONParser parses UTF-8 request bodies with orjson and leaves anything
+orjson rejects to the stdlib parser, so errors and edge cases behave as
+before.
+
+Two differences remain, neither reachable through the university
+serializers: a NaN or infinite float renders as ``null`` where DRF
+(STRICT_JSON) fails the request, and floats that need an exponent are
+written as ``1e-7`` rather than ``1e-07`` (same value).
+
+``manage.py bench_json`` compares both for 1k and 10k row payloads.
+"""
+import codecs
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders, json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+if orjson is not None:
+    # Datetimes go through DRF's encoder ("Z" suffix, microseconds kept)
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+else:
+    ORJSON_OPTIONS = 0
+
+_encoder = encoders.JSONEncoder()
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=_encoder.default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same escaping as JSONRenderer, see there
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict or codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            pass
+
+        # Let the stdlib decide, so accepted input and error messages match
+        try:
+            return json.loads(body.decode(encoding))
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
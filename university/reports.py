@@ -0,0 +1,262 @@
+"""
+Per-faculty reports for administrators: enrollment counts, grade
+distributions and professor load.
+
+    POST /api/university/reports/faculties/<json|csv>/            request one
+    GET  /api/university/reports/faculties/<json|csv>/            its status
+    GET  /api/university/reports/faculties/<json|csv>/download/   the file
+
+A report is built by the ``build_faculty_report`` job (university.tasks, on
+the ``reports`` queue), never inside a request. The job computes one section
+per faculty, each in its own process (FACULTY_REPORT_PROCESSES), and stores
+the rendered file on a FacultyReport row with its SHA-256, which is also its
+ETag.
+
+Reports are kept per data version (university.versions, VERSION_NAME), which
+the signal handlers bump whenever faculties, subjects, profiles, names or
+enrollments (grades included) change. A report is served as current until
+then; requesting one after a change queues a new build, and the status
+still points at the newest finished report (``latest``) meanwhile.
+
+The sections are read in separate transactions, so the job reads the
+version before and after building them and builds again if it changed
+(build_snapshot): the stored report then holds data of the single version
+it is stored under, which is the newer one if the data changed between the
+request and the build.
+"""
+import csv
+import hashlib
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.urls import reverse
+from django.utils import timezone
+
+from . import jobs, versions
+from .models import Enrollment, Faculty, FacultyReport, Job, Professor, Student, Subject
+from .renderers import FastJSONRenderer
+
+VERSION_NAME = versions.FACULTY_REPORTS
+
+# Builds before giving up on data that keeps changing; the job retries later
+BUILD_ATTEMPTS = 3
+
+GRADES = ['A', 'B', 'C', 'D', 'F']
+
+CONTENT_TYPES = {'json': 'application/json', 'csv': 'text/csv; charset=utf-8'}
+
+CSV_HEADER = [
+    'faculty_id', 'faculty', 'subject_id', 'subject', 'professor', 'max_students', 'enrollments',
+    *GRADES, 'ungraded', 'average_score',
+]
+
+
+def _grades():
+    return {**dict.fromkeys(GRADES, 0), 'ungraded': 0}
+
+
+def _average(total, count):
+    return round(total / count, 2) if count else None
+
+
+def _full_name(username, first_name, last_name):
+    return f'{first_name} {last_name}'.strip() or username
+
+
+def faculty_section(faculty_id):
+    """The report of one faculty, in five queries."""
+    faculty = Faculty.objects.get(pk=faculty_id)
+    professors = {
+        pk: {
+            'id': pk, 'username': username, 'name': _full_name(username, first_name, last_name),
+            'subjects': 0, 'enrollments': 0, 'ungraded': 0,
+        }
+        for pk, username, first_name, last_name in (
+            Professor.objects.filter(Q(faculty_id=faculty_id) | Q(subjects__faculty_id=faculty_id)).distinct()
+            .order_by('pk').values_list('pk', 'user__username', 'user__first_name', 'user__last_name')
+        )
+    }
+    subjects = {}
+    for pk, name, professor_id, max_students in (
+        Subject.objects.filter(faculty_id=faculty_id).order_by('pk')
+        .values_list('pk', 'name', 'professor_id', 'max_students')
+    ):
+        subjects[pk] = {
+            'id': pk, 'name': name, 'professor': professor_id, 'max_students': max_students,
+            'enrollments': 0, 'grades': _grades(), 'average_score': None,
+            '_score_sum': 0.0, '_scored': 0,
+        }
+        if professor_id in professors:
+            professors[professor_id]['subjects'] += 1
+
+    grades, score_sum, scored = _grades(), 0.0, 0
+    for subject_id, grade, count, subject_score_sum, subject_scored in (
+        Enrollment.objects.filter(subject__faculty_id=faculty_id).values_list('subject_id', 'grade')
+        .annotate(count=Count('pk'), score_sum=Sum('score'), scored=Count('score')).order_by()
+    ):
+        grade = grade or 'ungraded'
+        subject = subjects[subject_id]
+        subject['enrollments'] += count
+        subject['grades'][grade] += count
+        subject['_score_sum'] += subject_score_sum or 0
+        subject['_scored'] += subject_scored
+        grades[grade] += count
+        score_sum += subject_score_sum or 0
+        scored += subject_scored
+        professor = professors.get(subject['professor'])
+        if professor is not None:
+            professor['enrollments'] += count
+            if grade == 'ungraded':
+                professor['ungraded'] += count
+
+    for subject in subjects.values():
+        subject['average_score'] = _average(subject.pop('_score_sum'), subject.pop('_scored'))
+
+    return {
+        'faculty': faculty.pk,
+        'name': str(faculty),
+        'students': Student.objects.filter(faculty_id=faculty_id).count(),
+        'professors': len(professors),
+        'subjects': len(subjects),
+        'enrollments': sum(grades.values()),
+        'grades': grades,
+        'average_score': _average(score_sum, scored),
+        'by_subject': list(subjects.values()),
+        'by_professor': list(professors.values()),
+    }
+
+
+def build_sections(faculty_ids, processes=None):
+    """faculty_section() of each faculty, spread over a process pool."""
+    if processes is None:
+        processes = getattr(settings, 'FACULTY_REPORT_PROCESSES', 1)
+    processes = min(processes, len(faculty_ids))
+    if processes <= 1:
+        return [faculty_section(faculty_id) for faculty_id in faculty_ids]
+    # spawn, not fork: a forked child would share this process's database
+    # connections (and those of the worker's other threads). The initializer
+    # is django.setup itself: this module cannot be imported before it.
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context, initializer=django.setup) as pool:
+        return list(pool.map(faculty_section, faculty_ids))
+
+
+class DataChanged(Exception):
+    pass
+
+
+def build_snapshot(processes=None):
+    """
+    ``(version, faculty_ids, sections)`` of a build during which the version
+    did not change: no write that bumps it committed meanwhile, so the
+    sections agree with each other and with the version.
+    """
+    for _ in range(BUILD_ATTEMPTS):
+        version = versions.current(VERSION_NAME)
+        faculty_ids = list(Faculty.objects.order_by('pk').values_list('pk', flat=True))
+        sections = build_sections(faculty_ids, processes)
+        if versions.current(VERSION_NAME) == version:
+            return version, faculty_ids, sections
+    raise DataChanged(f'The data changed during each of {BUILD_ATTEMPTS} builds')
+
+
+def render(format, version, sections):
+    """
+    The report file as bytes. Nothing time-dependent goes in, so the same
+    data and version always give the same file and SHA-256.
+    """
+    if format == 'json':
+        return FastJSONRenderer().render({'version': version, 'faculties': sections})
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(CSV_HEADER)
+    for section in sections:
+        professors = {professor['id']: professor['name'] for professor in section['by_professor']}
+        for subject in section['by_subject']:
+            writer.writerow([
+                section['faculty'], section['name'], subject['id'], subject['name'],
+                professors.get(subject['professor'], ''), subject['max_students'], subject['enrollments'],
+                *(subject['grades'][grade] for grade in GRADES), subject['grades']['ungraded'],
+                '' if subject['average_score'] is None else subject['average_score'],
+            ])
+    return out.getvalue().encode()
+
+
+def generate(report_id, processes=None):
+    """Build and store the content of a FacultyReport (the job's work)."""
+    report = FacultyReport.objects.filter(pk=report_id).only('format', 'data_version', 'finished_at').first()
+    if report is None or report.finished_at is not None:
+        # Superseded by a newer report and deleted, or built by an older
+        # report's job, meanwhile
+        return {'report': report_id, 'skipped': True}
+    version, faculty_ids, sections = build_snapshot(processes)
+    content = render(report.format, version, sections)
+    digest = hashlib.sha256(content).hexdigest()
+    with transaction.atomic():
+        if version != report.data_version:
+            # The data changed after the request: this is the newer version's report
+            report, _ = FacultyReport.objects.get_or_create(format=report.format, data_version=version)
+        FacultyReport.objects.filter(pk=report.pk).update(
+            content=content, sha256=digest, size=len(content), finished_at=timezone.now(),
+        )
+        # Older versions can no longer be current; keep only this one
+        FacultyReport.objects.filter(format=report.format, data_version__lt=version).delete()
+    return {
+        'report': report.pk, 'version': version, 'faculties': len(faculty_ids),
+        'sha256': digest, 'size': len(content),
+    }
+
+
+def request(format):
+    """
+    The report of the current data version, queueing its build unless it
+    is done or already queued (or failed: then it is queued again).
+    """
+    version = versions.current(VERSION_NAME)
+    with transaction.atomic():
+        report, created = FacultyReport.objects.select_related('job').get_or_create(
+            format=format, data_version=version,
+        )
+        failed = report.finished_at is None and (report.job is None or report.job.status == Job.FAILED)
+        if created or failed:
+            report.job = jobs.enqueue('build_faculty_report', report_id=report.pk)
+            report.save(update_fields=['job'])
+    return report
+
+
+def _describe(report):
+    return {
+        'version': report.data_version,
+        'sha256': report.sha256,
+        'size': report.size,
+        'generated_at': report.finished_at,
+        'download': reverse('faculty-report-download', args=[report.format]) + f'?version={report.data_version}',
+    }
+
+
+def status(format):
+    """Where the current report stands, and the newest finished one."""
+    version = versions.current(VERSION_NAME)
+    reports = {
+        report.data_version: report
+        for report in FacultyReport.objects.filter(format=format).select_related('job')
+        .defer('content').order_by('-data_version')
+    }
+    current = reports.get(version)
+    if current is None:
+        state = 'missing'
+    elif current.finished_at is not None:
+        state = 'ready'
+    else:
+        state = current.job.status if current.job is not None else Job.FAILED
+    latest = next((report for report in reports.values() if report.finished_at is not None), None)
+    data = {'format': format, 'version': version, 'status': state}
+    if state == Job.FAILED and current.job is not None:
+        data['error'] = (current.job.error.strip().splitlines() or [''])[-1]
+    data['latest'] = _describe(latest) if latest is not None else None
+    return data
@@ -0,0 +1,208 @@
+"""
+Database routing for the university app.
+
+PrimaryReplicaRouter sends every write to the primary (``default``). Reads go
+to the replica only while a view has opted in through ReplicaReadMixin, which
+does so for safe (GET/HEAD/OPTIONS) requests. After a successful write the
+user is pinned to the primary for REPLICA_STICKY_SECONDS so they read their
+own changes, e.g. a professor reloading the grade they just entered. The pin
+is a short-lived signed cookie on the write's response, so it holds whichever
+worker or server handles the next read; clients that drop cookies are not
+pinned.
+
+Without a ``replica`` entry in DATABASES, or while the replica cannot be
+reached, every read falls back to the primary.
+
+SecurityRouter optionally moves the auth/audit models (token blacklist,
+sessions, login attempts, security events) to their own ``security``
+database so login traffic does not compete with grade updates for the same
+SQLite write lock. List it before PrimaryReplicaRouter in DATABASE_ROUTERS
+and create its tables with ``manage.py migrate --database=security``.
+"""
+import os
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core import signing
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework.permissions import SAFE_METHODS
+
+
+REPLICA_DB_ALIAS = 'replica'
+SECURITY_DB_ALIAS = 'security'
+
+# Authentication and audit data: never read stale, optionally stored apart
+SECURITY_MODELS = {
+    'university.TokenBlacklist',
+    'university.UserSession',
+    'university.LoginAttempt',
+    'university.SecurityEvent',
+}
+_SECURITY_MODEL_NAMES = {label.split('.')[1].lower() for label in SECURITY_MODELS}
+
+_read_from_replica = ContextVar('read_from_replica', default=False)
+_replica_down_until = 0.0
+
+
+def replica_available():
+    """True if a replica is configured and answered the last time we asked."""
+    global _replica_down_until
+
+    if REPLICA_DB_ALIAS not in settings.DATABASES:
+        return False
+    if time.monotonic() < _replica_down_until:
+        return False
+
+    conn = connections[REPLICA_DB_ALIAS]
+    name = str(conn.settings_dict['NAME'])
+    if conn.vendor == 'sqlite' and not name.startswith(('file:', ':memory:')):
+        # sqlite3.connect() would silently create an empty file
+        if not os.path.exists(name):
+            return False
+
+    if conn.connection is None:
+        try:
+            conn.ensure_connection()
+        except DatabaseError:
+            _replica_down_until = time.monotonic() + getattr(settings, 'REPLICA_RETRY_SECONDS', 30)
+            return False
+    return True
+
+
+PIN_COOKIE = 'replica_pin'
+_PIN_SALT = 'university.routers.replica-pin'
+
+
+def _sticky_seconds():
+    return getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+
+
+def pin_to_primary(request, response, user):
+    """Send this user's reads to the primary for the stickiness window."""
+    response.set_cookie(
+        PIN_COOKIE,
+        signing.dumps(user.pk, salt=_PIN_SALT),
+        max_age=_sticky_seconds(),
+        httponly=True,
+        secure=not request.scheme == 'http',
+        samesite='Strict',
+        path='/',
+    )
+
+
+def is_pinned(request):
+    user = request.user
+    value = request.COOKIES.get(PIN_COOKIE)
+    if not (value and user and user.is_authenticated):
+        return False
+    try:
+        # max_age: the cookie's own expiry is up to the client
+        return signing.loads(value, salt=_PIN_SALT, max_age=_sticky_seconds()) == user.pk
+    except signing.BadSignature:
+        return False
+
+
+class ReplicaReadMixin:
+    """
+    APIView mixin: run the ORM reads of safe requests against the replica and
+    pin the user to the primary after a successful write.
+    """
+    _reading_replica = False
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            request.method in SAFE_METHODS
+            and not is_pinned(request)
+            and replica_available()
+        ):
+            self._reading_replica = True
+            _read_from_replica.set(True)
+
+    def dispatch(self, request, *args, **kwargs):
+        # Cleared here rather than in finalize_response(), which an exception
+        # DRF re-raises skips: the thread's next request, whatever its view,
+        # would otherwise keep reading from the replica.
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            self.stop_reading_replica()
+
+    def stop_reading_replica(self):
+        """End the replica reads started by initial(); for callers that bypass dispatch()."""
+        if self._reading_replica:
+            _read_from_replica.set(False)
+            self._reading_replica = False
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                pin_to_primary(request, response, user)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class PrimaryReplicaRouter:
+    """Writes to the primary; opted-in reads to the replica."""
+
+    def db_for_read(self, model, **hints):
+        if _read_from_replica.get() and model._meta.label not in SECURITY_MODELS:
+            return REPLICA_DB_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {DEFAULT_DB_ALIAS, REPLICA_DB_ALIAS}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica is a copy of the primary and is never migrated directly
+        if db == REPLICA_DB_ALIAS:
+            return False
+        return None
+
+
+class SecurityRouter:
+    """Keep the security models in DATABASES['security'] when it exists."""
+
+    def _enabled(self):
+        return SECURITY_DB_ALIAS in settings.DATABASES
+
+    def _route(self, model, hints):
+        if not self._enabled():
+            return None
+        if model._meta.label in SECURITY_MODELS:
+            return SECURITY_DB_ALIAS
+        # e.g. UserSession.user: Django would otherwise look the user up in
+        # the database the session came from.
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db == SECURITY_DB_ALIAS:
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._route(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._route(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Sessions and events point at users across databases; the foreign
+        # keys have no DB-level constraint for exactly this reason.
+        if SECURITY_MODELS & {obj1._meta.label, obj2._meta.label}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if not self._enabled():
+            return None
+        if app_label == 'university' and model_name in _SECURITY_MODEL_NAMES:
+            return db == SECURITY_DB_ALIAS
+        if db == SECURITY_DB_ALIAS:
+            return False
+        return None
@@ -3,7 +3,6 @@ Token Security Models - For tracking token blacklists and user sessions
 """
 from django.conf import settings
 from django.db import models
-from django.contrib.auth.models import User
 from django.utils import timezone
 from datetime import timedelta
 
@@ -43,7 +42,13 @@ class TokenBlacklist(models.Model):
 
 class UserSession(models.Model):
     """Track active user sessions for security monitoring"""
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sessions')
+    # No DB-level constraint or cascade: these rows may live in the separate
+    # 'security' database (see university/routers.py). Deleting a user
+    # removes them through university/signals.py instead.
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.DO_NOTHING, db_constraint=False,
+        related_name='sessions',
+    )
     token_jti = models.CharField(max_length=255, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
     last_activity = models.DateTimeField(auto_now=True)
@@ -129,7 +134,11 @@ class LoginAttempt(models.Model):
 
 class SecurityEvent(models.Model):
     """Log security-related events"""
-    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    # See UserSession.user
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.DO_NOTHING, db_constraint=False,
+        null=True, blank=True,
+    )
     event_type = models.CharField(
         max_length=50,
         choices=[
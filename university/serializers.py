@@ -1,15 +1,16 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from . import models
+from .fieldsets import FieldsetSerializerMixin
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(FieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'username', 'email')
 
 
-class UserCreateSerializer(serializers.ModelSerializer):
+class UserCreateSerializer(FieldsetSerializerMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
 
     class Meta:
@@ -24,37 +25,40 @@ class UserCreateSerializer(serializers.ModelSerializer):
         return user
 
 
-class FacultySerializer(serializers.ModelSerializer):
+class FacultySerializer(FieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = models.Faculty
         fields = ('id', 'name')
 
 
-class AdministratorSerializer(serializers.ModelSerializer):
+class AdministratorSerializer(FieldsetSerializerMixin, serializers.ModelSerializer):
     user = UserCreateSerializer()
 
     class Meta:
         model = models.Administrator
         fields = ('id', 'user', 'faculty', 'office')
+        expandable_fields = {'faculty': FacultySerializer}
 
 
-class ProfessorSerializer(serializers.ModelSerializer):
+class ProfessorSerializer(FieldsetSerializerMixin, serializers.ModelSerializer):
     user = UserCreateSerializer()
 
     class Meta:
         model = models.Professor
         fields = ('id', 'user', 'faculty', 'title')
+        expandable_fields = {'faculty': FacultySerializer}
 
 
-class StudentSerializer(serializers.ModelSerializer):
+class StudentSerializer(FieldsetSerializerMixin, serializers.ModelSerializer):
     user = UserCreateSerializer()
 
     class Meta:
         model = models.Student
         fields = ('id', 'user', 'faculty', 'enrollment_number')
+        expandable_fields = {'faculty': FacultySerializer}
 
 
-class SubjectSerializer(serializers.ModelSerializer):
+class SubjectSerializer(FieldsetSerializerMixin, serializers.ModelSerializer):
     professor = ProfessorSerializer(read_only=True)
     students = StudentSerializer(read_only=True, many=True)
     professor_id = serializers.PrimaryKeyRelatedField(queryset=models.Professor.objects.all(), write_only=True, required=False)
@@ -63,6 +67,7 @@ class SubjectSerializer(serializers.ModelSerializer):
     class Meta:
         model = models.Subject
         fields = ('id', 'name', 'faculty', 'professor', 'students', 'description', 'professor_id', 'student_ids')
+        expandable_fields = {'faculty': FacultySerializer}
 
     def create(self, validated_data):
         professor = validated_data.pop('professor_id', None)
@@ -144,7 +149,7 @@ class StudentCreateUpdateSerializer(StudentSerializer):
             user.save()
         return super().update(instance, validated_data)
 
-class EnrollmentSerializer(serializers.ModelSerializer):
+class EnrollmentSerializer(FieldsetSerializerMixin, serializers.ModelSerializer):
     student_username = serializers.CharField(source='student.user.username', read_only=True)
     subject_name = serializers.CharField(source='subject.name', read_only=True)
     professor_name = serializers.CharField(source='subject.professor.user.first_name', read_only=True)
@@ -152,9 +157,10 @@ class EnrollmentSerializer(serializers.ModelSerializer):
     class Meta:
         model = models.Enrollment
         fields = ('id', 'student', 'student_username', 'subject', 'subject_name', 'professor_name', 'enrolled_date', 'grade', 'score')
+        expandable_fields = {'student': StudentSerializer, 'subject': SubjectSerializer}
 
 
-class EnrollmentDetailSerializer(serializers.ModelSerializer):
+class EnrollmentDetailSerializer(FieldsetSerializerMixin, serializers.ModelSerializer):
     """Detailed enrollment with full nested objects."""
     student = StudentSerializer(read_only=True)
     subject = SubjectSerializer(read_only=True)
@@ -0,0 +1,157 @@
+"""
+``Server-Timing`` response headers.
+
+With SERVER_TIMING enabled every response carries, e.g.:
+
+    Server-Timing: auth;dur=3.1, perm;dur=0.4, serialize;dur=12.8,
+                   db;dur=6.2;desc="14 queries", render;dur=1.9, total;dur=27.5
+
+- auth       DRF authentication (JWTAuthentication / CookieJWTAuthentication)
+- perm       permission and object permission checks
+- serialize  serializer ``.data``, including lazily loaded related rows
+- db         all queries of the request, with their number
+- render     response rendering (JSON encoding)
+- total      the request from this middleware's point of view
+
+Phases overlap where one includes queries (auth loads the user, serialize
+follows foreign keys), so they do not add up to ``total``. auth, perm and
+serialize come from ServerTimingMixin and appear on views that use it.
+
+Browsers show the header in the network panel's Timing tab. For the React
+app on another origin, Timing-Allow-Origin and Access-Control-Expose-Headers
+make it visible to devtools and to ``response.headers``.
+"""
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .metrics import QueryStats, track_queries
+
+
+class ServerTiming:
+    """Durations collected for one request."""
+
+    def __init__(self):
+        self.phases = {}
+
+    def add(self, name, duration, desc=None):
+        entry = self.phases.setdefault(name, [0.0, None])
+        entry[0] += duration
+        if desc is not None:
+            entry[1] = desc
+
+    @contextmanager
+    def measure(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def header(self):
+        parts = []
+        for name, (duration, desc) in self.phases.items():
+            part = f'{name};dur={duration * 1000:.1f}'
+            if desc:
+                part += f';desc="{desc}"'
+            parts.append(part)
+        return ', '.join(parts)
+
+
+def get_timing(request):
+    """The ServerTiming of a Django or DRF request, or None when disabled."""
+    return getattr(getattr(request, '_request', request), 'server_timing', None)
+
+
+def _timed(timing, to_representation):
+    def timed(instance):
+        with timing.measure('serialize'):
+            return to_representation(instance)
+    return timed
+
+
+class ServerTimingMixin:
+    """APIView mixin adding auth, perm and serialize phases."""
+
+    def perform_authentication(self, request):
+        timing = get_timing(request)
+        if timing is None:
+            return super().perform_authentication(request)
+        with timing.measure('auth'):
+            return super().perform_authentication(request)
+
+    def check_permissions(self, request):
+        timing = get_timing(request)
+        if timing is None:
+            return super().check_permissions(request)
+        with timing.measure('perm'):
+            return super().check_permissions(request)
+
+    def check_object_permissions(self, request, obj):
+        timing = get_timing(request)
+        if timing is None:
+            return super().check_object_permissions(request, obj)
+        with timing.measure('perm'):
+            return super().check_object_permissions(request, obj)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        timing = get_timing(self.request)
+        if timing is not None:
+            # .data (ListSerializer's included) renders through this one call;
+            # nested and child serializers are other instances, not timed twice
+            serializer.to_representation = _timed(timing, serializer.to_representation)
+        return serializer
+
+
+class ServerTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SERVER_TIMING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timing = request.server_timing = ServerTiming()
+        queries = QueryStats()
+        started = time.perf_counter()
+        with track_queries(queries):
+            response = self.get_response(request)
+        return self._finish(request, response, timing, queries, started)
+
+    async def __acall__(self, request):
+        timing = request.server_timing = ServerTiming()
+        queries = QueryStats()
+        started = time.perf_counter()
+        with track_queries(queries):
+            response = await self.get_response(request)
+        return self._finish(request, response, timing, queries, started)
+
+    def _finish(self, request, response, timing, queries, started):
+        timing.add('db', queries.duration, f'{queries.count} queries')
+        timing.add('total', time.perf_counter() - started)
+
+        response['Server-Timing'] = timing.header()
+        origin = request.headers.get('Origin')
+        if origin and origin in getattr(settings, 'CORS_ALLOWED_ORIGINS', ()):
+            response['Timing-Allow-Origin'] = origin
+        return response
+
+    def process_template_response(self, request, response):
+        # Called right before the handler renders a DRF Response
+        started = time.perf_counter()
+        timing = request.server_timing
+        response.add_post_render_callback(
+            lambda rendered: timing.add('render', time.perf_counter() - started)
+        )
+        return response
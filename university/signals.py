@@ -0,0 +1,273 @@
+"""
+Signal handlers for the university app. Connected in UniversityConfig.ready().
+"""
+from django.contrib.auth.models import User
+from django.db.models import Sum
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.utils import timezone
+from django.dispatch import receiver
+
+from . import counters, search, typeahead, versions
+from .models import Enrollment, Faculty, Professor, StatCounter, Student, Subject
+from .security_models import SecurityEvent, UserSession
+
+
+@receiver(pre_delete, sender=User)
+def delete_security_records(sender, instance, **kwargs):
+    """
+    Cascade a user's deletion to their sessions and security events.
+
+    Those foreign keys have no database-level cascade because the rows may
+    live in the separate 'security' database.
+    """
+    UserSession.objects.filter(user_id=instance.pk).delete()
+    SecurityEvent.objects.filter(user_id=instance.pk).delete()
+
+
+# ----- Search index (university.search) -----
+
+@receiver(post_save, sender=Student)
+@receiver(post_save, sender=Subject)
+def index_search_document(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index(instance)
+
+
+@receiver(post_save, sender=Professor)
+def index_professor(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    search.index(instance)
+    # Subjects are found by their professor's name too
+    for subject in instance.subjects.select_related('faculty'):
+        subject.professor = instance
+        search.index(subject)
+
+
+USER_NAME_FIELDS = {'username', 'first_name', 'last_name', 'email'}
+
+
+@receiver(post_save, sender=User)
+def index_user_profiles(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or created:
+        # A new user has no profile yet; the profile's own save indexes it
+        return
+    if update_fields is not None and not USER_NAME_FIELDS & set(update_fields):
+        # e.g. update_last_login() on every login
+        return
+    student = Student.objects.select_related('faculty').filter(user=instance).first()
+    if student is not None:
+        student.user = instance
+        search.index(student)
+    professor = Professor.objects.select_related('faculty').filter(user=instance).first()
+    if professor is not None:
+        professor.user = instance
+        index_professor(Professor, professor)
+
+
+@receiver(post_save, sender=Faculty)
+def index_faculty_members(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    for kind, (model, _, related) in search.SOURCES.items():
+        for obj in model.objects.select_related(*related).filter(faculty=instance):
+            search.index(obj)
+
+
+@receiver(pre_delete, sender=Professor)
+def remember_professor_subjects(sender, instance, **kwargs):
+    # SET_NULL on Subject.professor is a bulk update, without signals
+    instance._search_subject_ids = list(instance.subjects.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Student)
+@receiver(post_delete, sender=Professor)
+@receiver(post_delete, sender=Subject)
+def unindex_search_document(sender, instance, **kwargs):
+    search.unindex(sender._meta.model_name, instance.pk)
+    for subject in Subject.objects.select_related('faculty', 'professor__user').filter(
+        pk__in=getattr(instance, '_search_subject_ids', ())
+    ):
+        search.index(subject)
+
+
+# ----- Typeahead index (university.typeahead) -----
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+@receiver(post_save, sender=Subject)
+@receiver(post_delete, sender=Subject)
+def refresh_typeahead(sender, instance, raw=False, **kwargs):
+    if not raw:
+        typeahead.refresh(sender._meta.model_name, [instance.pk])
+
+
+@receiver(post_save, sender=User)
+def refresh_typeahead_user(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or created:
+        return
+    if update_fields is not None and not USER_NAME_FIELDS & set(update_fields):
+        return
+    typeahead.refresh('student', Student.objects.filter(user=instance).values_list('pk', flat=True))
+
+
+# ----- Admin bootstrap payload (university.bootstrap) -----
+
+@receiver(post_save, sender=Faculty)
+@receiver(post_delete, sender=Faculty)
+@receiver(post_save, sender=Subject)
+@receiver(post_delete, sender=Subject)
+@receiver(post_save, sender=Professor)
+@receiver(post_delete, sender=Professor)
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def invalidate_admin_bootstrap(sender, raw=False, **kwargs):
+    if not raw:
+        versions.bump(versions.ADMIN_BOOTSTRAP)
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def invalidate_admin_bootstrap_count(sender, created=True, raw=False, **kwargs):
+    # Only the enrollment count is in the payload; grading changes nothing
+    if created and not raw:
+        versions.bump(versions.ADMIN_BOOTSTRAP)
+
+
+@receiver(post_save, sender=User)
+def invalidate_admin_bootstrap_user(sender, created, raw=False, update_fields=None, **kwargs):
+    if raw or created:
+        return
+    if update_fields is not None and not USER_NAME_FIELDS & set(update_fields):
+        return
+    versions.bump(versions.ADMIN_BOOTSTRAP)
+
+
+# ----- Administrator statistics (university.counters) -----
+
+def _tracked_field_changed(instance, field, update_fields):
+    return not instance._state.adding and (update_fields is None or field in update_fields)
+
+
+@receiver(pre_save, sender=Student)
+@receiver(pre_save, sender=Professor)
+@receiver(pre_save, sender=Subject)
+def remember_counted_faculty(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw and _tracked_field_changed(instance, 'faculty', update_fields):
+        instance._counted_faculty_id = (
+            sender.objects.filter(pk=instance.pk).values_list('faculty_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_save, sender=Professor)
+@receiver(post_save, sender=Subject)
+def count_profile_or_subject(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    name = counters.NAMES[sender]
+    if created:
+        counters.add([(name, counters.TOTAL, 1), (name, counters.faculty_key(instance.faculty_id), 1)])
+        return
+    old = getattr(instance, '_counted_faculty_id', instance.faculty_id)
+    if old == instance.faculty_id:
+        return
+    old_key, new_key = counters.faculty_key(old), counters.faculty_key(instance.faculty_id)
+    changes = [(name, old_key, -1), (name, new_key, 1)]
+    if sender is Subject:
+        # Its enrollments count for the subject's faculty
+        moved = Enrollment.objects.filter(subject=instance).count()
+        changes += [('enrollments', old_key, -moved), ('enrollments', new_key, moved)]
+    counters.add(changes)
+
+
+@receiver(post_delete, sender=Student)
+@receiver(post_delete, sender=Professor)
+@receiver(post_delete, sender=Subject)
+def uncount_profile_or_subject(sender, instance, **kwargs):
+    name = counters.NAMES[sender]
+    counters.add([(name, counters.TOTAL, -1), (name, counters.faculty_key(instance.faculty_id), -1)])
+
+
+def _enrollment_faculty_id(subject_id, instance=None):
+    if instance is not None and Enrollment.subject.is_cached(instance):
+        return instance.subject.faculty_id
+    return Subject.objects.filter(pk=subject_id).values_list('faculty_id', flat=True).first()
+
+
+def _enrollment_changes(instance, delta):
+    return [
+        ('enrollments', counters.TOTAL, delta),
+        ('enrollments', counters.faculty_key(_enrollment_faculty_id(instance.subject_id, instance)), delta),
+        ('enrollments', counters.day_key(timezone.localdate(instance.enrolled_date)), delta),
+    ]
+
+
+@receiver(pre_save, sender=Enrollment)
+def remember_counted_subject(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw and _tracked_field_changed(instance, 'subject', update_fields):
+        instance._counted_subject_id = (
+            Enrollment.objects.filter(pk=instance.pk).values_list('subject_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Enrollment)
+def count_enrollment(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.add(_enrollment_changes(instance, 1))
+        return
+    old = getattr(instance, '_counted_subject_id', instance.subject_id)
+    if old is None or old == instance.subject_id:
+        return
+    old_faculty, new_faculty = _enrollment_faculty_id(old), _enrollment_faculty_id(instance.subject_id, instance)
+    if old_faculty != new_faculty:
+        counters.add([
+            ('enrollments', counters.faculty_key(old_faculty), -1),
+            ('enrollments', counters.faculty_key(new_faculty), 1),
+        ])
+
+
+@receiver(post_delete, sender=Enrollment)
+def uncount_enrollment(sender, instance, **kwargs):
+    counters.add(_enrollment_changes(instance, -1))
+
+
+@receiver(post_delete, sender=Faculty)
+def move_faculty_counts(sender, instance, **kwargs):
+    # Its students and professors were set to no faculty (SET_NULL, which
+    # sends no signals): move their counts to the no-faculty key. Its
+    # subjects and their enrollments were deleted (CASCADE) and uncounted by
+    # their own post_delete handlers, so those counters are already zero.
+    key = counters.faculty_key(instance.pk)
+    rows = list(StatCounter.objects.filter(key=key).values_list('name').annotate(value=Sum('value')).order_by())
+    counters.add([(name, counters.faculty_key(None), value) for name, value in rows])
+    StatCounter.objects.filter(key=key).delete()
+
+
+# ----- Faculty reports (university.reports) -----
+
+@receiver(post_save, sender=Faculty)
+@receiver(post_delete, sender=Faculty)
+@receiver(post_save, sender=Subject)
+@receiver(post_delete, sender=Subject)
+@receiver(post_save, sender=Professor)
+@receiver(post_delete, sender=Professor)
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def invalidate_faculty_reports(sender, raw=False, **kwargs):
+    # Grades and scores are in the reports: every enrollment save counts
+    if not raw:
+        versions.bump(versions.FACULTY_REPORTS)
+
+
+@receiver(post_save, sender=User)
+def invalidate_faculty_reports_user(sender, created, raw=False, update_fields=None, **kwargs):
+    if raw or created:
+        return
+    if update_fields is not None and not USER_NAME_FIELDS & set(update_fields):
+        return
+    versions.bump(versions.FACULTY_REPORTS)
@@ -0,0 +1,156 @@
+"""
+Slow-query log.
+
+SlowQueryMiddleware times every query a request runs. Queries slower than
+SLOW_QUERY_THRESHOLD_MS are written to the ``university.slow_queries``
+logger, together with:
+
+- the view (URL name, e.g. ``enrollment-list``) and HTTP method and path
+- the user's role (administrator, professor, student, user, anonymous)
+- how often the same SQL ran during the request, which exposes N+1 loops
+- the project frames of the call stack (Django/DRF internals are dropped)
+
+A fraction SLOW_QUERY_SAMPLE_RATE of requests is sampled: every query of a
+sampled request is logged at INFO regardless of its duration, which shows
+the full query pattern of a view.
+
+settings_production.LOGGING sends the logger to logs/slow_queries.log.
+"""
+import logging
+import os
+import random
+import time
+import traceback
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+
+from . import metrics
+from .metrics import track_queries
+
+logger = logging.getLogger('university.slow_queries')
+
+# Frames of the instrumentation itself are left out of the stack
+_SKIP_FILES = {os.path.abspath(__file__), os.path.abspath(metrics.__file__)}
+_LIBRARY_DIRS = ('site-packages', 'dist-packages')
+
+
+def _project_stack(depth):
+    """The innermost ``depth`` frames that belong to this project."""
+    base_dir = str(settings.BASE_DIR)
+    frames = [
+        frame for frame in traceback.extract_stack()
+        if frame.filename.startswith(base_dir)
+        and os.path.abspath(frame.filename) not in _SKIP_FILES
+        and not any(part in frame.filename for part in _LIBRARY_DIRS)
+    ]
+    return [
+        f'{os.path.relpath(frame.filename, base_dir)}:{frame.lineno} in {frame.name}'
+        for frame in frames[-depth:]
+    ]
+
+
+class QueryRecorder:
+    """Execute wrapper keeping the queries worth logging for one request."""
+
+    def __init__(self, threshold_ms, sampled, stack_depth):
+        self.threshold = threshold_ms / 1000
+        self.sampled = sampled
+        self.stack_depth = stack_depth
+        self.counts = Counter()
+        self.recorded = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            # The SQL still holds %s placeholders, so repeats of the same
+            # statement with different parameters count as duplicates.
+            self.counts[sql] += 1
+            if self.sampled or duration >= self.threshold:
+                self.recorded.append({
+                    'sql': sql,
+                    'duration': duration,
+                    'alias': context['connection'].alias,
+                    'stack': _project_stack(self.stack_depth),
+                })
+
+
+def _role(request):
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return 'anonymous'
+    from .views import get_user_role
+    return get_user_role(user)
+
+
+class SlowQueryMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        recorder = self._recorder()
+        with track_queries(recorder):
+            response = self.get_response(request)
+        if recorder.recorded:
+            self._log(request, response, recorder)
+        return response
+
+    async def __acall__(self, request):
+        recorder = self._recorder()
+        with track_queries(recorder):
+            response = await self.get_response(request)
+        if recorder.recorded:
+            # The role may need a query
+            await sync_to_async(self._log)(request, response, recorder)
+        return response
+
+    def _recorder(self):
+        sample_rate = getattr(settings, 'SLOW_QUERY_SAMPLE_RATE', 0.0)
+        return QueryRecorder(
+            threshold_ms=getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', 100),
+            sampled=sample_rate > 0 and random.random() < sample_rate,
+            stack_depth=getattr(settings, 'SLOW_QUERY_STACK_DEPTH', 8),
+        )
+
+    def _log(self, request, response, recorder):
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name or match.route) if match else 'unmatched'
+        # request.user is the DRF-authenticated user once the view has run
+        role = _role(request)
+        total = sum(recorder.counts.values())
+        max_sql = getattr(settings, 'SLOW_QUERY_MAX_SQL_LENGTH', 2000)
+
+        for query in recorder.recorded:
+            slow = query['duration'] >= recorder.threshold
+            sql = query['sql']
+            if len(sql) > max_sql:
+                sql = sql[:max_sql] + '...'
+            logger.log(
+                logging.WARNING if slow else logging.INFO,
+                '%s query %.1f ms view=%s role=%s %s %s status=%s db=%s duplicates=%d/%d\n'
+                '    %s\n%s',
+                'slow' if slow else 'sampled',
+                query['duration'] * 1000,
+                view,
+                role,
+                request.method,
+                request.path,
+                response.status_code,
+                query['alias'],
+                recorder.counts[query['sql']],
+                total,
+                sql,
+                '\n'.join(f'    at {frame}' for frame in query['stack']),
+            )
@@ -0,0 +1,44 @@
+"""
+Background tasks run by ``manage.py run_jobs`` (university.jobs).
+
+Each returns something JSON-serializable, stored on its Job.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import counters, jobs, reports, search
+from .models import Job
+from .security_models import TokenBlacklist
+
+
+@jobs.task(concurrency=1)
+def reconcile_counters():
+    """Fix drifted statistics counters; see university.counters."""
+    return {'fixed': len(counters.reconcile())}
+
+
+@jobs.task(concurrency=1, max_attempts=2)
+def rebuild_search_index():
+    """Recreate the full-text search documents; see university.search."""
+    return {'documents': search.rebuild()}
+
+
+@jobs.task(every=60 * 60)
+def clean_expired_tokens():
+    TokenBlacklist.clean_expired()
+
+
+@jobs.task(every=24 * 60 * 60)
+def purge_jobs():
+    """Delete finished jobs older than JOB_KEEP_DAYS."""
+    cutoff = timezone.now() - timedelta(days=getattr(settings, 'JOB_KEEP_DAYS', 7))
+    deleted, _ = Job.objects.filter(status__in=[Job.DONE, Job.FAILED], finished_at__lt=cutoff).delete()
+    return {'deleted': deleted}
+
+
+@jobs.task(queue='reports', concurrency=1, max_attempts=2, retry_delay=60)
+def build_faculty_report(report_id):
+    """Build a FacultyReport; see university.reports."""
+    return reports.generate(report_id)
@@ -0,0 +1,274 @@
+import datetime
+import json
+import random
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import DatabaseError, connection, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from . import counters, fast_serializers, models, reports, serializers, versions
+from .filters import EnrollmentFilterBackend
+
+
+class EnrollmentFilterPlanTests(TestCase):
+    """Each enrollment filter is planned on its composite index (migration 0008)."""
+    rows = 20000
+    page_size = 100
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(0)
+        faculty = models.Faculty.objects.create(name='Plans')
+        users = User.objects.bulk_create(User(username=f'plan_s{i}') for i in range(cls.rows // 20))
+        students = models.Student.objects.bulk_create(
+            models.Student(user=user, enrollment_number=f'P{i:07d}') for i, user in enumerate(users)
+        )
+        subjects = models.Subject.objects.bulk_create(
+            models.Subject(name=f'Plan subject {i}', faculty=faculty) for i in range(cls.rows // 500)
+        )
+        pairs = set()
+        while len(pairs) < cls.rows:
+            pairs.add((rng.randrange(len(students)), rng.randrange(len(subjects))))
+        start = timezone.now() - datetime.timedelta(days=365)
+        enrollments = models.Enrollment.objects.bulk_create(
+            models.Enrollment(
+                student=students[s],
+                subject=subjects[j],
+                grade=rng.choice('ABCDF') if rng.random() < 0.7 else '',
+                score=round(rng.uniform(40, 100), 2),
+            )
+            for s, j in sorted(pairs)
+        )
+        # enrolled_date is auto_now_add: spread it over the year afterwards
+        for enrollment in enrollments:
+            enrollment.enrolled_date = start + datetime.timedelta(days=rng.randrange(365))
+        models.Enrollment.objects.bulk_update(enrollments, ['enrolled_date'], batch_size=2000)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE' if connection.vendor == 'sqlite' else 'ANALYZE university_enrollment')
+        cls.subject, cls.student = subjects[0], students[0]
+
+    def assertPlannedOn(self, params, index):
+        queryset = EnrollmentFilterBackend().filter_queryset(
+            Request(APIRequestFactory().get('/', params)), models.Enrollment.objects.all(), None,
+        ).order_by('pk')
+        for query in (queryset, queryset[:self.page_size]):
+            with self.subTest(params=params, paged=query is not queryset):
+                self.assertIn(index, query.explain())
+
+    def test_subject_filters_use_subject_grade_index(self):
+        for params in (
+            {'subject': self.subject.pk},
+            {'subject': self.subject.pk, 'grade': 'ungraded'},
+            {'subject': self.subject.pk, 'grade': 'A,B'},
+            {'subject': self.subject.pk, 'score_min': 50, 'score_max': 80},
+        ):
+            self.assertPlannedOn(params, 'enrollment_subject_grade')
+
+    def test_student_date_filters_use_student_date_index(self):
+        month_ago = (timezone.now() - datetime.timedelta(days=30)).date().isoformat()
+        half_year_ago = (timezone.now() - datetime.timedelta(days=182)).date().isoformat()
+        for params in (
+            {'student': self.student.pk, 'enrolled_after': half_year_ago, 'enrolled_before': month_ago},
+            {'student': self.student.pk, 'enrolled_after': month_ago},
+        ):
+            self.assertPlannedOn(params, 'enrollment_student_date')
+
+
+class FastListSerializerTests(TestCase):
+    """The fast list path returns exactly what the DRF serializers return."""
+
+    @classmethod
+    def setUpTestData(cls):
+        faculty = models.Faculty.objects.create(name='Fast')
+        cls.admin = User.objects.create(username='fast_admin')
+        models.Administrator.objects.create(user=cls.admin, faculty=faculty)
+        professors = [
+            models.Professor.objects.create(
+                user=User.objects.create(username=f'fast_p{i}', first_name='' if i else 'Ada'),
+                faculty=None if i else faculty,
+                title='Dr.',
+            )
+            for i in range(2)
+        ]
+        students = [
+            models.Student.objects.create(
+                user=User.objects.create(username=f'fast_s{i}', email='' if i % 2 else f'fast_s{i}@example.com'),
+                faculty=None if i % 2 else faculty,
+                enrollment_number=f'F{i:04d}',
+            )
+            for i in range(4)
+        ]
+        subjects = [
+            models.Subject.objects.create(name='With professor', faculty=faculty, professor=professors[0]),
+            models.Subject.objects.create(name='Blank first name', faculty=faculty, professor=professors[1]),
+            models.Subject.objects.create(name='No professor', faculty=faculty, professor=None),
+        ]
+        for i, student in enumerate(students):
+            for j, subject in enumerate(subjects):
+                graded = (i + j) % 2 == 0
+                models.Enrollment.objects.create(
+                    student=student,
+                    subject=subject,
+                    grade='B' if graded else '',
+                    score=72.5 if graded else None,
+                )
+        cls.professor, cls.student = professors[0].user, students[0].user
+
+    def test_serializer_output_matches(self):
+        for queryset, serializer_class, fast in (
+            (models.Student.objects.order_by('pk'), serializers.StudentSerializer, fast_serializers.STUDENT_LIST),
+            (models.Professor.objects.order_by('pk'), serializers.ProfessorSerializer,
+             fast_serializers.PROFESSOR_LIST),
+            (models.Enrollment.objects.order_by('pk'), serializers.EnrollmentSerializer,
+             fast_serializers.ENROLLMENT_LIST),
+        ):
+            with self.subTest(serializer=serializer_class.__name__):
+                # Compared as JSON text, so key order and value types count too
+                self.assertEqual(
+                    json.dumps(fast.to_representation(fast.values(queryset))),
+                    json.dumps(serializer_class(queryset, many=True).data),
+                )
+
+    def test_list_endpoints_match_per_role(self):
+        paginated = {
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+            'PAGE_SIZE': 5,
+        }
+        for user in (self.admin, self.professor, self.student):
+            client = APIClient()
+            client.force_authenticate(user)
+            for path in ('students/', 'professors/', 'enrollments/',
+                         'students/?fields=id,user.email', 'enrollments/?fields=score,professor_name,id'):
+                for rest_framework in (settings.REST_FRAMEWORK, paginated):
+                    with self.subTest(user=user.username, path=path, paginated=rest_framework is paginated):
+                        responses = []
+                        for fast in (False, True):
+                            with override_settings(FAST_LIST_SERIALIZERS=fast, REST_FRAMEWORK=rest_framework):
+                                response = client.get(f'/api/university/{path}')
+                            self.assertEqual(response.status_code, 200)
+                            responses.append(response.content)
+                        self.assertEqual(responses[1], responses[0])
+
+
+class CounterShardTests(TestCase):
+    """Sharded statistics counters and once-per-transaction version bumps."""
+
+    @override_settings(COUNTER_SHARDS=4)
+    def test_shards_sum_up_and_reconcile_folds_them(self):
+        faculty = models.Faculty.objects.create(name='Shards')
+        before = models.Student.objects.count()
+        for i in range(12):
+            models.Student.objects.create(
+                user=User.objects.create(username=f'shard_s{i}'), faculty=faculty, enrollment_number=f'S{i:04d}',
+            )
+        self.assertGreater(models.StatCounter.objects.filter(name='students', key=counters.TOTAL).count(), 1)
+        self.assertEqual(counters.totals()['students'], before + 12)
+
+        models.StatCounter.objects.filter(name='students', key=counters.TOTAL).update(value=0)
+        self.assertEqual(counters.reconcile(), [('students', counters.TOTAL, 0, before + 12)])
+        self.assertEqual(
+            list(models.StatCounter.objects.filter(name='students', key=counters.TOTAL).values_list('shard', 'value')),
+            [(0, before + 12)],
+        )
+        self.assertEqual(counters.stats()['totals']['students'], before + 12)
+
+    def test_versions_are_bumped_once_per_transaction(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            for _ in range(3):
+                versions.bump(versions.ADMIN_BOOTSTRAP)
+                versions.bump(versions.FACULTY_REPORTS)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(versions.current(versions.ADMIN_BOOTSTRAP), 1)
+        self.assertEqual(versions.current(versions.FACULTY_REPORTS), 1)
+
+    def test_rolled_back_savepoint_keeps_the_outer_bump(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    versions.bump(versions.ADMIN_BOOTSTRAP)
+                    raise DatabaseError
+            except DatabaseError:
+                pass
+            versions.bump(versions.ADMIN_BOOTSTRAP)
+        self.assertEqual(versions.current(versions.ADMIN_BOOTSTRAP), 1)
+
+
+# The manifest storage needs collectstatic
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class AdminFullTextSearchTests(TestCase):
+    """The admin change lists search the full-text index, every match paged."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superuser = User.objects.create_superuser('search_admin', 'search_admin@example.com', 'x')
+        faculty = models.Faculty.objects.create(name='Search')
+        subject = models.Subject.objects.create(name='Quasar observation', faculty=faculty)
+        for i in range(150):
+            student = models.Student.objects.create(
+                user=User.objects.create(username=f'zephyrine{i}', first_name='Zephyrine'),
+                faculty=faculty,
+                enrollment_number=f'Z{i:04d}',
+            )
+            if i % 3 == 0:
+                models.Enrollment.objects.create(student=student, subject=subject)
+
+    def setUp(self):
+        self.client.force_login(self.superuser)
+
+    def test_search_lists_every_match(self):
+        for path, query, count in (
+            ('/admin/university/student/', 'zephyr', 150),
+            ('/admin/university/student/', 'zephyrine1', 61),
+            ('/admin/university/enrollment/', 'quasar', 50),
+            ('/admin/university/professor/', 'zephyr', 0),
+        ):
+            with self.subTest(path=path, query=query):
+                response = self.client.get(path, {'q': query})
+                self.assertContains(response, 'id="searchbar"')
+                self.assertEqual(response.context['cl'].result_count, count)
+
+
+class FacultyReportSnapshotTests(TestCase):
+    """A report holds the data of the one version it is stored under."""
+
+    def build_changing_data(self, changes):
+        """build_sections() that bumps the version during its first ``changes`` calls."""
+        build = reports.build_sections
+        calls = []
+
+        def build_sections(faculty_ids, processes=None):
+            calls.append(faculty_ids)
+            sections = build(faculty_ids, processes)
+            if len(calls) <= changes:
+                versions.bump_all([reports.VERSION_NAME])
+            return sections
+        return mock.patch.object(reports, 'build_sections', build_sections), calls
+
+    def test_report_is_rebuilt_when_the_data_changes_during_the_build(self):
+        models.Faculty.objects.create(name='Reports')
+        report = reports.request('json')
+        patch, calls = self.build_changing_data(1)
+        with patch:
+            result = reports.generate(report.pk, processes=1)
+
+        self.assertEqual(len(calls), 2)
+        stored = models.FacultyReport.objects.get(finished_at__isnull=False)
+        self.assertEqual(stored.data_version, report.data_version + 1)
+        self.assertEqual(result['version'], stored.data_version)
+        self.assertEqual(json.loads(bytes(stored.content))['version'], stored.data_version)
+        self.assertFalse(models.FacultyReport.objects.filter(pk=report.pk).exists())
+        self.assertEqual(reports.status('json')['status'], 'ready')
+
+    def test_build_gives_up_on_data_that_keeps_changing(self):
+        report = reports.request('csv')
+        patch, calls = self.build_changing_data(reports.BUILD_ATTEMPTS)
+        with patch, self.assertRaises(reports.DataChanged):
+            reports.generate(report.pk, processes=1)
+        self.assertEqual(len(calls), reports.BUILD_ATTEMPTS)
+        self.assertIsNone(models.FacultyReport.objects.get(pk=report.pk).finished_at)
@@ -0,0 +1,220 @@
+"""
+In-memory prefix index for "type a few letters, pick one" lookups.
+
+Each worker process keeps a sorted list of lowercase keys per kind:
+
+- student: username and enrollment number
+- subject: name
+
+A lookup is two bisections and a short scan of the keys sharing the
+prefix, a few microseconds, with no database query. Keys are folded like
+the full-text index (case and diacritics), so "zan" finds "Žana".
+
+The index is built on the first lookup with one ``values_list()`` query per
+kind. Student and subject saves and deletes (and username changes) update
+it in the process that made them once the transaction commits; the other
+workers pick them up when their copy is older than TYPEAHEAD_MAX_AGE
+seconds and the next lookup rebuilds it. Until then they return the old
+entries, which for a picker is harmless: the chosen id is still checked by
+the endpoint it is submitted to.
+
+``manage.py bench_typeahead`` measures build time, memory and lookup
+latency for 100k entries.
+"""
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, bisect_right
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Student, Subject
+
+
+def fold(text):
+    """Lowercase ``text`` and strip its accents; ``text`` itself if already folded."""
+    if text.isascii():
+        folded = text.lower()
+    else:
+        decomposed = unicodedata.normalize('NFKD', text)
+        folded = ''.join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+    # Usernames are usually folded already: keep one string, not two
+    return text if folded == text else folded
+
+
+class PrefixIndex:
+    """
+    Sorted (folded key, id) pairs, plus each id's entry: a (name, key, ...)
+    tuple kept as given, the original spelling of the keys for display.
+    Several keys may point to the same id and several ids may share a key;
+    lookups return each id once.
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._ids = []
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _folded(entry):
+        return {fold(key) for key in entry[1:] if key}
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build from (id, entry) rows in one sort."""
+        index = cls()
+        pairs = []
+        for pk, entry in rows:
+            index._entries[pk] = entry
+            pairs.extend((folded, pk) for folded in cls._folded(entry))
+        pairs.sort()
+        index._keys = [key for key, _ in pairs]
+        index._ids = [pk for _, pk in pairs]
+        return index
+
+    def set(self, pk, entry):
+        """Add or replace the entry of ``pk``."""
+        with self._lock:
+            self._remove(pk)
+            for folded in self._folded(entry):
+                i = bisect_right(self._keys, folded)
+                self._keys.insert(i, folded)
+                self._ids.insert(i, pk)
+            self._entries[pk] = entry
+
+    def discard(self, pk):
+        with self._lock:
+            self._remove(pk)
+
+    def _remove(self, pk):
+        entry = self._entries.pop(pk, None)
+        if entry is None:
+            return
+        for folded in self._folded(entry):
+            start, end = bisect_left(self._keys, folded), bisect_right(self._keys, folded)
+            i = self._ids.index(pk, start, end)
+            del self._keys[i], self._ids[i]
+
+    def lookup(self, prefix, limit=10):
+        """Up to ``limit`` (folded key, id, entry) matches of ``prefix``, in key order."""
+        prefix = fold(prefix)
+        matches, seen = [], set()
+        with self._lock:
+            keys, ids = self._keys, self._ids
+            i = bisect_left(keys, prefix)
+            while i < len(keys) and len(matches) < limit and keys[i].startswith(prefix):
+                pk = ids[i]
+                if pk not in seen:
+                    seen.add(pk)
+                    matches.append((keys[i], pk, self._entries[pk]))
+                i += 1
+        return matches
+
+
+def _student_rows(pks=None):
+    queryset = Student.objects.all()
+    if pks is not None:
+        queryset = queryset.filter(pk__in=pks)
+    for pk, username, number, first, last in queryset.values_list(
+        'pk', 'user__username', 'enrollment_number', 'user__first_name', 'user__last_name'
+    ).iterator(chunk_size=5000):
+        yield pk, (' '.join(part for part in (first, last) if part), username, number)
+
+
+def _student_label(entry):
+    name, username, number = entry
+    if name:
+        return f'{name} ({username}, {number})' if number else f'{name} ({username})'
+    return f'{username} ({number})' if number else username
+
+
+def _subject_rows(pks=None):
+    queryset = Subject.objects.all()
+    if pks is not None:
+        queryset = queryset.filter(pk__in=pks)
+    for pk, name in queryset.values_list('pk', 'name').iterator(chunk_size=5000):
+        yield pk, (name, name)
+
+
+def _subject_label(entry):
+    return entry[0]
+
+
+# kind -> (rows(pks=None) giving (id, (name, key, ...)) for every object or
+# for those ids, label(entry) for the response). Labels are built per lookup
+# rather than stored, one string less per entry.
+SOURCES = {
+    'student': (_student_rows, _student_label),
+    'subject': (_subject_rows, _subject_label),
+}
+
+_indexes = None
+_built_at = 0.0
+_build_lock = threading.Lock()
+
+
+def _build():
+    global _indexes, _built_at
+    _indexes = {kind: PrefixIndex.from_rows(rows()) for kind, (rows, _) in SOURCES.items()}
+    _built_at = time.monotonic()
+
+
+def get_indexes():
+    """The per-kind indexes, built on first use and rebuilt once too old."""
+    if _indexes is None:
+        with _build_lock:
+            if _indexes is None:
+                _build()
+    else:
+        max_age = getattr(settings, 'TYPEAHEAD_MAX_AGE', 300)
+        # One request rebuilds; the others keep answering from the old copy
+        if max_age and time.monotonic() - _built_at > max_age and _build_lock.acquire(blocking=False):
+            try:
+                _build()
+            finally:
+                _build_lock.release()
+    return _indexes
+
+
+def lookup(prefix, kinds=None, limit=10):
+    """Matches of ``prefix`` as dicts with type, id and label, by key."""
+    indexes = get_indexes()
+    matches = []
+    for kind in kinds or SOURCES:
+        label = SOURCES[kind][1]
+        matches.extend((key, kind, pk, label(entry)) for key, pk, entry in indexes[kind].lookup(prefix, limit))
+    matches.sort()
+    return [{'type': kind, 'id': pk, 'label': label} for _, kind, pk, label in matches[:limit]]
+
+
+def refresh(kind, pks):
+    """Re-read these objects into the index once the transaction commits."""
+    pks = set(pks)
+
+    def apply():
+        # Waits for a rebuild in progress, which may predate this change
+        with _build_lock:
+            if _indexes is None:
+                return
+            index = _indexes[kind]
+            found = set()
+            for pk, entry in SOURCES[kind][0](pks):
+                index.set(pk, entry)
+                found.add(pk)
+            for pk in pks - found:
+                index.discard(pk)
+
+    if pks:
+        transaction.on_commit(apply)
+
+
+def reset():
+    """Drop the index; the next lookup rebuilds it."""
+    global _indexes
+    with _build_lock:
+        _indexes = None
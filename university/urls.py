@@ -1,6 +1,6 @@
-from django.urls import path, include
+from django.urls import include, path, re_path
 from rest_framework import routers
-from . import views
+from . import async_views, batch, views
 
 router = routers.DefaultRouter()
 router.register(r'faculties', views.FacultyViewSet)
@@ -9,7 +9,40 @@ router.register(r'professors', views.ProfessorViewSet)
 router.register(r'students', views.StudentViewSet)
 router.register(r'administrators', views.AdministratorViewSet)
 router.register(r'enrollments', views.EnrollmentViewSet)
+
+# Async read-only mirrors of the router's list/retrieve routes and the dashboard
+async_urlpatterns = [
+    path('dashboard/', async_views.dashboard, name='async-dashboard'),
+]
+for prefix, viewset, basename in router.registry:
+    async_urlpatterns += [
+        path(
+            f'{prefix}/',
+            async_views.AsyncListView.as_view(view_class=viewset),
+            name=f'async-{basename}-list',
+        ),
+        path(
+            f'{prefix}/<int:pk>/',
+            async_views.AsyncRetrieveView.as_view(view_class=viewset),
+            name=f'async-{basename}-detail',
+        ),
+    ]
+
 urlpatterns = [
     path('', include(router.urls)),
     path('dashboard/', views.dashboard, name='dashboard'),
-]
\ No newline at end of file
+    path('me/', views.MeView.as_view(), name='me'),
+    path('stats/', views.StatsView.as_view(), name='stats'),
+    path('search/', views.SearchView.as_view(), name='search'),
+    path('typeahead/', views.TypeaheadView.as_view(), name='typeahead'),
+    path('batch/', batch.BatchView.as_view(), name='batch'),
+    path('admin/bootstrap/', views.AdminBootstrapView.as_view(), name='admin-bootstrap'),
+    re_path(r'^reports/faculties/(?P<report_format>json|csv)/$', views.FacultyReportView.as_view(),
+            name='faculty-report'),
+    re_path(
+        r'^reports/faculties/(?P<report_format>json|csv)/download/$',
+        views.FacultyReportDownloadView.as_view(),
+        name='faculty-report-download',
+    ),
+    path('async/', include(async_urlpatterns)),
+]
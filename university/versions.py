@@ -0,0 +1,127 @@
+"""
+Version counters for cached data built from several tables.
+
+A cache keys its entry by ``current(name)``; the signal handlers in
+university/signals.py call ``bump(name)`` when a row the entry was built
+from changes. The counter is a DataVersion row in the database, so every
+worker sees a bump at once, whatever the cache backend, and an entry is
+never served after the data behind it changed (writes through
+QuerySet.update() or raw SQL excepted: those should bump explicitly).
+
+The bump runs after the write commits, once per transaction however many
+rows it changed: the names bumped in a transaction are incremented
+together, in one transaction of their own. If that fails, e.g. on "database
+is locked", the write stands and the old entry is served until the bump
+succeeds: the failure is logged, and this process retries after its next
+bumping commit, or on its next current() outside a transaction.
+``manage.py bump_versions`` bumps by hand, for a process that exited before
+retrying or after bulk writes.
+"""
+import logging
+import threading
+
+from django.db import DatabaseError, IntegrityError, router, transaction
+from django.db.models import F
+
+from .models import DataVersion
+
+logger = logging.getLogger(__name__)
+
+# The versioned caches, named here so that the signal handlers can bump them
+# without importing bootstrap and reports (and DRF's serializers with them)
+ADMIN_BOOTSTRAP = 'admin-bootstrap'
+FACULTY_REPORTS = 'faculty-reports'
+
+# Names whose bump failed after commit, retried by this process
+_missed = set()
+_missed_lock = threading.Lock()
+
+
+def current(name):
+    """The version of ``name``, 0 until it is first bumped."""
+    if _missed and not transaction.get_connection(router.db_for_write(DataVersion)).in_atomic_block:
+        retry_missed()
+    version = DataVersion.objects.filter(name=name).values_list('version', flat=True).first()
+    return version or 0
+
+
+def _increment(name):
+    if DataVersion.objects.filter(name=name).update(version=F('version') + 1):
+        return
+    try:
+        with transaction.atomic(using=router.db_for_write(DataVersion)):
+            DataVersion.objects.create(name=name, version=1)
+    except IntegrityError:
+        # Created by a concurrent bump meanwhile
+        DataVersion.objects.filter(name=name).update(version=F('version') + 1)
+
+
+def _increment_after_commit(names):
+    # The write is committed: failing here would turn it into a 500
+    if _missed:
+        retry_missed()
+    try:
+        with transaction.atomic(using=router.db_for_write(DataVersion)):
+            # In name order, so concurrent bumps lock the rows alike
+            for name in sorted(names):
+                _increment(name)
+    except DatabaseError:
+        logger.exception('Could not bump data versions %s; retrying on the next use', sorted(names))
+        with _missed_lock:
+            _missed.update(names)
+
+
+class _PendingBumps:
+    """The on_commit callback of a transaction's bumps."""
+
+    def __init__(self):
+        self.names = set()
+
+    def __call__(self):
+        _increment_after_commit(self.names)
+
+
+def retry_missed():
+    """Bump the versions whose bump failed after commit. Returns those still failing."""
+    with _missed_lock:
+        names = list(_missed)
+    for name in names:
+        try:
+            _increment(name)
+        except DatabaseError:
+            logger.warning('Could not bump data version %r again', name)
+            continue
+        with _missed_lock:
+            _missed.discard(name)
+    return set(_missed)
+
+
+def bump(name):
+    """
+    Invalidate everything cached under the current version of ``name``,
+    once the transaction commits (a rolled-back write changes nothing).
+    """
+    using = router.db_for_write(DataVersion)
+    connection = transaction.get_connection(using)
+    pending = getattr(connection, '_pending_version_bumps', None)
+    # Reuse the transaction's callback while it is registered: rolling back
+    # the transaction, or the savepoint it was registered in, drops it
+    if pending is not None and connection.in_atomic_block and any(
+        entry[1] is pending for entry in connection.run_on_commit
+    ):
+        pending.names.add(name)
+        return
+    pending = connection._pending_version_bumps = _PendingBumps()
+    pending.names.add(name)
+    transaction.on_commit(pending, using=using)
+
+
+def bump_all(names=None):
+    """Bump ``names`` (default: every version there is) now. Returns the names."""
+    if names is None:
+        names = list(DataVersion.objects.order_by('name').values_list('name', flat=True))
+    for name in names:
+        _increment(name)
+    with _missed_lock:
+        _missed.difference_update(names)
+    return names
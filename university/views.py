@@ -1,11 +1,22 @@
 from rest_framework import viewsets
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated, BasePermission
 from rest_framework.response import Response
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
 from rest_framework import status
 from django.contrib.auth.models import User
+from django.core.exceptions import ObjectDoesNotExist
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
 
-from . import models, serializers
+from . import bootstrap, counters, fast_serializers, models, reports, search, serializers, typeahead, versions
+from .fast_serializers import FastListMixin
+from .fieldsets import FieldsetMixin
+from .filters import EnrollmentFilterBackend
+from .routers import ReplicaReadMixin
+from .server_timing import ServerTimingMixin, get_timing
 
 
 # Custom Permission Classes
@@ -59,22 +70,38 @@ class IsOwnProfileOrAdmin(BasePermission):
         return obj.user == request.user
 
 
+class ProfileMeMixin:
+    """
+    ``GET <profiles>/me/``: the caller's own profile, through the reverse
+    one-to-one of the authenticated user (one indexed lookup) instead of
+    filtering the list. Honours ``?fields=``; 404 without such a profile.
+    """
 
-class FacultyViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def me(self, request):
+        try:
+            profile = getattr(request.user, self.queryset.model._meta.model_name)
+        except ObjectDoesNotExist:
+            raise NotFound(f'You have no {self.queryset.model._meta.verbose_name} profile.')
+        return Response(self.get_serializer(profile).data)
+
+
+class FacultyViewSet(ServerTimingMixin, ReplicaReadMixin, FieldsetMixin, viewsets.ModelViewSet):
     queryset = models.Faculty.objects.all()
     serializer_class = serializers.FacultySerializer
     permission_classes = [IsAdminOrReadOnly]
 
 
-class SubjectViewSet(viewsets.ModelViewSet):
+class SubjectViewSet(ServerTimingMixin, ReplicaReadMixin, FieldsetMixin, viewsets.ModelViewSet):
     queryset = models.Subject.objects.all()
     serializer_class = serializers.SubjectSerializer
     permission_classes = [IsAdminOrReadOnly]
 
 
-class ProfessorViewSet(viewsets.ModelViewSet):
+class ProfessorViewSet(ServerTimingMixin, ReplicaReadMixin, ProfileMeMixin, FastListMixin, viewsets.ModelViewSet):
     queryset = models.Professor.objects.all()
     serializer_class = serializers.ProfessorSerializer
+    fast_list_serializer = fast_serializers.PROFESSOR_LIST
     permission_classes = [IsAdminOrReadOnly]
 
     def get_serializer_class(self):
@@ -83,9 +110,10 @@ class ProfessorViewSet(viewsets.ModelViewSet):
         return serializers.ProfessorSerializer
 
 
-class StudentViewSet(viewsets.ModelViewSet):
+class StudentViewSet(ServerTimingMixin, ReplicaReadMixin, ProfileMeMixin, FastListMixin, viewsets.ModelViewSet):
     queryset = models.Student.objects.all()
     serializer_class = serializers.StudentSerializer
+    fast_list_serializer = fast_serializers.STUDENT_LIST
     permission_classes = [IsAdminOrReadOnly]
 
     def get_serializer_class(self):
@@ -94,7 +122,7 @@ class StudentViewSet(viewsets.ModelViewSet):
         return serializers.StudentSerializer
 
 
-class AdministratorViewSet(viewsets.ModelViewSet):
+class AdministratorViewSet(ServerTimingMixin, ReplicaReadMixin, ProfileMeMixin, FieldsetMixin, viewsets.ModelViewSet):
     queryset = models.Administrator.objects.all()
     serializer_class = serializers.AdministratorSerializer
     permission_classes = [IsAdministrator]
@@ -105,10 +133,12 @@ class AdministratorViewSet(viewsets.ModelViewSet):
         return serializers.AdministratorSerializer
 
 
-class EnrollmentViewSet(viewsets.ModelViewSet):
+class EnrollmentViewSet(ServerTimingMixin, ReplicaReadMixin, FastListMixin, viewsets.ModelViewSet):
     """Handle student enrollments and grade management."""
     queryset = models.Enrollment.objects.all()
+    fast_list_serializer = fast_serializers.ENROLLMENT_LIST
     permission_classes = [IsAuthenticated]
+    filter_backends = [*api_settings.DEFAULT_FILTER_BACKENDS, EnrollmentFilterBackend]
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -143,30 +173,227 @@ class EnrollmentViewSet(viewsets.ModelViewSet):
         return super().get_permissions()
 
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def dashboard(request):
-    user = request.user
-    # Determine role by presence of related profile
-    role = 'user'
+class DashboardView(ServerTimingMixin, ReplicaReadMixin, APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(build_dashboard(request.user))
+
+
+PROFILE_SERIALIZERS = {
+    'administrator': serializers.AdministratorSerializer,
+    'professor': serializers.ProfessorSerializer,
+    'student': serializers.StudentSerializer,
+}
+
+
+class MeView(ServerTimingMixin, ReplicaReadMixin, APIView):
+    """
+    The caller's role, ids and profile. The user is re-read once with all
+    three profiles joined, rather than probing each profile table in turn.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        user = User.objects.select_related(*PROFILE_SERIALIZERS).get(pk=request.user.pk)
+        role, profile = 'user', None
+        for name in PROFILE_SERIALIZERS:
+            # Same precedence as get_user_role()
+            profile = getattr(user, name, None)
+            if profile is not None:
+                role = name
+                break
+        return Response({
+            'role': role,
+            'user_id': user.pk,
+            'profile_id': profile.pk if profile is not None else None,
+            'profile': PROFILE_SERIALIZERS[role](profile).data if profile is not None else None,
+        })
+
+
+class StatsView(ServerTimingMixin, ReplicaReadMixin, APIView):
+    """
+    Totals, per-faculty counts and enrollments per day over the last
+    ``?days=`` days (default 30, max 366), from the maintained counters.
+    """
+    permission_classes = [IsAdministrator]
+    max_days = 366
+
+    def get(self, request):
+        try:
+            days = min(max(int(request.query_params.get('days', 30)), 1), self.max_days)
+        except ValueError:
+            raise ValidationError({'days': ['Expected a number.']})
+        return Response(counters.stats(days))
+
+
+class SearchView(ServerTimingMixin, ReplicaReadMixin, APIView):
+    """
+    Ranked full-text search: ``?q=`` (every word matched as a prefix),
+    optional ``?type=student,professor,subject`` and ``?limit=`` (max 100).
+    """
+    permission_classes = [IsAuthenticated]
+    max_limit = 100
+
+    def get(self, request):
+        params = request.query_params
+        query = params.get('q', '')
+        if not search.terms(query):
+            raise ValidationError({'q': ['Enter at least one word to search for.']})
+
+        kinds = [kind.strip() for kind in params.get('type', '').split(',') if kind.strip()]
+        unknown = [kind for kind in kinds if kind not in search.SOURCES]
+        if unknown:
+            raise ValidationError({'type': [f'Unknown type "{kind}".' for kind in unknown]})
+
+        try:
+            limit = min(max(int(params.get('limit', 20)), 1), self.max_limit)
+        except ValueError:
+            raise ValidationError({'limit': ['Expected a number.']})
+
+        timing = get_timing(request)
+        if timing is None:
+            results = search.search(query, kinds, limit)
+        else:
+            with timing.measure('search'):
+                results = search.search(query, kinds, limit)
+        return Response({'query': query, 'results': results})
+
+
+class TypeaheadView(ServerTimingMixin, ReplicaReadMixin, APIView):
+    """
+    Students and subjects whose username, enrollment number or name starts
+    with ``?q=``, from the in-memory index. Optional ``?type=student,subject``
+    and ``?limit=`` (max 50).
+    """
+    permission_classes = [IsAdminOrProfessor]
+    max_limit = 50
+
+    def get(self, request):
+        params = request.query_params
+        query = params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': ['Enter the first letters to look up.']})
+
+        kinds = [kind.strip() for kind in params.get('type', '').split(',') if kind.strip()]
+        unknown = [kind for kind in kinds if kind not in typeahead.SOURCES]
+        if unknown:
+            raise ValidationError({'type': [f'Unknown type "{kind}".' for kind in unknown]})
+
+        try:
+            limit = min(max(int(params.get('limit', 10)), 1), self.max_limit)
+        except ValueError:
+            raise ValidationError({'limit': ['Expected a number.']})
+
+        timing = get_timing(request)
+        if timing is None:
+            results = typeahead.lookup(query, kinds, limit)
+        else:
+            with timing.measure('typeahead'):
+                results = typeahead.lookup(query, kinds, limit)
+        return Response({'query': query, 'results': results})
+
+
+class AdminBootstrapView(ServerTimingMixin, ReplicaReadMixin, APIView):
+    """
+    Counts, faculties, subjects, professors and students for the admin
+    dashboard in one cached response (university.bootstrap).
+    """
+    permission_classes = [IsAdministrator]
+
+    def get(self, request):
+        version = versions.current(bootstrap.VERSION_NAME)
+        etag = bootstrap.etag(version)
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+
+        timing = get_timing(request)
+        if timing is None:
+            _, body = bootstrap.get(version)
+        else:
+            with timing.measure('bootstrap'):
+                _, body = bootstrap.get(version)
+        response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        # Revalidate every time: a 304 costs one query
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+class FacultyReportView(ServerTimingMixin, APIView):
+    """
+    GET: status of the faculty report of the current data version, in
+    ``json`` or ``csv``. POST: queue its build if needed (university.reports).
+    """
+    permission_classes = [IsAdministrator]
+
+    def get(self, request, report_format):
+        return Response(reports.status(report_format))
+
+    def post(self, request, report_format):
+        report = reports.request(report_format)
+        data = reports.status(report_format)
+        ready = report.finished_at is not None
+        return Response(data, status=status.HTTP_200_OK if ready else status.HTTP_202_ACCEPTED)
+
+
+class FacultyReportDownloadView(ServerTimingMixin, APIView):
+    """The faculty report file, of the current data version or ``?version=``."""
+    permission_classes = [IsAdministrator]
+
+    @classmethod
+    def response_content_type(cls, kwargs):
+        # Read by the batch view, which only takes JSON answers
+        return reports.CONTENT_TYPES[kwargs['report_format']]
+
+    def get(self, request, report_format):
+        version = request.query_params.get('version')
+        if version is None:
+            version = versions.current(reports.VERSION_NAME)
+        elif not version.isdigit():
+            raise ValidationError({'version': ['Expected a number.']})
+        report = models.FacultyReport.objects.filter(
+            format=report_format, data_version=version, finished_at__isnull=False,
+        ).only('sha256').first()
+        if report is None:
+            raise NotFound('This report has not been generated yet; POST to the report to request it.')
+
+        etag = f'"{report.sha256}"'
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+        content = models.FacultyReport.objects.filter(pk=report.pk).values_list('content', flat=True).get()
+        response = HttpResponse(bytes(content), content_type=reports.CONTENT_TYPES[report_format])
+        response['ETag'] = etag
+        response['Content-Disposition'] = f'attachment; filename="faculty-report-v{version}.{report_format}"'
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+def get_user_role(user):
+    """Determine role by presence of related profile."""
     if hasattr(user, 'administrator'):
-        role = 'administrator'
+        return 'administrator'
     elif hasattr(user, 'professor'):
-        role = 'professor'
+        return 'professor'
     elif hasattr(user, 'student'):
-        role = 'student'
+        return 'student'
+    return 'user'
+
+
+def build_dashboard(user):
+    role = get_user_role(user)
 
     data = {
         'username': user.username,
         'role': role,
     }
     
-    # Admin: return summary statistics
+    # Admin: return summary statistics, from the maintained counters
     if role == 'administrator':
-        data['total_students'] = models.Student.objects.count()
-        data['total_professors'] = models.Professor.objects.count()
-        data['total_subjects'] = models.Subject.objects.count()
-        data['total_enrollments'] = models.Enrollment.objects.count()
+        for name, value in counters.totals().items():
+            data[f'total_{name}'] = value
     
     # Professor: return their courses
     if role == 'professor':
@@ -197,5 +424,7 @@ def dashboard(request):
             for e in enrollments
         ]
 
-    return Response(data)
+    return data
+
 
+dashboard = DashboardView.as_view()
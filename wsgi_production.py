@@ -83,6 +83,13 @@ django.setup()
 # This is the callable that handles HTTP requests
 application = get_wsgi_application()
 
+# Warm the worker before it accepts traffic: resolve all routes, build the
+# serializers, load simplejwt, open the DB connection and prime caches.
+# Readiness is reported on /readyz, liveness on /healthz.
+from project.warmup import warm_up
+
+warm_up(application)
+
 # ============================================================================
 # LOGGING CONFIGURATION
 # ============================================================================